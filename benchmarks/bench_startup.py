@@ -0,0 +1,172 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Time command line startup of reformat_input.py and parse_output.py
+==================================================================
+
+Every --method of reformat_input.py (including the methods without
+reformatting, which return before importing skbio) and every method parsed
+by parse_output.py is launched as a new Python process on a small synthetic
+ALF run, the timings use the baselines of run_benchmarks (keys
+"startup_<script>_<method> <size>"). A command exiting with an error stops
+the benchmark.
+
+Usage (from the directory containing hgt_analysis):
+python -m hgt_analysis.benchmarks.bench_startup
+"""
+
+import sys
+import json
+import click
+from os import devnull
+from os.path import join, dirname, abspath, exists
+from shutil import rmtree
+from subprocess import check_call
+from tempfile import mkdtemp
+from time import time
+
+from hgt_analysis.benchmarks.generate_fixtures import write_fixtures
+from hgt_analysis.benchmarks.run_benchmarks import (default_baselines_fp,
+                                                    compare_baselines)
+from hgt_analysis.reformat_input import all_methods
+
+
+scripts_dp = dirname(dirname(abspath(__file__)))
+# methods parsed by parse_output.py, with a tool output fixture (see
+# generate_fixtures.tool_outputs)
+parsed_methods = ('trex', 'ranger-dtl', 'riata-hgt', 'jane4')
+
+
+def time_command(command, repeats=5):
+    """ Return the best wall time of a command over repeats launches
+
+    Raises subprocess.CalledProcessError if the command fails, a crash
+    would otherwise be timed as a fast startup.
+
+    Parameters
+    ----------
+    command: list of strings
+        command line
+    repeats: integer
+        number of launches
+
+    Returns
+    -------
+    seconds: float
+        minimum wall time
+    """
+    best = None
+    with open(devnull, 'w') as devnull_f:
+        for i in range(repeats):
+            start = time()
+            check_call(command, stdout=devnull_f, stderr=devnull_f)
+            elapsed = time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+    return best
+
+
+def startup_commands(fixtures_dp, working_dp):
+    """ Command lines of the methods of reformat_input.py and parse_output.py
+
+    Parameters
+    ----------
+    fixtures_dp: string
+        directory path of the synthetic ALF run (see write_fixtures)
+    working_dp: string
+        directory path for outputs
+
+    Returns
+    -------
+    commands: list of tuples
+        (benchmark name, command line)
+    """
+    commands = [("startup_python", [sys.executable, "-c", "pass"])]
+    for method in all_methods:
+        commands.append((
+            "startup_reformat_input_%s" % method,
+            [sys.executable, join(scripts_dp, "reformat_input.py"),
+             "--method", method,
+             "--gene-tree-fp",
+             join(fixtures_dp, "GeneTrees", "GeneTree00001.nwk"),
+             "--species-tree-fp", join(fixtures_dp, "species_tree.nwk"),
+             "--gene-msa-fa-fp", join(fixtures_dp, "MSA", "MSA_00001_aa.fa"),
+             "--output-tree-fp", join(working_dp, "output_tree.txt"),
+             "--output-msa-phy-fp", join(working_dp, "output_msa.phy")]))
+    for method in parsed_methods:
+        commands.append((
+            "startup_parse_output_%s" % method,
+            [sys.executable, join(scripts_dp, "parse_output.py"),
+             "--method", method,
+             "--hgt-results-fp",
+             join(fixtures_dp, "tool_outputs", "%s.txt" % method)]))
+    return commands
+
+
+@click.command()
+@click.option('--size', required=False, type=int, default=10,
+              show_default=True, help='Number of species tree tips')
+@click.option('--repeats', required=False, type=int, default=5,
+              show_default=True, help='Number of launches per command')
+@click.option('--baselines-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              default=default_baselines_fp,
+              help='Baseline timings in JSON format')
+@click.option('--save-baseline', is_flag=True, default=False,
+              help='Save timings as the new baselines')
+@click.option('--tolerance', required=False, type=float, default=1.5,
+              show_default=True,
+              help='Maximum allowed ratio of timing to baseline')
+def _main(size,
+          repeats,
+          baselines_fp,
+          save_baseline,
+          tolerance):
+    """ Time startup of every method and compare to the baselines
+
+    Parameters
+    ----------
+    size: integer
+        number of species tree tips
+    repeats: integer
+        number of launches per command
+    baselines_fp: string
+        file path to baseline timings
+    save_baseline: boolean
+        save timings as the new baselines
+    tolerance: float
+        maximum allowed ratio of timing to baseline
+    """
+    working_dp = mkdtemp(prefix="hgt_startup_")
+    try:
+        fixtures_dp = join(working_dp, "fixtures")
+        write_fixtures(fixtures_dp, size, num_genes=1)
+        timings = {}
+        for name, command in startup_commands(fixtures_dp, working_dp):
+            timings["%s %d" % (name, size)] = time_command(command, repeats)
+    finally:
+        rmtree(working_dp)
+    baselines = {}
+    if exists(baselines_fp):
+        with open(baselines_fp, 'U') as baselines_f:
+            baselines = json.load(baselines_f)
+    regressions = compare_baselines(timings, baselines, tolerance,
+                                    sys.stdout)
+    if save_baseline:
+        baselines.update(timings)
+        with open(baselines_fp, 'w') as baselines_f:
+            json.dump(baselines, baselines_f, indent=4, sort_keys=True)
+    elif regressions:
+        sys.stderr.write("Regressions: %s\n" % ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,313 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Generate synthetic ALF-like fixtures for benchmarks
+===================================================
+"""
+
+import random
+import click
+from os import makedirs
+from os.path import join, isdir
+
+
+amino_acids = "ARNDCQEGHILKMFPSTWYV"
+
+
+def species_names(num_species):
+    """ Return ALF-like species names (SE001, SE002, ..)
+
+    Parameters
+    ----------
+    num_species: integer
+        number of species
+
+    Returns
+    -------
+    names: list of strings
+        species names, zero padded to equal length
+    """
+    width = max(3, len(str(num_species)))
+    return ["SE%0*d" % (width, i + 1) for i in range(num_species)]
+
+
+def random_tree(tips, rng):
+    """ Build a random binary tree by joining random pairs of subtrees
+
+    Parameters
+    ----------
+    tips: list of strings
+        leaf names
+    rng: random.Random
+        random number generator
+
+    Returns
+    -------
+    tree: list
+        nested lists [left, right, length], leaves are (name, length)
+        tuples
+    """
+    nodes = [(tip, rng.uniform(0.1, 3.0)) for tip in tips]
+    while len(nodes) > 1:
+        i = rng.randrange(len(nodes))
+        nodes[i], nodes[-1] = nodes[-1], nodes[i]
+        left = nodes.pop()
+        j = rng.randrange(len(nodes))
+        nodes[j], nodes[-1] = nodes[-1], nodes[j]
+        right = nodes.pop()
+        nodes.append([left, right, rng.uniform(0.1, 3.0)])
+    return nodes[0]
+
+
+def to_newick(tree, label=lambda name: name):
+    """ Serialize a tree built by random_tree in Newick format
+
+    The tree is traversed iteratively, deep trees do not hit the recursion
+    limit.
+
+    Parameters
+    ----------
+    tree: list
+        output of random_tree
+    label: function
+        maps leaf names to Newick labels
+
+    Returns
+    -------
+    newick: string
+        tree in Newick format
+    """
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            out.append(node)
+        elif isinstance(node, tuple):
+            out.append("%s:%.7f" % (label(node[0]), node[1]))
+        else:
+            stack.append("):%.7f" % node[2])
+            stack.append(node[1])
+            stack.append(",")
+            stack.append(node[0])
+            out.append("(")
+    # the root branch length is output by ALF
+    return "%s;" % "".join(out)
+
+
+def gene_tree_newick(species_tree, gene_id):
+    """ Gene tree following the species tree with "SPECIES_GENE" leaves
+
+    Parameters
+    ----------
+    species_tree: list
+        output of random_tree
+    gene_id: integer
+        gene number
+
+    Returns
+    -------
+    newick: string
+        gene tree in Newick format
+    """
+    return to_newick(species_tree,
+                     label=lambda name: "%s_%05d" % (name, gene_id))
+
+
+def msa_fasta(species, gene_id, length, rng):
+    """ Random MSA with ALF-like "SPECIES/GENE" labels in FASTA format
+
+    Parameters
+    ----------
+    species: list of strings
+        species names
+    gene_id: integer
+        gene number
+    length: integer
+        alignment length
+    rng: random.Random
+        random number generator
+
+    Returns
+    -------
+    fasta: string
+        MSA in FASTA format
+    """
+    root = [rng.choice(amino_acids) for i in range(length)]
+    records = []
+    for name in species:
+        seq = list(root)
+        for i in range(length // 20):
+            seq[rng.randrange(length)] = rng.choice(amino_acids)
+        records.append(">%s/%05d\n%s\n" % (name, gene_id, "".join(seq)))
+    return "".join(records)
+
+
+def alf_logfile(species, num_genes, num_transfers, rng):
+    """ ALF logfile.txt with "lgt from organism" lines
+
+    Parameters
+    ----------
+    species: list of strings
+        species names
+    num_genes: integer
+        number of genes in the root genome
+    num_transfers: integer
+        number of transfers
+    rng: random.Random
+        random number generator
+
+    Returns
+    -------
+    logfile: string
+        ALF log file content
+    """
+    lines = ["ALF simulation log\n"]
+    new_gene = num_genes
+    for i in range(num_transfers):
+        new_gene += 1
+        donor, recipient = rng.sample(species, 2)
+        lines.append("gene loss in organism %s of gene %d\n" % (
+            rng.choice(species), rng.randrange(1, num_genes + 1)))
+        lines.append(
+            "lgt from organism %s with gene %d to organism %s, now gene %d\n"
+            % (donor, rng.randrange(1, num_genes + 1), recipient, new_gene))
+    return "".join(lines)
+
+
+def tool_outputs(num_hgts, num_lines=1000):
+    """ Output of each HGT tool reporting num_hgts transfers
+
+    Parameters
+    ----------
+    num_hgts: integer
+        number of HGTs to report
+    num_lines: integer
+        number of filler lines preceding the result
+
+    Returns
+    -------
+    outputs: dict
+        dictionary of methods (keys) and tool output
+    """
+    filler = "".join("progress line %d\n" % i for i in range(num_lines))
+    return {
+        'trex': "%shgt : number of HGT(s) found = %d\n" % (filler, num_hgts),
+        'ranger-dtl': "%sThe minimum reconciliation cost is: %d "
+                      "(Duplications: 0, Transfers: %d, Losses: 0)\n"
+                      % (filler, 3 * num_hgts, num_hgts),
+        'riata-hgt': "%sThere are %d component(s)\n" % (filler, num_hgts),
+        'jane4': "%sHost Switch: %d\n" % (filler, num_hgts)}
+
+
+def observed_transfers_table(num_genes, tools, rng):
+    """ Observed transfers table read by compute_accuracy
+
+    Parameters
+    ----------
+    num_genes: integer
+        number of genes (rows)
+    tools: list of strings
+        tool names (columns)
+    rng: random.Random
+        random number generator
+
+    Returns
+    -------
+    table: string
+        observed transfers table
+    """
+    lines = ["#number of HGTs detected\n",
+             "#\tgene ID\t%s\n" % "\t".join(tools)]
+    for i in range(num_genes):
+        lines.append("%d\t%d\t%s\n" % (i, i + 1, "\t".join(
+            str(rng.choice((0, 0, 0, 1, 2))) for tool in tools)))
+    return "".join(lines)
+
+
+def write_fixtures(output_dp,
+                   num_species,
+                   num_genes=10,
+                   msa_length=300,
+                   seed=0):
+    """ Write a synthetic ALF run of num_species species
+
+    Layout:
+    species_tree.nwk, GeneTrees/GeneTree*.nwk, MSA/MSA_*_aa.fa,
+    logfile.txt, observed_hgts.txt, tool_outputs/<method>.txt
+
+    Parameters
+    ----------
+    output_dp: string
+        output directory path (created if missing)
+    num_species: integer
+        number of species tree tips
+    num_genes: integer
+        number of gene trees and MSAs
+    msa_length: integer
+        alignment length
+    seed: integer
+        random seed
+    """
+    rng = random.Random(seed)
+    for dp in (output_dp, join(output_dp, "GeneTrees"),
+               join(output_dp, "MSA"), join(output_dp, "tool_outputs")):
+        if not isdir(dp):
+            makedirs(dp)
+    species = species_names(num_species)
+    species_tree = random_tree(species, rng)
+    with open(join(output_dp, "species_tree.nwk"), 'w') as output_f:
+        output_f.write("%s\n" % to_newick(species_tree))
+    for gene_id in range(1, num_genes + 1):
+        with open(join(output_dp, "GeneTrees",
+                       "GeneTree%05d.nwk" % gene_id), 'w') as output_f:
+            output_f.write("%s\n" % gene_tree_newick(species_tree, gene_id))
+        with open(join(output_dp, "MSA",
+                       "MSA_%05d_aa.fa" % gene_id), 'w') as output_f:
+            output_f.write(msa_fasta(species, gene_id, msa_length, rng))
+    with open(join(output_dp, "logfile.txt"), 'w') as output_f:
+        output_f.write(alf_logfile(species, 10 * num_species,
+                                   num_species, rng))
+    with open(join(output_dp, "observed_hgts.txt"), 'w') as output_f:
+        output_f.write(observed_transfers_table(
+            10 * num_species, ["T-REX", "RANGER-DTL", "RIATA-HGT", "Jane 4"],
+            rng))
+    for method, output in tool_outputs(num_species // 10 + 1,
+                                       num_lines=num_species).items():
+        with open(join(output_dp, "tool_outputs",
+                       "%s.txt" % method), 'w') as output_f:
+            output_f.write(output)
+
+
+@click.command()
+@click.option('--output-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=False),
+              help='Output directory for the synthetic ALF run')
+@click.option('--num-species', required=True, type=int,
+              help='Number of species tree tips')
+@click.option('--num-genes', required=False, type=int, default=10,
+              show_default=True, help='Number of gene trees and MSAs')
+@click.option('--msa-length', required=False, type=int, default=300,
+              show_default=True, help='Alignment length')
+@click.option('--seed', required=False, type=int, default=0,
+              show_default=True, help='Random seed')
+def _main(output_dir,
+          num_species,
+          num_genes,
+          msa_length,
+          seed):
+    """ Write a synthetic ALF-like run for benchmarks
+    """
+    write_fixtures(output_dir, num_species, num_genes=num_genes,
+                   msa_length=msa_length, seed=seed)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,312 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Time reformatting, parsing and accuracy functions on synthetic ALF runs
+=======================================================================
+
+Baselines are stored as JSON (benchmark name and species tree size mapped
+to seconds) with --save-baseline, later runs report the ratio to the
+baseline and exit with status 1 if a benchmark is slower than
+tolerance x baseline.
+
+Usage (from the directory containing hgt_analysis):
+python -m hgt_analysis.benchmarks.run_benchmarks --size 100 --size 1000
+"""
+
+import sys
+import json
+import click
+from os import devnull
+from os.path import join, dirname, abspath, exists
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import time
+
+from skbio import TreeNode
+
+from hgt_analysis.reformat_input import (reformat_trex,
+                                         reformat_rangerdtl,
+                                         reformat_riatahgt,
+                                         reformat_jane4,
+                                         reformat_treepuzzle)
+from hgt_analysis.parse_output import (parse_trex,
+                                       parse_rangerdtl,
+                                       parse_riatahgt,
+                                       parse_jane4)
+from hgt_analysis.compute_accuracy import (parse_expected_transfers,
+                                           parse_observed_transfers,
+                                           compute_accuracy,
+                                           compute_accuracy_store)
+from hgt_analysis.results_store import (convert_observed_transfers,
+                                        load_results_store)
+from hgt_analysis.benchmarks.generate_fixtures import write_fixtures
+
+
+default_baselines_fp = join(dirname(abspath(__file__)), "baselines.json")
+
+
+def time_function(func, setup=None, repeats=3):
+    """ Return the best wall time of func over repeats calls
+
+    Parameters
+    ----------
+    func: function
+        function to time, called with the arguments returned by setup
+    setup: function, optional
+        untimed function returning a tuple of arguments for func
+    repeats: integer
+        number of calls
+
+    Returns
+    -------
+    seconds: float
+        minimum wall time
+    """
+    best = None
+    for i in range(repeats):
+        args = setup() if setup is not None else ()
+        start = time()
+        func(*args)
+        elapsed = time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _read_trees(fixtures_dp):
+    """ Read the species tree and first gene tree of a fixture
+    """
+    gene_tree = TreeNode.read(
+        join(fixtures_dp, "GeneTrees", "GeneTree00001.nwk"), format='newick')
+    species_tree = TreeNode.read(
+        join(fixtures_dp, "species_tree.nwk"), format='newick')
+    return gene_tree, species_tree
+
+
+def _quiet(func):
+    """ Discard the standard output of func
+    """
+    def wrapper(*args):
+        stdout = sys.stdout
+        sys.stdout = open(devnull, 'w')
+        try:
+            return func(*args)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return wrapper
+
+
+def benchmark_fixture(fixtures_dp, working_dp, repeats=3):
+    """ Time all benchmarks on one synthetic ALF run
+
+    Parameters
+    ----------
+    fixtures_dp: string
+        directory path of the synthetic ALF run (see write_fixtures)
+    working_dp: string
+        directory path for outputs
+    repeats: integer
+        number of calls per benchmark
+
+    Returns
+    -------
+    timings: list of tuples
+        (benchmark name, seconds)
+    """
+    timings = []
+    output_fp = join(working_dp, "output_tree.txt")
+    msa_fp = join(fixtures_dp, "MSA", "MSA_00001_aa.fa")
+    msa_phy_fp = join(working_dp, "output_msa.phy")
+
+    timings.append(("read_newick", time_function(
+        _read_trees, lambda: (fixtures_dp,), repeats)))
+    for name, reformat in [("reformat_trex", reformat_trex),
+                           ("reformat_rangerdtl", reformat_rangerdtl),
+                           ("reformat_riatahgt", reformat_riatahgt),
+                           ("reformat_jane4", reformat_jane4)]:
+        timings.append((name, time_function(
+            reformat, lambda: _read_trees(fixtures_dp) + (output_fp,),
+            repeats)))
+    timings.append(("reformat_treepuzzle", time_function(
+        reformat_treepuzzle,
+        lambda: _read_trees(fixtures_dp) + (msa_fp, output_fp, msa_phy_fp),
+        repeats)))
+
+    for name, method, parse in [("parse_trex", "trex", parse_trex),
+                                ("parse_rangerdtl", "ranger-dtl",
+                                 parse_rangerdtl),
+                                ("parse_riatahgt", "riata-hgt",
+                                 parse_riatahgt),
+                                ("parse_jane4", "jane4", parse_jane4)]:
+        tool_output_fp = join(fixtures_dp, "tool_outputs",
+                              "%s.txt" % method)
+
+        def _parse(tool_output_fp=tool_output_fp, parse=parse):
+            with open(tool_output_fp, 'U') as input_f:
+                parse(input_f)
+        timings.append((name, time_function(_parse, repeats=repeats)))
+
+    logfile_fp = join(fixtures_dp, "logfile.txt")
+    observed_hgts_fp = join(fixtures_dp, "observed_hgts.txt")
+
+    def _parse_expected():
+        with open(logfile_fp, 'U') as ground_truth_f:
+            return parse_expected_transfers(ground_truth_f)
+
+    def _parse_observed():
+        with open(observed_hgts_fp, 'U') as observed_hgts_f:
+            return parse_observed_transfers(observed_hgts_f)
+
+    timings.append(("parse_expected_transfers",
+                    time_function(_parse_expected, repeats=repeats)))
+    timings.append(("parse_observed_transfers",
+                    time_function(_parse_observed, repeats=repeats)))
+    expected_transfers = _parse_expected()
+    timings.append(("compute_accuracy", time_function(
+        _quiet(compute_accuracy),
+        lambda: (expected_transfers, _parse_observed()), repeats)))
+
+    store_dp = join(working_dp, "observed_hgts_store")
+    with open(observed_hgts_fp, 'U') as observed_hgts_f:
+        convert_observed_transfers(observed_hgts_f, store_dp)
+    timings.append(("compute_accuracy_store", time_function(
+        _quiet(compute_accuracy_store),
+        lambda: (expected_transfers,) + load_results_store(store_dp),
+        repeats)))
+    return timings
+
+
+def run_benchmarks(sizes, repeats=3, num_genes=1, seed=0):
+    """ Time all benchmarks for every species tree size
+
+    Parameters
+    ----------
+    sizes: list of integers
+        numbers of species tree tips
+    repeats: integer
+        number of calls per benchmark
+    num_genes: integer
+        number of gene trees per synthetic ALF run
+    seed: integer
+        random seed
+
+    Returns
+    -------
+    timings: dict
+        dictionary of "benchmark size" (keys) and seconds
+    """
+    timings = {}
+    for size in sizes:
+        working_dp = mkdtemp(prefix="hgt_benchmark_%d_" % size)
+        try:
+            fixtures_dp = join(working_dp, "fixtures")
+            write_fixtures(fixtures_dp, size, num_genes=num_genes, seed=seed)
+            for name, seconds in benchmark_fixture(fixtures_dp, working_dp,
+                                                   repeats=repeats):
+                timings["%s %d" % (name, size)] = seconds
+        finally:
+            rmtree(working_dp)
+    return timings
+
+
+def compare_baselines(timings, baselines, tolerance, output_f):
+    """ Output timings with their ratio to the baselines
+
+    Parameters
+    ----------
+    timings: dict
+        output of run_benchmarks
+    baselines: dict
+        previously saved timings
+    tolerance: float
+        maximum allowed ratio to the baseline
+    output_f: file object
+        file descriptor for the report
+
+    Returns
+    -------
+    regressions: list of strings
+        benchmarks slower than tolerance x baseline
+    """
+    regressions = []
+    output_f.write("#benchmark\tsize\tseconds\tbaseline\tratio\n")
+    for key in sorted(timings, key=lambda k: (int(k.split()[1]), k)):
+        name, size = key.split()
+        if key in baselines and baselines[key] > 0:
+            ratio = timings[key] / baselines[key]
+            output_f.write("%s\t%s\t%.6f\t%.6f\t%.2f\n" % (
+                name, size, timings[key], baselines[key], ratio))
+            if ratio > tolerance:
+                regressions.append(key)
+        else:
+            output_f.write("%s\t%s\t%.6f\tNaN\tNaN\n" % (
+                name, size, timings[key]))
+    return regressions
+
+
+@click.command()
+@click.option('--size', 'sizes', required=False, multiple=True, type=int,
+              default=(100, 1000, 10000), show_default=True,
+              help='Number of species tree tips (repeatable)')
+@click.option('--repeats', required=False, type=int, default=3,
+              show_default=True, help='Number of calls per benchmark')
+@click.option('--seed', required=False, type=int, default=0,
+              show_default=True, help='Random seed')
+@click.option('--baselines-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              default=default_baselines_fp,
+              help='Baseline timings in JSON format')
+@click.option('--save-baseline', is_flag=True, default=False,
+              help='Save timings as the new baselines')
+@click.option('--tolerance', required=False, type=float, default=1.5,
+              show_default=True,
+              help='Maximum allowed ratio of timing to baseline')
+def _main(sizes,
+          repeats,
+          seed,
+          baselines_fp,
+          save_baseline,
+          tolerance):
+    """ Run benchmarks and compare the timings to the baselines
+
+    Parameters
+    ----------
+    sizes: tuple of integers
+        numbers of species tree tips
+    repeats: integer
+        number of calls per benchmark
+    seed: integer
+        random seed
+    baselines_fp: string
+        file path to baseline timings
+    save_baseline: boolean
+        save timings as the new baselines
+    tolerance: float
+        maximum allowed ratio of timing to baseline
+    """
+    timings = run_benchmarks(sizes, repeats=repeats, seed=seed)
+    baselines = {}
+    if exists(baselines_fp):
+        with open(baselines_fp, 'U') as baselines_f:
+            baselines = json.load(baselines_f)
+    regressions = compare_baselines(timings, baselines, tolerance,
+                                    sys.stdout)
+    if save_baseline:
+        baselines.update(timings)
+        with open(baselines_fp, 'w') as baselines_f:
+            json.dump(baselines, baselines_f, indent=4, sort_keys=True)
+    elif regressions:
+        sys.stderr.write("Regressions: %s\n" % ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    _main()
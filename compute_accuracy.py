@@ -14,6 +14,9 @@ Given known HGTs, compute precision, recall and F-score for various tools
 import sys
 import click
 import re
+from os.path import isdir
+
+from profiling import start_profiling, stage
 
 
 def parse_expected_transfers(ground_truth_f):
@@ -78,14 +81,40 @@ def parse_observed_transfers(observed_hgts_f):
 		gene_id = line[1]
 		i = 0
 		for hgt_num in line[2:]:
-			if int(hgt_num) > 0:
+			# tools which did not report a result are written as NaN
+			if hgt_num != "NaN" and int(hgt_num) > 0:
 				tools[tools_id[i]].append(gene_id) 
 			i += 1
 	return tools
 
 
+def parse_gene_ids(observed_hgts_f):
+	""" Parse the gene IDs of a summary file of observed transfers
+
+	Parameters
+	----------
+	observed_hgts_f: string
+		file descriptor of observed transfers (see parse_observed_transfers)
+
+	Returns
+	-------
+	gene_ids: set
+		gene IDs of all rows
+	"""
+	gene_ids = set()
+	for line in observed_hgts_f:
+		if not line.startswith('#'):
+			gene_ids.add(line.split('\t')[1].strip())
+	return gene_ids
+
+
 def compute_accuracy(expected_transfers,
-					 observed_transfers):
+					 observed_transfers,
+					 gene_ids=None,
+					 resamples=0,
+					 confidence=0.95,
+					 seed=None,
+					 jobs=1):
 	""" Compute precision, recall and F-score for horizontally detected genes
 
 	Parameters
@@ -96,22 +125,242 @@ def compute_accuracy(expected_transfers,
 	observed_transfers: dict
 		dictionary of tools' names (keys) and a list of horizontal gene
 		transfers
+	gene_ids: set, optional
+		gene IDs of all genes (see parse_gene_ids), required for bootstrap
+		confidence intervals
+	resamples: integer
+		number of bootstrap resamples, 0 for point estimates only
+	confidence: float
+		confidence level of bootstrap intervals
+	seed: integer, optional
+		random seed of bootstrap resamples
+	jobs: integer
+		number of processes computing bootstrap intervals
 	"""
+	# gene IDs are compared as integers (ex. "00001" and "1" are gene 1), as
+	# in compute_accuracy_store
 	exp_s = set()
 	obs_s = set()
 	for tup in expected_transfers:
-		exp_s.add(tup[1])
+		exp_s.add(int(tup[1]))
+	counts = []
 	for tool in observed_transfers:
-		obs_s = set(observed_transfers[tool])
+		obs_s = set(int(gene_id) for gene_id in observed_transfers[tool])
 		if not obs_s:
 			continue
 		tp = len(obs_s & exp_s)
 		fp = len(obs_s - exp_s)
 		fn = len(exp_s - obs_s)
-		p = tp / float(tp + fp)
-		r = tp / float(tp + fn)
-		f = float(2 * p * r) / float(p + r)
-		sys.stdout.write("%s\t%.2f\t%.2f\t%.2f\n" % (tool, p, r, f))
+		counts.append((tool, tp, fp, fn))
+	if resamples:
+		num_genes = len(set(int(gene_id) for gene_id in gene_ids) | exp_s)
+		write_bootstrap_accuracy(counts, num_genes, resamples, confidence,
+								 seed, jobs)
+	else:
+		for tool, tp, fp, fn in counts:
+			write_accuracy(tool, tp, fp, fn)
+
+
+def compute_accuracy_store(expected_transfers,
+						   gene_ids,
+						   columns,
+						   resamples=0,
+						   confidence=0.95,
+						   seed=None,
+						   jobs=1):
+	""" Compute precision, recall and F-score from a results store
+
+	Parameters
+	----------
+	expected_transfers: list of tuples
+		list of transfers with each tuple representing (organism donor, gene
+		donated, organism recipient, gene received)
+	gene_ids: numpy.ndarray
+		gene IDs (see results_store.load_results_store)
+	columns: list of tuples
+		(tool name, numpy.ndarray of number of HGTs) for every tool
+	resamples: integer
+		number of bootstrap resamples, 0 for point estimates only
+	confidence: float
+		confidence level of bootstrap intervals
+	seed: integer, optional
+		random seed of bootstrap resamples
+	jobs: integer
+		number of processes computing bootstrap intervals
+	"""
+	import numpy as np
+	exp_a = np.unique(np.array([int(tup[1]) for tup in expected_transfers],
+							   dtype=np.int32))
+	counts = []
+	for tool, hgts in columns:
+		obs_a = np.unique(gene_ids[hgts > 0])
+		if not obs_a.size:
+			continue
+		tp = int(np.in1d(obs_a, exp_a, assume_unique=True).sum())
+		fp = obs_a.size - tp
+		fn = exp_a.size - tp
+		counts.append((tool, tp, fp, fn))
+	if resamples:
+		num_genes = np.union1d(gene_ids, exp_a).size
+		write_bootstrap_accuracy(counts, num_genes, resamples, confidence,
+								 seed, jobs)
+	else:
+		for tool, tp, fp, fn in counts:
+			write_accuracy(tool, tp, fp, fn)
+
+
+def bootstrap_accuracy(tp, fp, fn, tn, resamples=1000, confidence=0.95,
+					   seed=None):
+	""" Bootstrap confidence intervals of precision, recall and F-score
+
+	Resampling genes with replacement only changes how many genes fall in
+	each of the four classes (TP, FP, FN, TN), the class counts of all
+	resamples are therefore drawn at once from a multinomial distribution.
+
+	Parameters
+	----------
+	tp: integer
+		number of true positives
+	fp: integer
+		number of false positives
+	fn: integer
+		number of false negatives
+	tn: integer
+		number of true negatives
+	resamples: integer
+		number of bootstrap resamples
+	confidence: float
+		confidence level of the intervals
+	seed: integer, optional
+		random seed
+
+	Returns
+	-------
+	intervals: numpy.ndarray
+		(lower, upper) bounds (columns) of precision, recall and F-score
+		(rows), NaN if undefined in all resamples
+	"""
+	import numpy as np
+	counts = np.array([tp, fp, fn, tn], dtype=np.float64)
+	draws = np.random.RandomState(seed).multinomial(
+		int(counts.sum()), counts / counts.sum(), size=resamples)
+	tp, fp, fn = draws[:, 0], draws[:, 1], draws[:, 2]
+	with np.errstate(divide='ignore', invalid='ignore'):
+		p = tp / (tp + fp).astype(np.float64)
+		r = tp / (tp + fn).astype(np.float64)
+		f = 2 * p * r / (p + r)
+	alpha = (1.0 - confidence) / 2.0
+	scores = np.vstack((p, r, f))
+	intervals = np.empty((3, 2))
+	for i in range(3):
+		defined = scores[i][~np.isnan(scores[i])]
+		if defined.size:
+			intervals[i] = np.percentile(defined,
+										 [100 * alpha, 100 * (1 - alpha)])
+		else:
+			intervals[i] = np.nan
+	return intervals
+
+
+def _bootstrap_task(args):
+	""" Unpack the arguments of bootstrap_accuracy (multiprocessing.Pool)
+	"""
+	return bootstrap_accuracy(*args)
+
+
+def bootstrap_accuracy_tasks(tasks, resamples=1000, confidence=0.95,
+							 seed=None, jobs=1):
+	""" Bootstrap confidence intervals of many tools and grid points
+
+	Parameters
+	----------
+	tasks: list of tuples
+		(tp, fp, fn, tn) of every tool and grid point
+	resamples: integer
+		number of bootstrap resamples
+	confidence: float
+		confidence level of the intervals
+	seed: integer, optional
+		random seed, task i uses seed + i so that intervals do not depend
+		on jobs
+	jobs: integer
+		number of processes
+
+	Returns
+	-------
+	intervals: list of numpy.ndarray
+		output of bootstrap_accuracy for every task
+	"""
+	args = [tuple(task) + (resamples, confidence,
+						   None if seed is None else seed + i)
+			for i, task in enumerate(tasks)]
+	if jobs > 1 and len(args) > 1:
+		from multiprocessing import Pool
+		pool = Pool(min(jobs, len(args)))
+		try:
+			return pool.map(_bootstrap_task, args)
+		finally:
+			pool.close()
+			pool.join()
+	return [_bootstrap_task(arg) for arg in args]
+
+
+def write_bootstrap_accuracy(counts, num_genes, resamples, confidence,
+							 seed=None, jobs=1):
+	""" Output precision, recall and F-score with bootstrap intervals
+
+	Parameters
+	----------
+	counts: list of tuples
+		(tool, tp, fp, fn) for every tool
+	num_genes: integer
+		number of genes (observed or expected)
+	resamples: integer
+		number of bootstrap resamples
+	confidence: float
+		confidence level of the intervals
+	seed: integer, optional
+		random seed
+	jobs: integer
+		number of processes
+	"""
+	tasks = [(tp, fp, fn, num_genes - tp - fp - fn)
+			 for tool, tp, fp, fn in counts]
+	intervals = bootstrap_accuracy_tasks(tasks, resamples, confidence, seed,
+										 jobs)
+	for (tool, tp, fp, fn), interval in zip(counts, intervals):
+		write_accuracy(tool, tp, fp, fn, interval)
+
+
+def write_accuracy(tool, tp, fp, fn, intervals=None):
+	""" Output precision, recall and F-score of a tool
+
+	Undefined scores (ex. F-score without true positives) are written as
+	NaN.
+
+	Parameters
+	----------
+	tool: string
+		tool name
+	tp: integer
+		number of true positives
+	fp: integer
+		number of false positives
+	fn: integer
+		number of false negatives
+	intervals: numpy.ndarray, optional
+		output of bootstrap_accuracy, written after the point estimates as
+		lower and upper bounds of precision, recall and F-score
+	"""
+	p = tp / float(tp + fp) if tp + fp else None
+	r = tp / float(tp + fn) if tp + fn else None
+	f = float(2 * p * r) / float(p + r) if p and r else None
+	scores = [p, r, f]
+	if intervals is not None:
+		# NaN bounds (undefined in all resamples) are the only x != x
+		scores.extend(None if x != x else x for x in intervals.ravel())
+	sys.stdout.write("%s\t%s\n" % (tool, "\t".join(
+		"NaN" if x is None else "%.2f" % x for x in scores)))
 
 
 @click.command()
@@ -122,12 +371,32 @@ def compute_accuracy(expected_transfers,
 @click.option('--observed-hgts-fp', required=True,
 			  type=click.Path(resolve_path=True, readable=True, exists=True,
 							  file_okay=True),
-			  help='output from launch_software.sh')
+			  help='output from launch_software.sh or results store directory '
+				   '(run_tools.py --results-store-dp)')
+@click.option('--bootstrap', 'resamples', required=False, type=int,
+			  default=0, show_default=True,
+			  help='Number of bootstrap resamples over genes for confidence '
+				   'intervals (0 for point estimates only)')
+@click.option('--confidence', required=False, type=float, default=0.95,
+			  show_default=True,
+			  help='Confidence level of bootstrap intervals')
+@click.option('--seed', required=False, type=int, default=None,
+			  help='Random seed of bootstrap resamples')
+@click.option('--jobs', required=False, type=int, default=1,
+			  show_default=True,
+			  help='Number of processes computing bootstrap intervals')
 def _main(ground_truth_fp,
-		  observed_hgts_fp):
+		  observed_hgts_fp,
+		  resamples,
+		  confidence,
+		  seed,
+		  jobs):
 	""" Compute precision, recall and F-score for observed gene transfers,
 	losses and gains
 
+	With --bootstrap, lower and upper bounds of precision, recall and F-score
+	follow the point estimates on every line.
+
 	Parameters
 	----------
 	ground_truth_fp: string
@@ -135,14 +404,40 @@ def _main(ground_truth_fp,
 	observed_hgts_fp: string
 		file path to output file from launch_software.sh
 		(tab separated file with summary for gene transfers, losses and gains)
+		or directory path to results store (see results_store.py)
+	resamples: integer
+		number of bootstrap resamples, 0 for point estimates only
+	confidence: float
+		confidence level of bootstrap intervals
+	seed: integer
+		random seed of bootstrap resamples
+	jobs: integer
+		number of processes computing bootstrap intervals
 	"""
 
+	start_profiling('compute_accuracy')
 	with open(ground_truth_fp, 'U') as ground_truth_f:
-		expected_transfers = parse_expected_transfers(ground_truth_f)
+		with stage('parse_expected_transfers'):
+			expected_transfers = parse_expected_transfers(ground_truth_f)
+	if isdir(observed_hgts_fp):
+		from results_store import load_results_store
+		with stage('load_results_store'):
+			gene_ids, columns = load_results_store(observed_hgts_fp)
+		with stage('compute_accuracy'):
+			compute_accuracy_store(expected_transfers, gene_ids, columns,
+								   resamples, confidence, seed, jobs)
+		return
 	with open(observed_hgts_fp, 'U') as observed_hgts_f:
-		observed_transfers = parse_observed_transfers(observed_hgts_f)
+		with stage('parse_observed_transfers'):
+			observed_transfers = parse_observed_transfers(observed_hgts_f)
+	gene_ids = None
+	if resamples:
+		with open(observed_hgts_fp, 'U') as observed_hgts_f:
+			gene_ids = parse_gene_ids(observed_hgts_f)
 
-	compute_accuracy(expected_transfers, observed_transfers)
+	with stage('compute_accuracy'):
+		compute_accuracy(expected_transfers, observed_transfers, gene_ids,
+						 resamples, confidence, seed, jobs)
 
 
 if __name__ == "__main__":
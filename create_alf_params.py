@@ -11,12 +11,23 @@ Create parameters file for ALF genome simulations
 =================================================
 """
 
+import re
 import sys
-from string import replace
-from os.path import join, basename, abspath
+import random
+from itertools import product
+from os import makedirs
+from os.path import join, basename, abspath, isdir
 from subprocess import Popen, PIPE
 
 
+# placeholders of parameter_file
+placeholders = ('WORKING_DIR_PATH', 'ORGANISM.db', 'CUSTOM_TREE.nwk',
+                'LGT_RATE', 'ORTHREP', 'UUID', 'GENEDUPLRATE', 'GENELOSSRATE')
+# swept parameters, in the order of the grid loops (the last varies fastest)
+sweep_parameters = ('lgt_rate', 'orth_rep', 'gc_content_amelioration',
+                    'gene_loss_rate', 'gene_dup_rate')
+
+
 def run_fasta_to_darwin(root_genome_fp,
                         root_genome_db_fp):
     """ Run ALF's script to convert FASTA to Darwin files
@@ -39,6 +50,48 @@ def run_fasta_to_darwin(root_genome_fp,
         raise ValueError(stderr)
 
 
+def compile_parameter_file(template):
+    """ Split a parameters file template on its placeholders
+
+    Parameters
+    ----------
+    template: string
+        parameters file with placeholders (see parameter_file)
+
+    Returns
+    -------
+    parts: list of strings
+        literal text (even indices) and placeholder names (odd indices)
+    """
+    return re.split("(%s)" % "|".join(re.escape(placeholder)
+                                      for placeholder in placeholders),
+                    template)
+
+
+def render_parameter_file(parts, values, gc_content_amelioration='False'):
+    """ Fill a compiled parameters file template
+
+    Parameters
+    ----------
+    parts: list of strings
+        output of compile_parameter_file
+    values: dict
+        placeholder names (keys) and their values (strings)
+    gc_content_amelioration: string
+        if 'True', append random target frequencies
+
+    Returns
+    -------
+    parameters: string
+        content of the parameters file
+    """
+    p = "".join(values[part] if i % 2 else part
+                for i, part in enumerate(parts))
+    if gc_content_amelioration == 'True':
+        p = p + "targetFreqs := ['Random'];\n"
+    return p
+
+
 def create_param_file(root_genome_fp,
                       custom_tree_fp,
                       working_dp,
@@ -48,7 +101,8 @@ def create_param_file(root_genome_fp,
                       gc_content_amelioration='False',
                       gene_loss_rate=0.005,
                       gene_dup_rate=0.0006,
-                      user_id="uuid"):
+                      user_id="uuid",
+                      root_genome_db_fp=None):
     """ Create parameters file for ALF genome simulation
 
     Parameters
@@ -76,25 +130,198 @@ def create_param_file(root_genome_fp,
         rate of gene duplications (relative to substitutions)
     uuid: string
         directory name for ALF output
+    root_genome_db_fp: string, optional
+        file path of root genome already converted to Darwin format, if
+        None the root genome is converted into working_dp
     """
-    root_genome_db_fp = join(working_dp, "%s.db" % basename(root_genome_fp))
-    run_fasta_to_darwin(
-        root_genome_fp=abspath(root_genome_fp),root_genome_db_fp=abspath(root_genome_db_fp))
+    if root_genome_db_fp is None:
+        root_genome_db_fp = join(working_dp,
+                                 "%s.db" % basename(root_genome_fp))
+        run_fasta_to_darwin(
+            root_genome_fp=abspath(root_genome_fp),root_genome_db_fp=abspath(root_genome_db_fp))
     alf_params_fp = join(working_dp, output_file_name)
-    p = replace(parameter_file, 'WORKING_DIR_PATH', abspath(working_dp))
-    p = replace(p, 'ORGANISM.db', abspath(root_genome_db_fp))
-    p = replace(p, 'CUSTOM_TREE.nwk', abspath(custom_tree_fp))
-    p = replace(p, 'LGT_RATE', str(lgt_rate))
-    p = replace(p, 'ORTHREP', str(orth_rep))
-    p = replace(p, 'UUID', user_id)
-    p = replace(p, 'GENEDUPLRATE', str(gene_dup_rate))
-    p = replace(p, 'GENELOSSRATE', str(gene_loss_rate))
-    if gc_content_amelioration == 'True':
-        p = p + "targetFreqs := ['Random'];\n"
+    p = render_parameter_file(
+        compiled_parameter_file,
+        {'WORKING_DIR_PATH': abspath(working_dp),
+         'ORGANISM.db': abspath(root_genome_db_fp),
+         'CUSTOM_TREE.nwk': abspath(custom_tree_fp),
+         'LGT_RATE': str(lgt_rate),
+         'ORTHREP': str(orth_rep),
+         'UUID': user_id,
+         'GENEDUPLRATE': str(gene_dup_rate),
+         'GENELOSSRATE': str(gene_loss_rate)},
+        gc_content_amelioration)
     with open(alf_params_fp, 'w') as alf_params_f:
         alf_params_f.write(p)
 
 
+def grid_design(levels):
+    """ Full factorial design over the levels of every parameter
+
+    Parameters
+    ----------
+    levels: dict
+        parameter names of sweep_parameters (keys) and lists of values
+
+    Returns
+    -------
+    design: list of dicts
+        parameter values of every point, the last parameter of
+        sweep_parameters varies fastest
+    """
+    return [dict(zip(sweep_parameters, values))
+            for values in product(*[levels[name]
+                                    for name in sweep_parameters])]
+
+
+def _sample(spec, u):
+    """ Map u in [0, 1) to a value of a parameter specification
+    """
+    if isinstance(spec, tuple):
+        low, high = spec
+        return low + u * (high - low)
+    return spec[int(u * len(spec))]
+
+
+def random_design(specs, num_points, seed=None):
+    """ Independent uniform random design
+
+    Parameters
+    ----------
+    specs: dict
+        parameter names of sweep_parameters (keys) and either (low, high)
+        tuples (uniform interval) or lists of values (uniform choice)
+    num_points: integer
+        number of points
+    seed: integer, optional
+        random seed
+
+    Returns
+    -------
+    design: list of dicts
+        parameter values of every point
+    """
+    rng = random.Random(seed)
+    return [dict((name, _sample(specs[name], rng.random()))
+                 for name in sweep_parameters)
+            for i in range(num_points)]
+
+
+def latin_hypercube_design(specs, num_points, seed=None):
+    """ Latin hypercube design
+
+    Every parameter range is divided into num_points strata of equal
+    probability, each stratum is sampled exactly once.
+
+    Parameters
+    ----------
+    specs: dict
+        see random_design
+    num_points: integer
+        number of points
+    seed: integer, optional
+        random seed
+
+    Returns
+    -------
+    design: list of dicts
+        parameter values of every point
+    """
+    rng = random.Random(seed)
+    design = [{} for i in range(num_points)]
+    for name in sweep_parameters:
+        strata = list(range(num_points))
+        rng.shuffle(strata)
+        for point, stratum in zip(design, strata):
+            point[name] = _sample(specs[name],
+                                  (stratum + rng.random()) / num_points)
+    return design
+
+
+def _format_value(value):
+    """ Format a parameter value for ALF and the summaries
+
+    Sampled floats are written with repr, all digits of random and Latin
+    hypercube draws are kept (ALF and the sweep manifest get the same
+    values). Grid levels given as strings are written as typed.
+    """
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def write_sweep(design,
+                root_genome_fp,
+                custom_tree_fp,
+                sweep_dp,
+                output_file_name="alf_params.txt",
+                start=0):
+    """ Write the parameters directories of a sweep and its manifest
+
+    The root genome is converted to Darwin format once for all points.
+    Point i is written to sweep_dp/params_<start + i>/ (output_file_name and
+    parameters_summary.txt), the manifest to sweep_dp/sweep_manifest.txt.
+
+    Parameters
+    ----------
+    design: list of dicts
+        output of grid_design, random_design or latin_hypercube_design
+    root_genome_fp: string
+        file path of root genome (protein sequences in FASTA format)
+    custom_tree_fp: string
+        file path to Newick tree
+    sweep_dp: string
+        directory path of the sweep (created if missing)
+    output_file_name: string
+        name of the parameters files
+    start: integer
+        number of the first parameters directory
+
+    Returns
+    -------
+    params_dps: list of strings
+        directory paths of the points
+    """
+    if not isdir(sweep_dp):
+        makedirs(sweep_dp)
+    root_genome_db_fp = abspath(join(sweep_dp,
+                                     "%s.db" % basename(root_genome_fp)))
+    run_fasta_to_darwin(root_genome_fp=abspath(root_genome_fp),
+                        root_genome_db_fp=root_genome_db_fp)
+    values = {'ORGANISM.db': root_genome_db_fp,
+              'CUSTOM_TREE.nwk': abspath(custom_tree_fp)}
+    params_dps = []
+    with open(join(sweep_dp, "sweep_manifest.txt"), 'w') as manifest_f:
+        manifest_f.write("#params\t%s\n" % "\t".join(sweep_parameters))
+        for i, point in enumerate(design):
+            params = "params_%d" % (start + i)
+            params_dp = join(sweep_dp, params)
+            if not isdir(params_dp):
+                makedirs(params_dp)
+            point = dict((name, _format_value(point[name]))
+                         for name in sweep_parameters)
+            values.update({'WORKING_DIR_PATH': abspath(params_dp),
+                           'LGT_RATE': point['lgt_rate'],
+                           'ORTHREP': point['orth_rep'],
+                           'UUID': params,
+                           'GENEDUPLRATE': point['gene_dup_rate'],
+                           'GENELOSSRATE': point['gene_loss_rate']})
+            with open(join(params_dp, output_file_name), 'w') as alf_params_f:
+                alf_params_f.write(render_parameter_file(
+                    compiled_parameter_file, values,
+                    point['gc_content_amelioration']))
+            with open(join(params_dp, "parameters_summary.txt"),
+                      'w') as summary_f:
+                summary_f.write("p(gene loss)\tp(gene duplication)\t"
+                                "p(orthologous gene replacement)\t"
+                                "GC content amelioration\n")
+                summary_f.write("%s\t%s\t%s\t%s\n" % (
+                    point['gene_loss_rate'], point['gene_dup_rate'],
+                    point['orth_rep'], point['gc_content_amelioration']))
+            manifest_f.write("%s\t%s\n" % (params, "\t".join(
+                point[name] for name in sweep_parameters)))
+            params_dps.append(params_dp)
+    return params_dps
+
+
 def main(argv):
     """ Create parameters file for ALF genome simulation
     """
@@ -175,6 +402,8 @@ aGAlpha := 1;
 
 """
 
+compiled_parameter_file = compile_parameter_file(parameter_file)
+
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
\ No newline at end of file
+    main(sys.argv[1:])
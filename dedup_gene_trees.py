@@ -0,0 +1,293 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Group gene trees with identical topologies into equivalence classes
+===================================================================
+"""
+
+import re
+import click
+from glob import glob
+from os.path import join, basename
+from hashlib import md5
+
+
+def gene_number(gene_tree_fp):
+    """ Return the gene number of an ALF gene tree file
+
+    Equivalent to `echo $gene_tree_file | sed 's/[^0-9]*//g'` in
+    launch_software.sh, ex. "GeneTree01623.nwk" -> "01623"
+
+    Parameters
+    ----------
+    gene_tree_fp: string
+        file path to gene tree in Newick format
+
+    Returns
+    -------
+    gene_id: string
+        digits in the file name
+    """
+    return re.sub('[^0-9]', '', basename(gene_tree_fp))
+
+
+def canonical_topology(gene_tree):
+    """ Return a rotation invariant Newick string of the gene tree topology
+
+    Leaves are labeled by species only ("SPECIES_GENE" -> "SPECIES", see
+    reformat_input.trim_gene_tree_leaves), branch lengths and internal node
+    names are ignored and the children of every node are sorted. Two gene
+    trees have the same canonical topology if and only if they are equal
+    after leaf trimming up to the order of children.
+
+    Parameters
+    ----------
+    gene_tree: skbio.TreeNode
+        TreeNode instance for gene tree
+
+    Returns
+    -------
+    topology: string
+        canonical Newick string (without branch lengths)
+
+    See Also
+    --------
+    skbio.TreeNode
+    """
+    labels = {}
+    for node in gene_tree.postorder():
+        if node.is_tip():
+            labels[node] = node.name.split()[0]
+        else:
+            labels[node] = "(%s)" % ",".join(
+                sorted(labels.pop(child) for child in node.children))
+    return "%s;" % labels[gene_tree]
+
+
+def topology_hash(gene_tree):
+    """ Return the MD5 hex digest of the canonical gene tree topology
+
+    Parameters
+    ----------
+    gene_tree: skbio.TreeNode
+        TreeNode instance for gene tree
+
+    Returns
+    -------
+    digest: string
+        hex digest of canonical_topology(gene_tree)
+    """
+    return md5(canonical_topology(gene_tree).encode('ascii')).hexdigest()
+
+
+def topology_classes(gene_tree_fps, newicks=None):
+    """ Group gene trees into classes of identical canonical topology
+
+    Parameters
+    ----------
+    gene_tree_fps: list of strings
+        file paths to gene trees in Newick format
+    newicks: iterable of strings, optional
+        gene trees in Newick format in the order of gene_tree_fps (ex.
+        streamed from a tree_archive.TreeArchive), read instead of the files
+
+    Returns
+    -------
+    classes: list of tuples
+        one (gene_tree_fp, representative_fp) tuple per gene tree in the
+        input order, the representative is the first gene tree of the class
+    """
+    from skbio import TreeNode
+    representatives = {}
+    classes = []
+    if newicks is not None:
+        newicks = iter(newicks)
+    for gene_tree_fp in gene_tree_fps:
+        if newicks is None:
+            gene_tree = TreeNode.read(gene_tree_fp, format='newick')
+        else:
+            gene_tree = TreeNode.read([next(newicks)], format='newick')
+        digest = topology_hash(gene_tree)
+        if digest not in representatives:
+            representatives[digest] = gene_tree_fp
+        classes.append((gene_tree_fp, representatives[digest]))
+    return classes
+
+
+def write_classes(classes, output_f):
+    """ Write topology classes as a tab separated file
+
+    Format:
+    #gene ID	gene tree	representative gene ID	representative gene tree
+
+    Parameters
+    ----------
+    classes: list of tuples
+        output of topology_classes
+    output_f: file object
+        file descriptor for the classes file
+    """
+    output_f.write("#gene ID\tgene tree\trepresentative gene ID\t"
+                   "representative gene tree\n")
+    for gene_tree_fp, representative_fp in classes:
+        output_f.write("%s\t%s\t%s\t%s\n" % (
+            gene_number(gene_tree_fp), gene_tree_fp,
+            gene_number(representative_fp), representative_fp))
+
+
+def read_classes(classes_f):
+    """ Read topology classes written by write_classes
+
+    Parameters
+    ----------
+    classes_f: file object
+        file descriptor for the classes file
+
+    Returns
+    -------
+    classes: list of tuples
+        one (gene_tree_fp, representative_fp) tuple per gene tree
+    """
+    classes = []
+    for line in classes_f:
+        if line.startswith('#') or not line.strip():
+            continue
+        line = line.rstrip('\n').split('\t')
+        classes.append((line[1], line[3]))
+    return classes
+
+
+def fan_out_results(observed_hgts_f, classes, output_f, tools=None):
+    """ Copy results of class representatives to every member gene
+
+    observed_hgts_f follows the format of the observed transfers table
+    (see compute_accuracy.parse_observed_transfers). Without tools, all
+    tool columns are copied and the table holds one row per representative
+    gene, it must then only hold results of topology-only tools (T-REX,
+    RIATA-HGT, Jane 4). With tools, only their columns are copied and the
+    other columns keep the results of every gene (NaN for genes without
+    row).
+
+    Parameters
+    ----------
+    observed_hgts_f: file object
+        file descriptor of observed transfers for representative genes
+    classes: list of tuples
+        output of topology_classes
+    output_f: file object
+        file descriptor for observed transfers of all genes
+    tools: list of strings, optional
+        names of the tool columns copied from the representatives (ex.
+        "T-REX"), all columns if None
+    """
+    results = {}
+    columns = []
+    for line in observed_hgts_f:
+        if line.startswith('#'):
+            if line.startswith('#\t'):
+                columns = line.rstrip('\n').split('\t')[2:]
+            output_f.write(line)
+            continue
+        line = line.rstrip('\n').split('\t')
+        results[line[1]] = line[2:]
+    for i, (gene_tree_fp, representative_fp) in enumerate(classes):
+        values = results[gene_number(representative_fp)]
+        if tools is not None:
+            own = results.get(gene_number(gene_tree_fp),
+                              ["NaN"] * len(columns))
+            values = [value if column in tools else own_value
+                      for column, value, own_value in zip(columns, values,
+                                                          own)]
+        output_f.write("%s\t%s\t%s\n" % (
+            i, gene_number(gene_tree_fp), "\t".join(values)))
+
+
+@click.command()
+@click.option('--gene-tree-dir', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Directory of gene trees in Newick format')
+@click.option('--gene-tree-archive-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Archive of the gene trees, read instead of '
+                   '--gene-tree-dir')
+@click.option('--classes-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output topology classes of gene trees')
+@click.option('--observed-hgts-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Observed transfers of representative genes')
+@click.option('--output-hgts-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output observed transfers of all genes')
+@click.option('--tool', 'tools', required=False, multiple=True,
+              help='Tool column copied from the representatives (ex. '
+                   '"T-REX"), default all columns')
+def _main(gene_tree_dir,
+          gene_tree_archive_fp,
+          classes_fp,
+          observed_hgts_fp,
+          output_hgts_fp,
+          tools):
+    """ Group gene trees by topology or fan out results of representatives
+
+    Without --observed-hgts-fp, the gene trees are grouped and the classes
+    are written to classes_fp, topology-only tools need to be launched on
+    the representative gene trees only. With --observed-hgts-fp, the
+    existing classes_fp is read and the results of the representatives are
+    copied to all genes.
+
+    Parameters
+    ----------
+    gene_tree_dir: string
+        directory path to gene trees in Newick format
+    gene_tree_archive_fp: string
+        file path to archive of the gene trees (see tree_archive.py)
+    classes_fp: string
+        file path to topology classes
+    observed_hgts_fp: string
+        file path to observed transfers of representative genes
+    output_hgts_fp: string
+        file path to output observed transfers of all genes
+    tools: tuple of strings
+        tool columns copied from the representatives, all if empty
+    """
+    if observed_hgts_fp is None:
+        if gene_tree_archive_fp is not None:
+            from tree_archive import TreeArchive
+            archive = TreeArchive(gene_tree_archive_fp)
+            classes = topology_classes(
+                [archive.gene_tree_fps[gene_id]
+                 for gene_id in archive.gene_ids],
+                (newick for gene_id, newick in archive))
+        elif gene_tree_dir is None:
+            raise click.UsageError("--gene-tree-dir or --gene-tree-archive-fp "
+                                   "is required")
+        else:
+            classes = topology_classes(
+                sorted(glob(join(gene_tree_dir, "*.nwk"))))
+        with open(classes_fp, 'w') as classes_f:
+            write_classes(classes, classes_f)
+    else:
+        if output_hgts_fp is None:
+            raise click.UsageError("--output-hgts-fp is required")
+        with open(classes_fp, 'U') as classes_f:
+            classes = read_classes(classes_f)
+        with open(observed_hgts_fp, 'U') as observed_hgts_f:
+            with open(output_hgts_fp, 'w') as output_f:
+                fan_out_results(observed_hgts_f, classes, output_f,
+                                tools=list(tools) or None)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,239 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Index the gene trees and alignments of an ALF run
+=================================================
+
+The manifest is a tab-separated file with one line per gene tree (header
+on one line):
+#gene number	gene tree	gene MSA	leaves	MSA length	gene tree bytes
+	MSA bytes	gene tree offset
+1	/alf/GeneTrees/GeneTree1.nwk	/alf/MSA/MSA_1_aa.fa	8	312	402	2790	0
+..
+
+The MSA length and size are NaN if the alignment does not exist. When the
+gene trees are indexed from an archive (see tree_archive.py), the gene tree
+size and offset locate the tree in the archive and no gene tree file is
+opened, otherwise the offset is NaN. The manifest is the work list of
+launch_software.sh and run_tools.py.
+"""
+
+import sys
+import click
+from glob import glob
+from os.path import join, exists, getsize
+
+from dedup_gene_trees import gene_number
+from tree_archive import TreeArchive
+
+
+manifest_header = ("#gene number\tgene tree\tgene MSA\tleaves\tMSA length\t"
+                   "gene tree bytes\tMSA bytes\tgene tree offset\n")
+
+
+def count_leaves(gene_tree_fp):
+    """ Return the number of leaves of a Newick tree without parsing it
+
+    Parameters
+    ----------
+    gene_tree_fp: string
+        file path to gene tree in Newick format
+
+    Returns
+    -------
+    leaves: integer
+        number of leaves (number of commas + 1)
+    """
+    with open(gene_tree_fp, 'U') as gene_tree_f:
+        return gene_tree_f.read().count(',') + 1
+
+
+def msa_length(gene_msa_fp):
+    """ Return the length of the first sequence of an alignment
+
+    Parameters
+    ----------
+    gene_msa_fp: string
+        file path to multiple sequence alignment in FASTA format
+
+    Returns
+    -------
+    length: integer
+        number of characters of the first sequence
+    """
+    length = 0
+    with open(gene_msa_fp, 'U') as gene_msa_f:
+        for line in gene_msa_f:
+            if line.startswith('>'):
+                if length:
+                    break
+                continue
+            length += len(line.strip())
+    return length
+
+
+def _gene_trees(gene_tree_dir, gene_tree_archive_fp=None):
+    """ Yield (gene number, file path, leaves, bytes, offset) of gene trees
+    """
+    if gene_tree_archive_fp is None:
+        for gene_tree_fp in sorted(glob(join(gene_tree_dir, "*.nwk"))):
+            yield (gene_number(gene_tree_fp), gene_tree_fp,
+                   count_leaves(gene_tree_fp), getsize(gene_tree_fp), None)
+        return
+    archive = TreeArchive(gene_tree_archive_fp)
+    for gene_id, newick in archive:
+        offset, size = archive.index[gene_id]
+        yield (gene_id, archive.gene_tree_fps[gene_id],
+               newick.count(',') + 1, size, offset)
+
+
+def index_alf_run(gene_tree_dir, gene_msa_dir, gene_tree_archive_fp=None):
+    """ Index the gene trees of an ALF run and their alignments
+
+    Parameters
+    ----------
+    gene_tree_dir: string
+        directory path to gene trees in Newick format
+    gene_msa_dir: string
+        directory path to gene alignments (MSA_<gene number>_aa.fa)
+    gene_tree_archive_fp: string, optional
+        file path to archive of the gene trees (see tree_archive.py), read
+        sequentially instead of the gene tree files
+
+    Returns
+    -------
+    manifest: list of tuples
+        (gene number, gene tree file path, MSA file path, leaves, MSA length,
+        gene tree bytes, MSA bytes, gene tree offset) for every gene tree,
+        MSA length and bytes are None if the alignment does not exist, gene
+        tree offset is None without archive
+    """
+    manifest = []
+    for gene_id, gene_tree_fp, leaves, tree_bytes, offset in _gene_trees(
+            gene_tree_dir, gene_tree_archive_fp):
+        gene_msa_fp = join(gene_msa_dir, "MSA_%s_aa.fa" % gene_id)
+        if exists(gene_msa_fp):
+            length, msa_bytes = msa_length(gene_msa_fp), getsize(gene_msa_fp)
+        else:
+            length = msa_bytes = None
+        manifest.append((gene_id, gene_tree_fp, gene_msa_fp, leaves, length,
+                         tree_bytes, msa_bytes, offset))
+    return manifest
+
+
+def sort_by_cost(manifest):
+    """ Order a manifest by decreasing gene tree size
+
+    Parameters
+    ----------
+    manifest: list of tuples
+        output of index_alf_run or read_manifest
+
+    Returns
+    -------
+    manifest: list of tuples
+        largest gene trees (leaves, then MSA length) first
+    """
+    return sorted(manifest, key=lambda entry: (-entry[3], -(entry[4] or 0),
+                                               entry[1]))
+
+
+def write_manifest(manifest, output_f):
+    """ Write a manifest
+
+    Parameters
+    ----------
+    manifest: list of tuples
+        output of index_alf_run
+    output_f: file object
+        file descriptor for the manifest
+    """
+    output_f.write(manifest_header)
+    for entry in manifest:
+        output_f.write("%s\n" % "\t".join(
+            "NaN" if value is None else str(value) for value in entry))
+
+
+def read_manifest(manifest_f):
+    """ Read a manifest
+
+    Parameters
+    ----------
+    manifest_f: file object
+        file descriptor of the manifest
+
+    Returns
+    -------
+    manifest: list of tuples
+        see index_alf_run
+    """
+    manifest = []
+    for line in manifest_f:
+        if line.startswith('#'):
+            continue
+        entry = line.rstrip('\n').split('\t')
+        manifest.append(tuple(entry[:3]) + tuple(
+            None if value == "NaN" else int(value) for value in entry[3:]))
+    return manifest
+
+
+@click.command()
+@click.option('--gene-tree-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Directory of gene trees in Newick format')
+@click.option('--gene-msa-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Directory of gene alignments in FASTA format')
+@click.option('--gene-tree-archive-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Archive of the gene trees, read instead of the gene '
+                   'tree files')
+@click.option('--manifest-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output manifest')
+@click.option('--sort-by-cost', 'by_cost', is_flag=True, default=False,
+              help='List the largest gene trees first')
+def _main(gene_tree_dir,
+          gene_msa_dir,
+          gene_tree_archive_fp,
+          manifest_fp,
+          by_cost):
+    """ Write the manifest of an ALF run
+
+    Parameters
+    ----------
+    gene_tree_dir: string
+        directory path to gene trees in Newick format
+    gene_msa_dir: string
+        directory path to gene alignments in FASTA format
+    gene_tree_archive_fp: string
+        file path to archive of the gene trees
+    manifest_fp: string
+        file path to output manifest
+    by_cost: boolean
+        list the largest gene trees first
+    """
+    manifest = index_alf_run(gene_tree_dir, gene_msa_dir,
+                             gene_tree_archive_fp)
+    if by_cost:
+        manifest = sort_by_cost(manifest)
+    missing = sum(1 for entry in manifest if entry[4] is None)
+    if missing:
+        sys.stderr.write("%d gene trees without alignment in %s\n" % (
+            missing, gene_msa_dir))
+    with open(manifest_fp, 'w') as manifest_f:
+        write_manifest(manifest, manifest_f)
+
+
+if __name__ == "__main__":
+    _main()
@@ -33,23 +33,92 @@ gene_msa_dir=$(readlink -m $8)
 phylonet_install_dir=$(readlink -m $9)
 # Jane 4 install dir
 jane_install_dir=$(readlink -m ${10})
+# output tar.gz of the output streams of every tool run (optional, the
+# script runs in the job directory)
+if [ -n "${HGT_LOGS_FP}" ]; then
+    HGT_LOGS_FP=$(readlink -m ${HGT_LOGS_FP})
+fi
 
 TIMEFORMAT='%U %R'
 base_input_file_nwk="input_tree.nwk"
 base_input_file_nex="input_tree.nex"
 base_input_file_phy="input_msa.phy"
 base_output_file="output_file.txt"
-input_file_nwk=$working_dir/$base_input_file_nwk
-input_file_nex=$working_dir/$base_input_file_nex
-output_file=$working_dir/$base_output_file
-input_msa_phy=$working_dir/$base_input_file_phy
-stderr=$working_dir/"stderr.txt"
-stdout=$working_dir/"stdout.txt"
 
 if [ ! -d "${working_dir}" ]; then
     mkdir $working_dir
 fi
 
+# the tools read and write their input, output and log files in a job
+# directory, with HGT_SCRATCH_ROOT set (ex. /dev/shm) it is created on local
+# storage and removed on exit; only the parsed results are written to the
+# working directory. With HGT_LOGS_FP set, the output streams of every tool
+# run are staged in a local directory (under HGT_SCRATCH_ROOT, otherwise
+# TMPDIR) and written as a single tar.gz at the end
+scratch_dirs=""
+trap 'rm -rf ${scratch_dirs}' EXIT
+if [ -n "${HGT_SCRATCH_ROOT}" ]; then
+    job_dir=$(mktemp -d ${HGT_SCRATCH_ROOT}/hgt_job_XXXXXX)
+    scratch_dirs="${job_dir}"
+else
+    job_dir=$working_dir
+fi
+if [ -n "${HGT_LOGS_FP}" ]; then
+    logs_root=$(mktemp -d ${HGT_SCRATCH_ROOT:-${TMPDIR:-/tmp}}/hgt_logs_XXXXXX)
+    scratch_dirs="${scratch_dirs} ${logs_root}"
+fi
+cd $job_dir
+input_file_nwk=$job_dir/$base_input_file_nwk
+input_file_nex=$job_dir/$base_input_file_nex
+output_file=$job_dir/$base_output_file
+input_msa_phy=$job_dir/$base_input_file_phy
+stderr=$job_dir/"stderr.txt"
+stdout=$job_dir/"stdout.txt"
+
+# number of HGTs reported by every tool (see parse_output.py), one row per
+# gene in the format of run_tools.py --observed-hgts-fp (read by
+# compute_accuracy.py), and p-values of the CONSEL AU test
+observed_hgts_fp=$working_dir/"observed_hgts.txt"
+consel_results_fp=$working_dir/"consel_results.txt"
+printf "#number of HGTs detected\n#\tgene ID\tT-REX\tRANGER-DTL\tRIATA-HGT\tJane 4\n" > $observed_hgts_fp
+> $consel_results_fp
+
+# output streams of a tool run on the current gene, every tool (and every
+# step of CONSEL) writes to its own files
+tool_stdout()
+{
+    echo $job_dir/$1_stdout.txt
+}
+tool_stderr()
+{
+    echo $job_dir/$1_stderr.txt
+}
+
+# record the number of HGTs reported by a tool on the current gene, NaN if
+# the output cannot be parsed
+declare -A number_hgts
+parse_result()
+{
+    number_hgts[$1]=$(python ${scripts_dir}/parse_output.py --method $1 \
+                                                            --hgt-results-fp $2 \
+                                                            2>/dev/null)
+}
+
+# keep the output streams of tool runs on the current gene for HGT_LOGS_FP
+collect_logs()
+{
+    for tool in "$@"
+    do
+        if [ -n "${HGT_LOGS_FP}" ]; then
+            mkdir -p $logs_root/logs/$gene_number
+            mv $(tool_stdout $tool) $(tool_stderr $tool) \
+               $logs_root/logs/$gene_number/ 2>/dev/null
+        else
+            rm -f $(tool_stdout $tool) $(tool_stderr $tool)
+        fi
+    done
+}
+
 total_user_time_trex="0.0"
 total_wall_time_trex="0.0"
 total_user_time_rangerdtl="0.0"
@@ -61,61 +130,114 @@ total_wall_time_jane="0.0"
 total_user_time_consel="0.0"
 total_wall_time_consel="0.0"
 
-printf "y\n" > $working_dir/puzzle_cmd.txt
+printf "y\n" > $job_dir/puzzle_cmd.txt
 
-# search for HGTs in each gene tree
-for gene_tree in $gene_tree_dir/*.nwk
+# gene trees packed by tree_archive.py are read from the archive only, the
+# gene tree files are not opened
+gene_tree_archive_fp=${gene_tree_dir}.nwka
+gene_tree_archive_input=""
+if [ -f "${gene_tree_archive_fp}" ]; then
+    gene_tree_archive_input="--gene-tree-archive-fp ${gene_tree_archive_fp}"
+fi
+
+# with HGT_DEDUP set, group gene trees with identical topologies (after
+# trimming the leaves to species names), the topology-only tools (T-REX,
+# RIATA-HGT and Jane 4) are launched once per class on its representative
+# gene tree and their results are copied to the member genes after the loop;
+# without it every gene tree is its own representative
+classes_fp=$working_dir/"gene_tree_classes.txt"
+declare -A representatives
+if [ -n "${HGT_DEDUP}" ]; then
+    python ${scripts_dir}/dedup_gene_trees.py --gene-tree-dir $gene_tree_dir \
+                                              $gene_tree_archive_input \
+                                              --classes-fp $classes_fp
+    while IFS=$'\t' read gene_id gene_tree representative_id representative
+    do
+        representatives[$gene_tree]=$representative
+    done < <(grep -v '^#' $classes_fp)
+fi
+
+# index gene trees and their alignments once (gene number, file paths,
+# number of leaves, alignment length, sizes and offset in the archive)
+manifest_fp=$working_dir/"manifest.txt"
+python ${scripts_dir}/index_alf_run.py --gene-tree-dir $gene_tree_dir \
+                                       $gene_tree_archive_input \
+                                       --gene-msa-dir $gene_msa_dir \
+                                       --manifest-fp $manifest_fp
+
+# search for HGTs in each gene tree (the manifest is read on file descriptor
+# 3 as the tools may read standard input)
+i=0
+while IFS=$'\t' read -u 3 gene_number gene_tree gene_msa_fasta_fp leaves msa_length gene_tree_bytes gene_msa_bytes gene_tree_offset
 do
-    # T-REX
-    echo "Run T-REX"
-    python ${scripts_dir}/reformat_input.py --method 'trex' \
-                                            --gene-tree-fp $gene_tree \
-                                            --species-tree-fp $species_tree_fp \
-                                            --output-tree-fp $input_file_nwk
-    TIME="$( time (hgt3.4 -inputfile=$base_input_file_nwk -outputfile=$base_output_file 1>$stdout 2>$stderr) 2>&1)"
-    user_time=$(echo $TIME | awk '{print $1;}')
-    wall_time=$(echo $TIME | awk '{print $2;}')
-    total_user_time_trex=$(python -c "print $total_user_time_trex + $user_time")
-    total_wall_time_trex=$(python -c "print $total_wall_time_trex + $wall_time")
+    if [ -f "${gene_tree_archive_fp}" ]; then
+        gene_tree_input="--gene-tree-archive-fp ${gene_tree_archive_fp} --gene-tree-offset ${gene_tree_offset} --gene-tree-bytes ${gene_tree_bytes}"
+    else
+        gene_tree_input="--gene-tree-fp ${gene_tree}"
+    fi
+    representative=${representatives[$gene_tree]:-$gene_tree}
+    if [ "${representative}" == "${gene_tree}" ]; then
+        # T-REX
+        echo "Run T-REX"
+        python ${scripts_dir}/reformat_input.py --method 'trex' \
+                                                $gene_tree_input \
+                                                --species-tree-fp $species_tree_fp \
+                                                --output-tree-fp $input_file_nwk
+        TIME="$( time (hgt3.4 -inputfile=$base_input_file_nwk -outputfile=$base_output_file 1>$(tool_stdout trex) 2>$(tool_stderr trex)) 2>&1)"
+        user_time=$(echo $TIME | awk '{print $1;}')
+        wall_time=$(echo $TIME | awk '{print $2;}')
+        total_user_time_trex=$(python -c "print $total_user_time_trex + $user_time")
+        total_wall_time_trex=$(python -c "print $total_wall_time_trex + $wall_time")
+        parse_result trex $output_file
+        collect_logs trex
+    fi
 
     # RANGER-DTL
     echo "Run RANGER-DTL"
     python ${scripts_dir}/reformat_input.py --method 'ranger-dtl' \
-                                            --gene-tree-fp $gene_tree \
+                                            $gene_tree_input \
                                             --species-tree-fp $species_tree_fp \
                                             --output-tree-fp $input_file_nwk
-    TIME="$( time (ranger-dtl-U.linux -i $input_file_nwk -o $output_file 1>$stdout 2>$stderr) 2>&1)"
+    TIME="$( time (ranger-dtl-U.linux -i $input_file_nwk -o $output_file 1>$(tool_stdout ranger-dtl) 2>$(tool_stderr ranger-dtl)) 2>&1)"
     user_time=$(echo $TIME | awk '{print $1;}')
     wall_time=$(echo $TIME | awk '{print $2;}')
     total_user_time_rangerdtl=$(python -c "print $total_user_time_rangerdtl + $user_time")
     total_wall_time_rangerdtl=$(python -c "print $total_wall_time_rangerdtl + $wall_time")
+    parse_result ranger-dtl $output_file
+    collect_logs ranger-dtl
 
-    # RIATA-HGT (in PhyloNet)
-    echo "Run RIATA-HGT"
-    python ${scripts_dir}/reformat_input.py --method 'riata-hgt' \
-                                            --gene-tree-fp $gene_tree \
-                                            --species-tree-fp $species_tree_fp \
-                                            --output-tree-fp $input_file_nex
-    TIME="$( time (java -jar $phylonet_install_dir/PhyloNet_3.5.6.jar $input_file_nex 1>$output_file 2>$stderr) 2>&1)"
-    user_time=$(echo $TIME | awk '{print $1;}')
-    wall_time=$(echo $TIME | awk '{print $2;}')
-    total_user_time_riatahgt=$(python -c "print $total_user_time_riatahgt + $user_time")
-    total_wall_time_riatahgt=$(python -c "print $total_wall_time_riatahgt + $wall_time")
-
-    # JANE4
-    # input conditions: requires NEXUS input file;
-    # supports one-to-many mapping in both directions (ex. multiple genes per
-    # species)
-    echo "Jane 4"
-    python ${scripts_dir}/reformat_input.py --method 'jane4' \
-                                            --gene-tree-fp $gene_tree \
-                                            --species-tree-fp $species_tree_fp \
-                                            --output-tree-fp $input_file_nex
-    TIME="$( time ($jane_install_dir/jane-cli.sh $input_file_nex 1>$output_file 2>$stderr) 2>&1)"
-    user_time=$(echo $TIME | awk '{print $1;}')
-    wall_time=$(echo $TIME | awk '{print $2;}')
-    total_user_time_jane=$(python -c "print $total_user_time_jane + $user_time")
-    total_wall_time_jane=$(python -c "print $total_wall_time_jane + $wall_time")
+    if [ "${representative}" == "${gene_tree}" ]; then
+        # RIATA-HGT (in PhyloNet)
+        echo "Run RIATA-HGT"
+        python ${scripts_dir}/reformat_input.py --method 'riata-hgt' \
+                                                $gene_tree_input \
+                                                --species-tree-fp $species_tree_fp \
+                                                --output-tree-fp $input_file_nex
+        TIME="$( time (java -jar $phylonet_install_dir/PhyloNet_3.5.6.jar $input_file_nex 1>$(tool_stdout riata-hgt) 2>$(tool_stderr riata-hgt)) 2>&1)"
+        user_time=$(echo $TIME | awk '{print $1;}')
+        wall_time=$(echo $TIME | awk '{print $2;}')
+        total_user_time_riatahgt=$(python -c "print $total_user_time_riatahgt + $user_time")
+        total_wall_time_riatahgt=$(python -c "print $total_wall_time_riatahgt + $wall_time")
+        parse_result riata-hgt $(tool_stdout riata-hgt)
+        collect_logs riata-hgt
+
+        # JANE4
+        # input conditions: requires NEXUS input file;
+        # supports one-to-many mapping in both directions (ex. multiple genes per
+        # species)
+        echo "Jane 4"
+        python ${scripts_dir}/reformat_input.py --method 'jane4' \
+                                                $gene_tree_input \
+                                                --species-tree-fp $species_tree_fp \
+                                                --output-tree-fp $input_file_nex
+        TIME="$( time ($jane_install_dir/jane-cli.sh $input_file_nex 1>$(tool_stdout jane4) 2>$(tool_stderr jane4)) 2>&1)"
+        user_time=$(echo $TIME | awk '{print $1;}')
+        wall_time=$(echo $TIME | awk '{print $2;}')
+        total_user_time_jane=$(python -c "print $total_user_time_jane + $user_time")
+        total_wall_time_jane=$(python -c "print $total_wall_time_jane + $wall_time")
+        parse_result jane4 $(tool_stdout jane4)
+        collect_logs jane4
+    fi
 
     # CONSEL (AU Test)
     # input conditions: matrix of the site-wise log-likelihoods
@@ -123,29 +245,57 @@ do
     # (b) if MSA provided (ex. ALF), Fasta2Phylip.py
     # TREE-PUZZLE (reconstruct phylogenetic tree using maximum likelihood)
     # CONSEL (apply AU Test on matrix)
-    echo "Run Tree-Puzzle and CONSEL"
-    gene_tree_file=$(basename $gene_tree)
-    gene_number=$(echo $gene_tree_file | sed 's/[^0-9]*//g')
-    gene_msa_fasta_fp=$gene_msa_dir/"MSA_${gene_number}_aa.fa"
-    gene_msa_phylip_fp=$working_dir/"MSA_${gene_number}_aa.phy"
-    python ${scripts_dir}/reformat_input.py --method 'tree-puzzle' \
-                                            --gene-tree-fp $gene_tree \
-                                            --species-tree-fp $species_tree_fp \
-                                            --gene-msa-fa-fp $gene_msa_fasta_fp \
-                                            --output-tree-fp $input_file_nwk \
-                                            --output-msa-phy-fp $gene_msa_phylip_fp
-    puzzle -wsl $gene_msa_phylip_fp $input_file_nwk < $working_dir/puzzle_cmd.txt 1>$stdout 2>$stderr
-    # makermt removes the .sitelh extension and writes to the edited file path
-    # which would overwrite the Newick tree. Rename the input file to avoid this.
-    mv ${input_file_nwk}.sitelh ${input_file_nwk}_puzzle.sitelh
-    TIME="$( time (makermt --puzzle ${input_file_nwk}_puzzle.sitelh 1>$stdout 2>$stderr) 2>&1)"
-    consel ${input_file_nwk}_puzzle 1>$stdout 2>$stderr
-    catpv ${input_file_nwk}_puzzle.pv 1>$output_file 2>$stderr
-    user_time=$(echo $TIME | awk '{print $1;}')
-    wall_time=$(echo $TIME | awk '{print $2;}')
-    total_user_time_consel=$(python -c "print $total_user_time_consel + $user_time")
-    total_wall_time_consel=$(python -c "print $total_wall_time_consel + $wall_time")
-done
+    if [ "${msa_length}" == "NaN" ]; then
+        echo "Skip Tree-Puzzle and CONSEL, no alignment ${gene_msa_fasta_fp}"
+    else
+        echo "Run Tree-Puzzle and CONSEL"
+        gene_msa_phylip_fp=$job_dir/"MSA_${gene_number}_aa.phy"
+        python ${scripts_dir}/reformat_input.py --method 'tree-puzzle' \
+                                                $gene_tree_input \
+                                                --species-tree-fp $species_tree_fp \
+                                                --gene-msa-fa-fp $gene_msa_fasta_fp \
+                                                --output-tree-fp $input_file_nwk \
+                                                --output-msa-phy-fp $gene_msa_phylip_fp
+        puzzle -wsl $gene_msa_phylip_fp $input_file_nwk < $job_dir/puzzle_cmd.txt 1>$(tool_stdout puzzle) 2>$(tool_stderr puzzle)
+        # makermt removes the .sitelh extension and writes to the edited file path
+        # which would overwrite the Newick tree. Rename the input file to avoid this.
+        mv ${input_file_nwk}.sitelh ${input_file_nwk}_puzzle.sitelh
+        TIME="$( time (makermt --puzzle ${input_file_nwk}_puzzle.sitelh 1>$(tool_stdout makermt) 2>$(tool_stderr makermt)) 2>&1)"
+        consel ${input_file_nwk}_puzzle 1>$(tool_stdout consel) 2>$(tool_stderr consel)
+        catpv ${input_file_nwk}_puzzle.pv 1>$(tool_stdout catpv) 2>$(tool_stderr catpv)
+        user_time=$(echo $TIME | awk '{print $1;}')
+        wall_time=$(echo $TIME | awk '{print $2;}')
+        total_user_time_consel=$(python -c "print $total_user_time_consel + $user_time")
+        total_wall_time_consel=$(python -c "print $total_wall_time_consel + $wall_time")
+        # parse_output.py has no CONSEL parser yet, the AU test p-values
+        # (catpv) are kept per gene
+        printf "#gene %s\n" $gene_number >> $consel_results_fp
+        cat $(tool_stdout catpv) >> $consel_results_fp
+        collect_logs puzzle makermt consel catpv
+    fi
+
+    printf "%s\t%s\t%s\t%s\t%s\t%s\n" $i $gene_number \
+        ${number_hgts[trex]:-NaN} ${number_hgts[ranger-dtl]:-NaN} \
+        ${number_hgts[riata-hgt]:-NaN} ${number_hgts[jane4]:-NaN} >> $observed_hgts_fp
+    number_hgts=()
+    i=$((i + 1))
+done 3< <(grep -v '^#' $manifest_fp)
+
+# copy the results of the topology-only tools of the representatives to the
+# other genes of their class
+if [ -n "${HGT_DEDUP}" ]; then
+    python ${scripts_dir}/dedup_gene_trees.py --classes-fp $classes_fp \
+                                              --observed-hgts-fp $observed_hgts_fp \
+                                              --output-hgts-fp $job_dir/observed_hgts_all.txt \
+                                              --tool "T-REX" \
+                                              --tool "RIATA-HGT" \
+                                              --tool "Jane 4"
+    mv $job_dir/observed_hgts_all.txt $observed_hgts_fp
+fi
+
+if [ -d "${logs_root}/logs" ]; then
+    tar -czf ${HGT_LOGS_FP} -C $logs_root logs
+fi
 
 # Wn-SVM
 TIME="$( time (lgt_svm -genes $species_coding_seqs_fp > $output_file) 2>&1)"
@@ -14,6 +14,8 @@ Parse output files of HGT tools
 import click
 import sys
 
+from profiling import start_profiling, stage
+
 
 def parse_trex(input_f):
 	""" Parse output of T-REX version 3.6
@@ -22,16 +24,18 @@ def parse_trex(input_f):
 	----------
 	input_f: string
 		file descriptor for T-REX output results
+
+	Returns
+	-------
+	number_hgts: string
+		number of HGTs reported by T-REX, "NaN" if not found
 	"""
 	string = "hgt : number of HGT(s) found = "
-	out_str = False
+	number_hgts = "NaN"
 	for line in input_f:
 		if string in line:
 			number_hgts = line.split(string)[1].strip()
-			sys.stdout.write(number_hgts)
-			out_str = True
-	if not out_str:
-		sys.stdout.write("NaN")
+	return number_hgts
 
 
 def parse_rangerdtl(input_f):
@@ -41,16 +45,74 @@ def parse_rangerdtl(input_f):
 	----------
 	input_f: string
 		file descriptor for RANGER-DTL output results
+
+	Returns
+	-------
+	number_hgts: string
+		number of transfers reported by RANGER-DTL, "NaN" if not found
 	"""
 	string = "The minimum reconciliation cost is: "
-	out_str = False
+	number_hgts = "NaN"
 	for line in input_f:
 		if string in line:
 			number_hgts = line.split("Transfers: ")[1].split(",")[0]
-			sys.stdout.write(number_hgts)
-			out_str = True
-	if not out_str:
-		sys.stdout.write("NaN")
+	return number_hgts
+
+
+def parse_trex_transfers(input_f):
+	""" Parse donor and recipient species of HGTs in T-REX output
+
+	T-REX reports every HGT as a line
+	"| From subtree (SE001) to subtree (SE004)", HGTs between subtrees of
+	more than one leaf are reported with comma-separated leaves.
+
+	Parameters
+	----------
+	input_f: string
+		file descriptor for T-REX output results
+
+	Returns
+	-------
+	transfers: list of tuples
+		(donor, recipient) of every HGT, leaves of a subtree joined by ','
+	"""
+	transfers = []
+	for line in input_f:
+		if "From subtree (" in line and ") to subtree (" in line:
+			donor, recipient = line.split("From subtree (")[1].split(
+				") to subtree (")
+			recipient = recipient.split(")")[0]
+			transfers.append(tuple(
+				",".join(leaf.strip() for leaf in subtree.split(","))
+				for subtree in (donor, recipient)))
+	return transfers
+
+
+def parse_rangerdtl_transfers(input_f):
+	""" Parse donor and recipient species of transfers in RANGER-DTL output
+
+	RANGER-DTL reports every transfer in the reconciliation as a line
+	"m3 = LCA[SE001_1, SE002_1]: Transfer, Mapping --> SE001, Recipient -->
+	SE004", donors and recipients are species tree nodes (internal nodes are
+	named n1, n2, ..).
+
+	Parameters
+	----------
+	input_f: string
+		file descriptor for RANGER-DTL output results
+
+	Returns
+	-------
+	transfers: list of tuples
+		(donor, recipient) of every transfer
+	"""
+	transfers = []
+	for line in input_f:
+		if ": Transfer, Mapping --> " in line:
+			donor, recipient = line.split(": Transfer, Mapping --> ")[1].split(
+				", Recipient --> ")
+			transfers.append((donor.strip(), recipient.strip()))
+	return transfers
 
 
 def parse_riatahgt(input_f):
@@ -60,16 +122,18 @@ def parse_riatahgt(input_f):
 	----------
 	input_f: string
 		file descriptor for RIATA-HGT output results
+
+	Returns
+	-------
+	number_hgts: string
+		number of HGTs reported by RIATA-HGT, "NaN" if not found
 	"""
 	string = "There are "
-	out_str = False
+	number_hgts = "NaN"
 	for line in input_f:
 		if string in line:
 			number_hgts = line.split(string)[1].split(" component(s)")[0]
-			sys.stdout.write(number_hgts)
-			out_str = True
-	if not out_str:
-		sys.stdout.write("NaN")
+	return number_hgts
 
 
 def parse_jane4(input_f):
@@ -79,16 +143,18 @@ def parse_jane4(input_f):
 	----------
 	input_f: string
 		file descriptor for RIATA-HGT output results
+
+	Returns
+	-------
+	number_hgts: string
+		number of host switches reported by Jane 4, "NaN" if not found
 	"""
 	string = "Host Switch: "
-	out_str = False
+	number_hgts = "NaN"
 	for line in input_f:
 		if string in line:
 			number_hgts = line.split(string)[1].strip()
-			sys.stdout.write(number_hgts)
-			out_str = True
-	if not out_str:
-		sys.stdout.write("NaN")
+	return number_hgts
 
 
 @click.command()
@@ -117,15 +183,16 @@ def _main(hgt_results_fp,
         the method used for HGT detection
     """
 
-    with open(hgt_results_fp, 'U') as input_f:
+    start_profiling('parse_output')
+    with open(hgt_results_fp, 'U') as input_f, stage('parse_%s' % method):
 	    if method == 'ranger-dtl':
-	        parse_rangerdtl(input_f=input_f)
+	        sys.stdout.write(parse_rangerdtl(input_f=input_f))
 	    elif method == 'trex':
-	        parse_trex(input_f=input_f)
+	        sys.stdout.write(parse_trex(input_f=input_f))
 	    elif method == 'riata-hgt':
-	        parse_riatahgt(input_f=input_f)
+	        sys.stdout.write(parse_riatahgt(input_f=input_f))
 	    elif method == 'jane4':
-	        parse_jane4(input_f=input_f)
+	        sys.stdout.write(parse_jane4(input_f=input_f))
 	    elif method == 'consel':
 	        parse_consel(input_f=input_f)
 
@@ -0,0 +1,218 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Opt-in stage profiling of reformatting, parsing and accuracy scripts
+====================================================================
+
+Profiling is disabled unless one of the following environment variables is
+set before launching reformat_input.py, parse_output.py,
+compute_accuracy.py or run_tools.py:
+
+HGT_PROFILE
+    file path of the report, per-stage wall time is appended to it by
+    every process (one line per entry point, process and stage)
+HGT_PROFILE_CPROFILE_DIR
+    directory path, a cProfile dump <entry>_<pid>.prof is written per
+    process
+HGT_PROFILE_MEMORY
+    if set to 1, record the peak memory of each stage (tracemalloc if
+    available, otherwise the maximum resident set size of the process)
+
+If HGT_PROFILE is not set, the per-stage report of every process is written
+to standard error instead.
+
+Reports of many processes (ex. one reformat_input.py call per gene tree)
+are aggregated with `python profiling.py --report-fp $HGT_PROFILE`.
+"""
+
+import sys
+import click
+import atexit
+import threading
+from os import environ, getpid
+from os.path import join
+from time import time
+from contextlib import contextmanager
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class StageProfiler(object):
+    """ Accumulate wall time and peak memory per named stage
+
+    Parameters
+    ----------
+    entry: string
+        name of the profiled entry point
+    report_fp: string, optional
+        file path of the report (appended to), standard error if None
+    cprofile_dp: string, optional
+        directory path for cProfile dumps
+    memory: boolean
+        record peak memory per stage
+    """
+
+    def __init__(self, entry, report_fp=None, cprofile_dp=None,
+                 memory=False):
+        self.entry = entry
+        self.report_fp = report_fp
+        self.cprofile_dp = cprofile_dp
+        self.memory = memory
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._cprofile = None
+        if cprofile_dp is not None:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        if memory and tracemalloc is not None:
+            tracemalloc.start()
+
+    def _peak_kb(self):
+        """ Return the peak memory (in kB) of the process so far
+        """
+        if tracemalloc is not None:
+            return tracemalloc.get_traced_memory()[1] // 1024
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    @contextmanager
+    def stage(self, name):
+        """ Time the enclosed block as stage name
+        """
+        if self.memory and hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        start = time()
+        try:
+            yield
+        finally:
+            elapsed = time() - start
+            peak_kb = self._peak_kb() if self.memory else 0
+            with self._lock:
+                calls, seconds, peak = self.stages.get(name, (0, 0.0, 0))
+                self.stages[name] = (calls + 1, seconds + elapsed,
+                                     max(peak, peak_kb))
+
+    def write(self):
+        """ Append the stages to the report and dump the cProfile stats
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(join(
+                self.cprofile_dp, "%s_%d.prof" % (self.entry, getpid())))
+        if self.report_fp is not None:
+            with open(self.report_fp, 'a') as report_f:
+                self._write_stages(report_f)
+        else:
+            self._write_stages(sys.stderr)
+
+    def _write_stages(self, report_f):
+        """ Write one report line per stage
+        """
+        for name in sorted(self.stages):
+            calls, seconds, peak_kb = self.stages[name]
+            report_f.write("%s\t%d\t%s\t%d\t%.6f\t%d\n" % (
+                self.entry, getpid(), name, calls, seconds, peak_kb))
+
+
+_profiler = None
+
+
+def start_profiling(entry):
+    """ Enable profiling of an entry point if requested by the environment
+
+    Parameters
+    ----------
+    entry: string
+        name of the profiled entry point
+
+    Returns
+    -------
+    profiler: StageProfiler or None
+        the process profiler, None if profiling is disabled
+    """
+    global _profiler
+    report_fp = environ.get('HGT_PROFILE')
+    cprofile_dp = environ.get('HGT_PROFILE_CPROFILE_DIR')
+    memory = environ.get('HGT_PROFILE_MEMORY') == '1'
+    if _profiler is None and (report_fp or cprofile_dp or memory):
+        _profiler = StageProfiler(entry, report_fp=report_fp,
+                                  cprofile_dp=cprofile_dp, memory=memory)
+        atexit.register(_profiler.write)
+    return _profiler
+
+
+@contextmanager
+def stage(name):
+    """ Time the enclosed block if profiling is enabled
+
+    Parameters
+    ----------
+    name: string
+        stage name
+    """
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.stage(name):
+            yield
+
+
+def summarize_report(report_f, output_f):
+    """ Aggregate report lines of all processes per entry point and stage
+
+    Parameters
+    ----------
+    report_f: file object
+        file descriptor of the report
+    output_f: file object
+        file descriptor for the summary
+    """
+    totals = {}
+    processes = {}
+    for line in report_f:
+        entry, pid, name, calls, seconds, peak_kb = \
+            line.rstrip('\n').split('\t')
+        key = (entry, name)
+        total_calls, total_seconds, peak = totals.get(key, (0, 0.0, 0))
+        totals[key] = (total_calls + int(calls),
+                       total_seconds + float(seconds),
+                       max(peak, int(peak_kb)))
+        processes.setdefault(key, set()).add(pid)
+    output_f.write("#entry\tstage\tprocesses\tcalls\ttotal seconds\t"
+                   "mean seconds\tpeak kB\n")
+    for key in sorted(totals, key=lambda k: -totals[k][1]):
+        calls, seconds, peak_kb = totals[key]
+        output_f.write("%s\t%s\t%d\t%d\t%.6f\t%.6f\t%d\n" % (
+            key[0], key[1], len(processes[key]), calls, seconds,
+            seconds / calls, peak_kb))
+
+
+@click.command()
+@click.option('--report-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Profiling report (value of HGT_PROFILE)')
+def _main(report_fp):
+    """ Aggregate a profiling report across processes
+
+    Parameters
+    ----------
+    report_fp: string
+        file path to the profiling report
+    """
+    with open(report_fp, 'U') as report_f:
+        summarize_report(report_f, sys.stdout)
+
+
+if __name__ == "__main__":
+    _main()
@@ -16,8 +16,16 @@ import click
 from string import replace
 from os import remove
 
-import skbio.io
-from skbio import TreeNode, Alignment
+from profiling import start_profiling, stage
+
+
+# all methods of the command line and the methods whose input trees (and
+# alignment) are reformatted
+all_methods = ('trex', 'ranger-dtl', 'riata-hgt', 'consel', 'darkhorse',
+               'wn-svm', 'genemark', 'hgtector', 'distance-method', 'jane4',
+               'tree-puzzle')
+reformatted_methods = ('trex', 'ranger-dtl', 'riata-hgt', 'jane4',
+                       'tree-puzzle')
 
 
 def join_trees(gene_tree,
@@ -38,7 +46,8 @@ def join_trees(gene_tree,
     --------
     skbio.TreeNode
     """
-    with open(output_tree_fp, 'w') as output_tree_f:
+    with stage('write_newick'):
+        with open(output_tree_fp, 'w') as output_tree_f:
             output_tree_f.write(
                 "%s\n%s\n" % (str(species_tree)[:-1], str(gene_tree)[:-1]))
 
@@ -116,6 +125,53 @@ def species_gene_mapping(gene_tree,
     return mapping_leaves
 
 
+def prune_species_tree(gene_tree,
+                       species_tree,
+                       cache=None):
+    """ Restrict the species tree to the species present in the gene tree
+
+    The species tree is sheared to the species tips which are associated
+    with at least one gene tree leaf (see species_gene_mapping), single
+    child nodes are collapsed. Tools such as T-REX and RIATA-HGT require
+    the species and gene trees to have equal leaf sets and their runtime
+    grows with the size of the species tree.
+
+    Pruned trees are cached by their set of species, the same cache
+    dictionary can be passed for all gene trees of a run against one
+    species tree. Must be called before trim_gene_tree_leaves.
+
+    Parameters
+    ----------
+    gene_tree: skbio.TreeNode
+        TreeNode instance for gene tree
+    species_tree: skbio.TreeNode
+        TreeNode instance for species tree
+    cache: dictionary, optional
+        pruned species trees keyed by frozenset of species names
+
+    Returns
+    -------
+    pruned_tree: skbio.TreeNode
+        copy of the species tree restricted to the gene tree's species
+
+    See Also
+    --------
+    skbio.TreeNode.shear
+    """
+    mapping_leaves = species_gene_mapping(gene_tree=gene_tree,
+                                          species_tree=species_tree)
+    species = frozenset(
+        name for name in mapping_leaves if mapping_leaves[name])
+    if cache is None:
+        cache = {}
+    if species not in cache:
+        if len(species) == len(mapping_leaves):
+            cache[species] = species_tree.copy()
+        else:
+            cache[species] = species_tree.shear(species)
+    return cache[species].copy()
+
+
 def id_mapper(ids):
     """
     """
@@ -155,6 +211,7 @@ def reformat_trex(gene_tree,
     """ Reformat input trees to the format accepted by T-REX
 
     Binary trees only, leaves of species and gene trees must have equal names
+    (see prune_species_tree)
 
     Parameters
     ----------
@@ -183,7 +240,8 @@ def reformat_riatahgt(gene_tree,
     """ Reformat input trees to the format accepted by RIATA-HGT (PhyloNet)
 
     Input to RIATA-HGT is a Nexus file. The number of leaves in the species
-    and gene tree must be equal with the same naming.
+    and gene tree must be equal with the same naming (see
+    prune_species_tree).
 
     gene_tree: skbio.TreeNode
         TreeNode instance for gene tree
@@ -207,10 +265,11 @@ END;
 """
     # trim gene tree leaves to exclude '_GENENAME' (if exists)
     trim_gene_tree_leaves(gene_tree)
-    p = replace(nexus_file, 'SPECIES_TREE', str(species_tree)[:-1])
-    p = replace(p, 'GENE_TREE', str(gene_tree)[:-1])
-    with open(output_tree_fp, 'w') as output_tree_f:
-        output_tree_f.write(p)
+    with stage('write_newick'):
+        p = replace(nexus_file, 'SPECIES_TREE', str(species_tree)[:-1])
+        p = replace(p, 'GENE_TREE', str(gene_tree)[:-1])
+        with open(output_tree_fp, 'w') as output_tree_f:
+            output_tree_f.write(p)
 
 
 def reformat_jane4(gene_tree,
@@ -257,11 +316,12 @@ endblock;
     for species in mapping_dict:
         for gene in mapping_dict[species]:
             mapping_str = "%s%s:%s, " % (mapping_str, gene, species)
-    p = replace(nexus_file, 'SPECIES_TREE', str(species_tree))
-    p = replace(p, 'GENE_TREE', str(gene_tree))
-    p = replace(p, 'MAPPING', mapping_str[:-2])
-    with open(output_tree_fp, 'w') as output_tree_f:
-        output_tree_f.write(p)
+    with stage('write_newick'):
+        p = replace(nexus_file, 'SPECIES_TREE', str(species_tree))
+        p = replace(p, 'GENE_TREE', str(gene_tree))
+        p = replace(p, 'MAPPING', mapping_str[:-2])
+        with open(output_tree_fp, 'w') as output_tree_f:
+            output_tree_f.write(p)
 
 
 def reformat_treepuzzle(gene_tree,
@@ -300,17 +360,30 @@ def reformat_treepuzzle(gene_tree,
     join_trees(gene_tree,
         species_tree,
         output_tree_fp)
+    from skbio import Alignment
     # trim FASTA sequence labels to exclude '/GENENAME' (if exists)
-    msa_fa = Alignment.read(gene_msa_fa_fp, format='fasta')
-    msa_fa_update_ids, new_to_old_ids = msa_fa.update_ids(func=id_mapper)
-    msa_fa_update_ids.write(output_msa_phy_fp, format='phylip')
+    with stage('read_msa'):
+        msa_fa = Alignment.read(gene_msa_fa_fp, format='fasta')
+    with stage('write_msa'):
+        msa_fa_update_ids, new_to_old_ids = msa_fa.update_ids(func=id_mapper)
+        msa_fa_update_ids.write(output_msa_phy_fp, format='phylip')
 
 
 @click.command()
-@click.option('--gene-tree-fp', required=True,
+@click.option('--gene-tree-fp', required=False,
               type=click.Path(resolve_path=True, readable=True, exists=True,
                               file_okay=True),
               help='Gene tree in Newick format')
+@click.option('--gene-tree-archive-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Archive of gene trees (see tree_archive.py), instead of '
+                   '--gene-tree-fp')
+@click.option('--gene-tree-offset', required=False, type=int,
+              help='Byte offset of the gene tree in --gene-tree-archive-fp '
+                   '(see index_alf_run.py manifest)')
+@click.option('--gene-tree-bytes', required=False, type=int,
+              help='Size of the gene tree in --gene-tree-archive-fp')
 @click.option('--species-tree-fp', required=True,
               type=click.Path(resolve_path=True, readable=True, exists=True,
                               file_okay=True),
@@ -328,19 +401,22 @@ def reformat_treepuzzle(gene_tree,
                               file_okay=True),
               help='Output MSA in PHYLIP format')
 @click.option('--method', required=True,
-              type=click.Choice(['trex', 'ranger-dtl',
-                                 'riata-hgt', 'consel',
-                                 'darkhorse', 'wn-svm',
-                                 'genemark', 'hgtector',
-                                 'distance-method', 'jane4',
-                                 'tree-puzzle']),
+              type=click.Choice(all_methods),
               help='The method to be used for HGT detection')
+@click.option('--prune-species-tree', 'prune_species', is_flag=True,
+              default=False,
+              help='Restrict the species tree to the species in the gene '
+                   'tree (T-REX and RIATA-HGT only)')
 def _main(gene_tree_fp,
+          gene_tree_archive_fp,
+          gene_tree_offset,
+          gene_tree_bytes,
           species_tree_fp,
           gene_msa_fa_fp,
           output_tree_fp,
           output_msa_phy_fp,
-          method):
+          method,
+          prune_species):
     """ Call different reformatting functions depending on method used
         for HGT detection
 
@@ -355,6 +431,12 @@ def _main(gene_tree_fp,
     ----------
     gene_tree_fp: string
         file path to gene tree in Newick format
+    gene_tree_archive_fp: string
+        file path to archive of gene trees (see tree_archive.py)
+    gene_tree_offset: integer
+        byte offset of the gene tree in the archive
+    gene_tree_bytes: integer
+        size of the gene tree in the archive
     species_tree_fp: string
         file path to species tree in Newick format
     gene_msa_fa_fp: string
@@ -365,35 +447,67 @@ def _main(gene_tree_fp,
         file path to output MSA in PHYLIP format
     method: string
         the method to be used for HGT detection
+    prune_species: boolean
+        if True, restrict the species tree to the species in the gene tree
+        before reformatting for T-REX and RIATA-HGT
     """
 
     # add function to check where tree is multifurcating and the labeling
     # is correct
-    gene_tree = TreeNode.read(gene_tree_fp, format='newick')
-    species_tree = TreeNode.read(species_tree_fp, format='newick')
-
-    if method == 'ranger-dtl':
-        reformat_rangerdtl(gene_tree=gene_tree,
-            species_tree=species_tree,
-            output_tree_fp=output_tree_fp)
-    elif method == 'trex':
-        reformat_trex(gene_tree=gene_tree,
-            species_tree=species_tree,
-            output_tree_fp=output_tree_fp)
-    elif method == 'riata-hgt':
-        reformat_riatahgt(gene_tree=gene_tree,
-            species_tree=species_tree,
-            output_tree_fp=output_tree_fp)
-    elif method == 'jane4':
-        reformat_jane4(gene_tree=gene_tree,
-            species_tree=species_tree,
-            output_tree_fp=output_tree_fp)
-    elif method == 'tree-puzzle':
-        reformat_treepuzzle(gene_tree=gene_tree,
-            species_tree=species_tree,
-            gene_msa_fa_fp=gene_msa_fa_fp,
-            output_tree_fp=output_tree_fp,
-            output_msa_phy_fp=output_msa_phy_fp)
+    if gene_tree_archive_fp is not None:
+        if gene_tree_offset is None or gene_tree_bytes is None:
+            raise click.UsageError(
+                "--gene-tree-offset and --gene-tree-bytes are required with "
+                "--gene-tree-archive-fp")
+    elif gene_tree_fp is None:
+        raise click.UsageError(
+            "--gene-tree-fp or --gene-tree-archive-fp is required")
+    if method not in reformatted_methods:
+        # nothing to reformat, the tool reads the raw input files
+        return
+    start_profiling('reformat_input')
+    with stage('import_skbio'):
+        # importing any part of skbio loads the whole package (Alignment
+        # included), only the methods reformatting trees pay for it
+        from skbio import TreeNode
+    with stage('read_newick'):
+        if gene_tree_archive_fp is not None:
+            # one seek, the archive index is not read
+            from tree_archive import read_archived_newick
+            gene_tree = TreeNode.read(
+                [read_archived_newick(gene_tree_archive_fp, gene_tree_offset,
+                                      gene_tree_bytes)], format='newick')
+        else:
+            gene_tree = TreeNode.read(gene_tree_fp, format='newick')
+        species_tree = TreeNode.read(species_tree_fp, format='newick')
+    if prune_species and method in ('trex', 'riata-hgt'):
+        with stage('prune_species_tree'):
+            species_tree = prune_species_tree(gene_tree=gene_tree,
+                                              species_tree=species_tree)
+
+    with stage('reformat_%s' % method):
+        if method == 'ranger-dtl':
+            reformat_rangerdtl(gene_tree=gene_tree,
+                species_tree=species_tree,
+                output_tree_fp=output_tree_fp)
+        elif method == 'trex':
+            reformat_trex(gene_tree=gene_tree,
+                species_tree=species_tree,
+                output_tree_fp=output_tree_fp)
+        elif method == 'riata-hgt':
+            reformat_riatahgt(gene_tree=gene_tree,
+                species_tree=species_tree,
+                output_tree_fp=output_tree_fp)
+        elif method == 'jane4':
+            reformat_jane4(gene_tree=gene_tree,
+                species_tree=species_tree,
+                output_tree_fp=output_tree_fp)
+        elif method == 'tree-puzzle':
+            reformat_treepuzzle(gene_tree=gene_tree,
+                species_tree=species_tree,
+                gene_msa_fa_fp=gene_msa_fa_fp,
+                output_tree_fp=output_tree_fp,
+                output_msa_phy_fp=output_msa_phy_fp)
 
 
 if __name__ == "__main__":
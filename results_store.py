@@ -0,0 +1,138 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Columnar binary store of observed HGT counts
+============================================
+
+A results store is a directory holding one NumPy .npy file per column:
+
+gene_id.npy
+    int32 gene IDs
+tool_0.npy, tool_1.npy, ..
+    int32 number of HGTs detected by each tool, -1 if the tool did not
+    report a result (NaN in the observed transfers table)
+columns.txt
+    tool names, one per line, in the order of the tool_*.npy files
+
+Columns are loaded as read-only memory-mapped arrays.
+"""
+
+import click
+from os import makedirs
+from os.path import join, isdir
+
+import numpy as np
+
+
+def write_results_store(store_dp,
+                        gene_ids,
+                        columns):
+    """ Write observed HGT counts to a results store
+
+    Parameters
+    ----------
+    store_dp: string
+        directory path of the results store (created if missing)
+    gene_ids: list of integers
+        gene IDs
+    columns: list of tuples
+        (tool name, list of number of HGTs) for every tool, numbers are
+        integers or "NaN" strings
+    """
+    if not isdir(store_dp):
+        makedirs(store_dp)
+    np.save(join(store_dp, "gene_id.npy"),
+            np.asarray(gene_ids, dtype=np.int32))
+    with open(join(store_dp, "columns.txt"), 'w') as columns_f:
+        for i, (tool, counts) in enumerate(columns):
+            columns_f.write("%s\n" % tool)
+            np.save(join(store_dp, "tool_%d.npy" % i),
+                    np.array([-1 if count == "NaN" else int(count)
+                              for count in counts], dtype=np.int32))
+
+
+def load_results_store(store_dp):
+    """ Load a results store as memory-mapped arrays
+
+    Parameters
+    ----------
+    store_dp: string
+        directory path of the results store
+
+    Returns
+    -------
+    gene_ids: numpy.ndarray
+        int32 gene IDs
+    columns: list of tuples
+        (tool name, int32 numpy.ndarray of number of HGTs) for every tool
+    """
+    gene_ids = np.load(join(store_dp, "gene_id.npy"), mmap_mode='r')
+    columns = []
+    with open(join(store_dp, "columns.txt"), 'U') as columns_f:
+        for i, line in enumerate(columns_f):
+            columns.append(
+                (line.rstrip('\n'),
+                 np.load(join(store_dp, "tool_%d.npy" % i), mmap_mode='r')))
+    return gene_ids, columns
+
+
+def convert_observed_transfers(observed_hgts_f,
+                               store_dp):
+    """ Convert an observed transfers table to a results store
+
+    Parameters
+    ----------
+    observed_hgts_f: file object
+        file descriptor of observed transfers (see
+        compute_accuracy.parse_observed_transfers)
+    store_dp: string
+        directory path of the results store
+    """
+    tools = []
+    gene_ids = []
+    counts = []
+    next(observed_hgts_f)
+    for line in observed_hgts_f:
+        line = line.strip().split('\t')
+        if line[0].startswith('#'):
+            tools = line[2:]
+            counts = [[] for tool in tools]
+            continue
+        gene_ids.append(int(line[1]))
+        for i, hgt_num in enumerate(line[2:]):
+            counts[i].append(hgt_num)
+    write_results_store(store_dp, gene_ids, zip(tools, counts))
+
+
+@click.command()
+@click.option('--observed-hgts-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Observed transfers table (output of launch_software.sh)')
+@click.option('--store-dp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=False),
+              help='Output results store directory')
+def _main(observed_hgts_fp,
+          store_dp):
+    """ Convert an observed transfers table to a results store
+
+    Parameters
+    ----------
+    observed_hgts_fp: string
+        file path to observed transfers table
+    store_dp: string
+        directory path of the output results store
+    """
+    with open(observed_hgts_fp, 'U') as observed_hgts_f:
+        convert_observed_transfers(observed_hgts_f, store_dp)
+
+
+if __name__ == "__main__":
+    _main()
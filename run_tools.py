@@ -0,0 +1,844 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Launch HGT tools on gene trees and parse their output streams
+=============================================================
+"""
+
+import sys
+import click
+import tarfile
+import threading
+from glob import glob
+from os import devnull
+from os.path import join, exists, basename
+from shutil import rmtree
+from tempfile import mkdtemp
+from subprocess import Popen, PIPE
+from multiprocessing.pool import ThreadPool
+from time import time
+
+from reformat_input import (reformat_trex,
+                            reformat_rangerdtl,
+                            reformat_riatahgt,
+                            reformat_jane4,
+                            prune_species_tree)
+from parse_output import (parse_trex,
+                          parse_rangerdtl,
+                          parse_riatahgt,
+                          parse_jane4,
+                          parse_trex_transfers,
+                          parse_rangerdtl_transfers)
+from dedup_gene_trees import gene_number, topology_classes
+from profiling import start_profiling, stage
+
+
+# column names in the observed transfers table
+tool_names = {'trex': 'T-REX',
+              'ranger-dtl': 'RANGER-DTL',
+              'riata-hgt': 'RIATA-HGT',
+              'jane4': 'Jane 4'}
+# supported methods, in the order of the observed transfers table columns
+all_methods = ('trex', 'ranger-dtl', 'riata-hgt', 'jane4')
+# tools whose results only depend on the gene tree topology
+topology_tools = ('trex', 'riata-hgt', 'jane4')
+# parsers of the donor and recipient species of every transfer
+transfer_parsers = {'trex': parse_trex_transfers,
+                    'ranger-dtl': parse_rangerdtl_transfers}
+
+
+def tool_command(method,
+                 phylonet_jar_fp=None,
+                 jane_cli_fp=None):
+    """ Return the command line launching a tool in its job directory
+
+    Parameters
+    ----------
+    method: string
+        the method used for HGT detection
+    phylonet_jar_fp: string
+        file path to PhyloNet jar (RIATA-HGT)
+    jane_cli_fp: string
+        file path to jane-cli.sh (Jane 4)
+
+    Returns
+    -------
+    input_file: string
+        name of the reformatted input file in the job directory
+    command: list of strings
+        command line
+    output_file: string
+        name of the output file to parse, None if results are parsed from
+        the standard output stream
+    """
+    if method == 'trex':
+        # T-REX writes its results to the file given as -outputfile
+        return ('input_tree.nwk',
+                ['hgt3.4', '-inputfile=input_tree.nwk',
+                 '-outputfile=output_file.txt'],
+                'output_file.txt')
+    elif method == 'ranger-dtl':
+        return ('input_tree.nwk',
+                ['ranger-dtl-U.linux', '-i', 'input_tree.nwk'],
+                None)
+    elif method == 'riata-hgt':
+        return ('input_tree.nex',
+                ['java', '-jar', phylonet_jar_fp, 'input_tree.nex'],
+                None)
+    elif method == 'jane4':
+        return ('input_tree.nex',
+                [jane_cli_fp, 'input_tree.nex'],
+                None)
+    raise ValueError("Method %s is not supported" % method)
+
+
+def _tee(lines, output_f):
+    """ Yield lines while copying them to output_f
+    """
+    for line in lines:
+        output_f.write(line)
+        yield line
+
+
+def _collect(lines, output_lines):
+    """ Yield lines while appending them to output_lines
+    """
+    for line in lines:
+        output_lines.append(line)
+        yield line
+
+
+def _parse(method, input_f):
+    """ Call the parsing function of a method
+    """
+    if method == 'trex':
+        return parse_trex(input_f=input_f)
+    elif method == 'ranger-dtl':
+        return parse_rangerdtl(input_f=input_f)
+    elif method == 'riata-hgt':
+        return parse_riatahgt(input_f=input_f)
+    elif method == 'jane4':
+        return parse_jane4(input_f=input_f)
+
+
+class LogArchive(object):
+    """ Collect the output streams of many jobs into one tar.gz file
+
+    Parameters
+    ----------
+    logs_fp: string
+        file path to output archive
+    """
+
+    def __init__(self, logs_fp):
+        self._tar = tarfile.open(logs_fp, 'w:gz')
+        self._lock = threading.Lock()
+
+    def add(self, job_dp):
+        """ Add stdout.txt and stderr.txt of a job directory
+
+        Parameters
+        ----------
+        job_dp: string
+            job directory path, its name is the directory in the archive
+        """
+        with self._lock:
+            for name in ("stdout.txt", "stderr.txt"):
+                if exists(join(job_dp, name)):
+                    self._tar.add(join(job_dp, name),
+                                  arcname=join(basename(job_dp), name))
+
+    def close(self):
+        """ Write the end of the archive
+        """
+        self._tar.close()
+
+
+def run_tool(gene_tree_fp,
+             species_tree,
+             method,
+             working_dp,
+             phylonet_jar_fp=None,
+             jane_cli_fp=None,
+             prune_cache=None,
+             debug=False,
+             log_archive=None,
+             transfers=None,
+             newick=None):
+    """ Reformat input, launch one tool on one gene tree and parse its output
+
+    Each job runs in its own temporary directory under working_dp, the
+    standard output of the tool is parsed line by line while the tool runs
+    and nothing is written to disk besides the tool's input (and its output
+    file for T-REX). With debug, the job directory is kept and the standard
+    output and error streams are saved to stdout.txt and stderr.txt. With
+    log_archive, the streams are saved and then added to the archive before
+    the job directory is removed.
+
+    Parameters
+    ----------
+    gene_tree_fp: string
+        file path to gene tree in Newick format
+    species_tree: skbio.TreeNode
+        TreeNode instance for species tree (not modified)
+    method: string
+        the method used for HGT detection
+    working_dp: string
+        working directory path
+    phylonet_jar_fp: string
+        file path to PhyloNet jar (RIATA-HGT)
+    jane_cli_fp: string
+        file path to jane-cli.sh (Jane 4)
+    prune_cache: dictionary, optional
+        if given, restrict the species tree to the gene tree's species for
+        T-REX and RIATA-HGT (see reformat_input.prune_species_tree)
+    debug: boolean
+        keep job directory and tool output streams
+    log_archive: LogArchive, optional
+        archive collecting the tool output streams
+    transfers: list, optional
+        (donor, recipient) of every transfer reported by the tool are
+        appended to it (T-REX and RANGER-DTL, see transfer_parsers)
+    newick: string, optional
+        gene tree in Newick format (ex. read from a tree_archive.TreeArchive),
+        gene_tree_fp is then only used to name the job
+
+    Returns
+    -------
+    number_hgts: string
+        number of HGTs reported by the tool, "NaN" if not found
+    """
+    from skbio import TreeNode
+    input_file, command, output_file = tool_command(
+        method, phylonet_jar_fp=phylonet_jar_fp, jane_cli_fp=jane_cli_fp)
+    job_dp = mkdtemp(prefix="%s_%s_" % (method, gene_number(gene_tree_fp)),
+                     dir=working_dp)
+    try:
+        with stage('read_newick'):
+            if newick is not None:
+                gene_tree = TreeNode.read([newick], format='newick')
+            else:
+                gene_tree = TreeNode.read(gene_tree_fp, format='newick')
+        if prune_cache is not None and method in ('trex', 'riata-hgt'):
+            with stage('prune_species_tree'):
+                job_species_tree = prune_species_tree(
+                    gene_tree=gene_tree, species_tree=species_tree,
+                    cache=prune_cache)
+        else:
+            job_species_tree = species_tree.copy()
+        input_fp = join(job_dp, input_file)
+        with stage('reformat_%s' % method):
+            if method == 'trex':
+                reformat_trex(gene_tree, job_species_tree, input_fp)
+            elif method == 'ranger-dtl':
+                reformat_rangerdtl(gene_tree, job_species_tree, input_fp)
+            elif method == 'riata-hgt':
+                reformat_riatahgt(gene_tree, job_species_tree, input_fp)
+            elif method == 'jane4':
+                reformat_jane4(gene_tree, job_species_tree, input_fp)
+
+        if debug or log_archive is not None:
+            stdout_f = open(join(job_dp, "stdout.txt"), 'w')
+            stderr_f = open(join(job_dp, "stderr.txt"), 'w')
+        else:
+            stdout_f = None
+            stderr_f = open(devnull, 'w')
+        try:
+            with stage('tool_%s' % method):
+                proc = Popen(command, cwd=job_dp, stdout=PIPE, stderr=stderr_f,
+                             universal_newlines=True, close_fds=True)
+                lines = iter(proc.stdout.readline, '')
+                if stdout_f is not None:
+                    lines = _tee(lines, stdout_f)
+                output_lines = None
+                if (transfers is not None and method in transfer_parsers and
+                        output_file is None):
+                    output_lines = []
+                    lines = _collect(lines, output_lines)
+                if output_file is None:
+                    number_hgts = _parse(method, lines)
+                else:
+                    for line in lines:
+                        pass
+                proc.stdout.close()
+                proc.wait()
+                if output_file is not None:
+                    number_hgts = "NaN"
+                    if exists(join(job_dp, output_file)):
+                        with open(join(job_dp, output_file), 'U') as output_f:
+                            number_hgts = _parse(method, output_f)
+                        if (transfers is not None and
+                                method in transfer_parsers):
+                            with open(join(job_dp, output_file),
+                                      'U') as output_f:
+                                transfers.extend(
+                                    transfer_parsers[method](output_f))
+                elif output_lines is not None:
+                    transfers.extend(transfer_parsers[method](output_lines))
+        finally:
+            if stdout_f is not None:
+                stdout_f.close()
+            stderr_f.close()
+            if log_archive is not None:
+                log_archive.add(job_dp)
+    finally:
+        if not debug:
+            rmtree(job_dp)
+    return number_hgts
+
+
+def run_tools(gene_tree_fps,
+              species_tree_fp,
+              methods,
+              working_dp,
+              threads=1,
+              phylonet_jar_fp=None,
+              jane_cli_fp=None,
+              prune_species=False,
+              dedup=False,
+              debug=False,
+              on_result=None,
+              job_costs=None,
+              timings=None,
+              scratch_root=None,
+              logs_fp=None,
+              transfers=None,
+              archive=None):
+    """ Launch HGT tools on all gene trees with a bounded number of jobs
+
+    Parameters
+    ----------
+    gene_tree_fps: list of strings
+        file paths to gene trees in Newick format
+    species_tree_fp: string
+        file path to species tree in Newick format
+    methods: list of strings
+        the methods used for HGT detection
+    working_dp: string
+        working directory path (job directories unless scratch_root)
+    threads: integer
+        maximum number of tools running at once
+    phylonet_jar_fp: string
+        file path to PhyloNet jar (RIATA-HGT)
+    jane_cli_fp: string
+        file path to jane-cli.sh (Jane 4)
+    prune_species: boolean
+        restrict the species tree to the gene tree's species for T-REX and
+        RIATA-HGT
+    dedup: boolean
+        launch topology-only tools once per class of gene trees with
+        identical topologies (see dedup_gene_trees.topology_classes)
+    debug: boolean
+        keep job directories and tool output streams
+    on_result: function, optional
+        called as on_result(gene_tree_fp, method, number_hgts) for every
+        result as soon as it is known, including the results copied from
+        a representative gene tree with dedup (ex. StreamingAccuracy
+        updates, ObservedTransfersWriter)
+    job_costs: function, optional
+        called as job_costs(gene_tree_fp, method) to predict the runtime
+        of every job, jobs are then dispatched longest first (see
+        scheduler.py)
+    timings: list, optional
+        (gene tree file path, method, seconds) of every launched job are
+        appended to it, in dispatch order
+    scratch_root: string, optional
+        directory path on fast local storage (ex. /dev/shm), job
+        directories are created in a directory under it which is removed
+        once all jobs are done (kept with debug)
+    logs_fp: string, optional
+        file path to output tar.gz of the output streams of all jobs
+    transfers: dict, optional
+        filled with gene tree file paths (keys) and dictionaries of methods
+        (keys) and lists of (donor, recipient) of every transfer reported
+        by the methods of transfer_parsers
+    archive: tree_archive.TreeArchive, optional
+        archive of the gene trees, read instead of the gene tree files
+
+    Returns
+    -------
+    results: dict
+        dictionary of gene tree file paths (keys) and dictionaries of
+        methods (keys) and number of HGTs
+    """
+    from skbio import TreeNode
+    species_tree = TreeNode.read(species_tree_fp, format='newick')
+    prune_cache = {} if prune_species else None
+    if dedup and archive is not None:
+        representatives = dict(topology_classes(
+            gene_tree_fps, (archive.read(gene_number(fp))
+                            for fp in gene_tree_fps)))
+    elif dedup:
+        representatives = dict(topology_classes(gene_tree_fps))
+    else:
+        representatives = dict((fp, fp) for fp in gene_tree_fps)
+    members = {}
+    for gene_tree_fp in gene_tree_fps:
+        members.setdefault(representatives[gene_tree_fp], []).append(
+            gene_tree_fp)
+    jobs = []
+    for gene_tree_fp in gene_tree_fps:
+        for method in methods:
+            if (method not in topology_tools or
+                    representatives[gene_tree_fp] == gene_tree_fp):
+                jobs.append((gene_tree_fp, method))
+    if job_costs is not None:
+        jobs.sort(key=lambda job: -job_costs(*job))
+    seconds = {}
+    jobs_dp = working_dp
+    if scratch_root is not None:
+        jobs_dp = mkdtemp(prefix="hgt_", dir=scratch_root)
+    log_archive = LogArchive(logs_fp) if logs_fp is not None else None
+
+    def _run_job(job):
+        gene_tree_fp, method = job
+        job_transfers = None
+        if transfers is not None and method in transfer_parsers:
+            job_transfers = []
+        newick = None
+        if archive is not None:
+            newick = archive.read(gene_number(gene_tree_fp))
+        start = time()
+        number_hgts = run_tool(gene_tree_fp=gene_tree_fp,
+                               species_tree=species_tree,
+                               method=method,
+                               working_dp=jobs_dp,
+                               phylonet_jar_fp=phylonet_jar_fp,
+                               jane_cli_fp=jane_cli_fp,
+                               prune_cache=prune_cache,
+                               debug=debug,
+                               log_archive=log_archive,
+                               transfers=job_transfers,
+                               newick=newick)
+        seconds[job] = time() - start
+        return job, number_hgts, job_transfers
+
+    results = dict((fp, {}) for fp in gene_tree_fps)
+    pool = ThreadPool(threads)
+    try:
+        for (gene_tree_fp, method), number_hgts, job_transfers in \
+                pool.imap_unordered(_run_job, jobs):
+            # copy results of representatives to the other members of
+            # their class
+            if method in topology_tools:
+                class_fps = members[gene_tree_fp]
+            else:
+                class_fps = [gene_tree_fp]
+            for fp in class_fps:
+                results[fp][method] = number_hgts
+                if job_transfers is not None:
+                    transfers.setdefault(fp, {})[method] = job_transfers
+                if on_result is not None:
+                    on_result(fp, method, number_hgts)
+    finally:
+        pool.close()
+        pool.join()
+        if log_archive is not None:
+            log_archive.close()
+        if scratch_root is not None and not debug:
+            rmtree(jobs_dp)
+    if timings is not None:
+        timings.extend(job + (seconds[job],) for job in jobs
+                       if job in seconds)
+    return results
+
+
+def write_observed_transfers(results,
+                             gene_tree_fps,
+                             methods,
+                             output_f):
+    """ Write the observed transfers table read by compute_accuracy
+
+    Parameters
+    ----------
+    results: dict
+        output of run_tools
+    gene_tree_fps: list of strings
+        file paths to gene trees (table rows, in order)
+    methods: list of strings
+        the methods used for HGT detection (table columns, in order)
+    output_f: file object
+        file descriptor for observed transfers
+
+    See Also
+    --------
+    compute_accuracy.parse_observed_transfers
+    """
+    writer = ObservedTransfersWriter(gene_tree_fps, methods, output_f)
+    for gene_tree_fp in gene_tree_fps:
+        for method in methods:
+            writer.add(gene_tree_fp, method, results[gene_tree_fp][method])
+
+
+def write_predicted_transfers(transfers,
+                              gene_tree_fps,
+                              methods,
+                              output_f):
+    """ Write the predicted transfers read by transfer_accuracy
+
+    Parameters
+    ----------
+    transfers: dict
+        transfers filled by run_tools
+    gene_tree_fps: list of strings
+        file paths to gene trees (in order)
+    methods: list of strings
+        the methods used for HGT detection (in order)
+    output_f: file object
+        file descriptor for predicted transfers
+
+    See Also
+    --------
+    transfer_accuracy.parse_predicted_transfers
+    """
+    output_f.write("#tool\tdonor\trecipient\tgene\n")
+    for gene_tree_fp in gene_tree_fps:
+        gene_transfers = transfers.get(gene_tree_fp, {})
+        for method in methods:
+            for donor, recipient in gene_transfers.get(method, []):
+                output_f.write("%s\t%s\t%s\t%d\n" % (
+                    tool_names[method], donor, recipient,
+                    int(gene_number(gene_tree_fp))))
+
+
+class ObservedTransfersWriter(object):
+    """ Write the observed transfers table row by row while tools run
+
+    The row of a gene tree is written and flushed as soon as the results
+    of all methods are known, rows are therefore in order of completion
+    (the first column keeps the index of the gene tree). The growing table
+    can be followed by stream_accuracy.py.
+
+    Parameters
+    ----------
+    gene_tree_fps: list of strings
+        file paths to gene trees (table rows)
+    methods: list of strings
+        the methods used for HGT detection (table columns, in order)
+    output_f: file object
+        file descriptor for observed transfers
+    """
+
+    def __init__(self, gene_tree_fps, methods, output_f):
+        self.index = dict((fp, i) for i, fp in enumerate(gene_tree_fps))
+        self.methods = methods
+        self.output_f = output_f
+        self.rows = {}
+        output_f.write("#number of HGTs detected\n")
+        output_f.write("#\tgene ID\t%s\n" % "\t".join(
+            tool_names[method] for method in methods))
+        output_f.flush()
+
+    def add(self, gene_tree_fp, method, number_hgts):
+        """ Record one result, write the row of the gene tree if complete
+
+        Parameters
+        ----------
+        gene_tree_fp: string
+            file path to gene tree
+        method: string
+            the method used for HGT detection
+        number_hgts: string
+            number of HGTs reported by the tool
+        """
+        row = self.rows.setdefault(gene_tree_fp, {})
+        row[method] = number_hgts
+        if len(row) == len(self.methods):
+            self.output_f.write("%s\t%s\t%s\n" % (
+                self.index[gene_tree_fp], gene_number(gene_tree_fp),
+                "\t".join(row[method] for method in self.methods)))
+            self.output_f.flush()
+            del self.rows[gene_tree_fp]
+
+
+@click.command()
+@click.option('--gene-tree-dir', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Directory of gene trees in Newick format')
+@click.option('--manifest-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Manifest of gene trees (see index_alf_run.py), instead '
+                   'of --gene-tree-dir')
+@click.option('--gene-tree-archive-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Archive of the gene trees (see tree_archive.py), read '
+                   'instead of the gene tree files')
+@click.option('--species-tree-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Species tree in Newick format')
+@click.option('--working-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Directory for job directories')
+@click.option('--observed-hgts-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output table of observed transfers, written row by row '
+                   'while tools run')
+@click.option('--predicted-transfers-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output donor and recipient of every transfer reported '
+                   'by T-REX and RANGER-DTL (see transfer_accuracy.py)')
+@click.option('--results-store-dp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=False),
+              help='Output results store of observed transfers')
+@click.option('--method', 'methods', required=False, multiple=True,
+              default=all_methods,
+              type=click.Choice(all_methods),
+              help='The methods to be used for HGT detection')
+@click.option('--phylonet-jar-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='PhyloNet jar (RIATA-HGT)')
+@click.option('--jane-cli-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='jane-cli.sh (Jane 4)')
+@click.option('--threads', required=False, type=int, default=1,
+              show_default=True,
+              help='Maximum number of tools running at once')
+@click.option('--prune-species-tree', 'prune_species', is_flag=True,
+              default=False,
+              help='Restrict the species tree to the species in the gene '
+                   'tree (T-REX and RIATA-HGT only)')
+@click.option('--dedup', is_flag=True, default=False,
+              help='Launch topology-only tools once per gene tree topology')
+@click.option('--debug', is_flag=True, default=False,
+              help='Keep job directories and tool output streams')
+@click.option('--ground-truth-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='logfile.txt from ALF simulations, report running '
+                   'accuracy to stderr while tools run')
+@click.option('--report-interval', required=False, type=float, default=60.0,
+              show_default=True,
+              help='Seconds between running accuracy reports')
+@click.option('--scratch-root', required=False, envvar='HGT_SCRATCH_ROOT',
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Fast local directory for job directories (ex. /dev/shm, '
+                   'default $HGT_SCRATCH_ROOT), removed once all jobs are '
+                   'done')
+@click.option('--logs-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output tar.gz of the output streams of all jobs')
+@click.option('--schedule', is_flag=True, default=False,
+              help='Launch the longest predicted jobs first (runtime model '
+                   'fitted on --timings-fp, see scheduler.py, requires '
+                   '--manifest-fp)')
+@click.option('--timings-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Past timings of jobs, timings of this run are appended')
+@click.option('--schedule-report-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output predicted and actual runtimes of jobs')
+def _main(gene_tree_dir,
+          manifest_fp,
+          gene_tree_archive_fp,
+          species_tree_fp,
+          working_dir,
+          observed_hgts_fp,
+          predicted_transfers_fp,
+          results_store_dp,
+          methods,
+          phylonet_jar_fp,
+          jane_cli_fp,
+          threads,
+          prune_species,
+          dedup,
+          debug,
+          ground_truth_fp,
+          report_interval,
+          scratch_root,
+          logs_fp,
+          schedule,
+          timings_fp,
+          schedule_report_fp):
+    """ Launch HGT tools on all gene trees and write observed transfers
+
+    Parameters
+    ----------
+    gene_tree_dir: string
+        directory path to gene trees in Newick format
+    manifest_fp: string
+        file path to manifest of gene trees (see index_alf_run.py)
+    gene_tree_archive_fp: string
+        file path to archive of the gene trees (lists the gene trees without
+        --gene-tree-dir and --manifest-fp)
+    species_tree_fp: string
+        file path to species tree in Newick format
+    working_dir: string
+        directory path for job directories
+    observed_hgts_fp: string
+        file path to output table of observed transfers
+    predicted_transfers_fp: string
+        file path to output predicted transfers (T-REX and RANGER-DTL)
+    results_store_dp: string
+        directory path to output results store of observed transfers (see
+        results_store.py)
+    methods: tuple of strings
+        the methods used for HGT detection
+    phylonet_jar_fp: string
+        file path to PhyloNet jar (RIATA-HGT)
+    jane_cli_fp: string
+        file path to jane-cli.sh (Jane 4)
+    threads: integer
+        maximum number of tools running at once
+    prune_species: boolean
+        restrict the species tree to the gene tree's species
+    dedup: boolean
+        launch topology-only tools once per gene tree topology
+    debug: boolean
+        keep job directories and tool output streams
+    ground_truth_fp: string
+        file path to logfile.txt from ALF simulation
+    report_interval: float
+        seconds between running accuracy reports
+    scratch_root: string
+        directory path on fast local storage for job directories
+    logs_fp: string
+        file path to output tar.gz of the output streams of all jobs
+    schedule: boolean
+        launch the longest predicted jobs first
+    timings_fp: string
+        file path to past timings of jobs (appended to)
+    schedule_report_fp: string
+        file path to output predicted and actual runtimes of jobs
+    """
+    if gene_tree_dir is not None and manifest_fp is not None:
+        raise click.UsageError(
+            "either --gene-tree-dir or --manifest-fp is required")
+    if (gene_tree_dir is None and manifest_fp is None and
+            gene_tree_archive_fp is None):
+        raise click.UsageError(
+            "--gene-tree-dir, --manifest-fp or --gene-tree-archive-fp is "
+            "required")
+    if observed_hgts_fp is None and results_store_dp is None:
+        raise click.UsageError(
+            "--observed-hgts-fp or --results-store-dp is required")
+    if ((schedule or timings_fp is not None or
+            schedule_report_fp is not None) and manifest_fp is None):
+        raise click.UsageError(
+            "--manifest-fp (number of leaves of the gene trees) is required "
+            "for --schedule, --timings-fp and --schedule-report-fp")
+    if 'riata-hgt' in methods and phylonet_jar_fp is None:
+        raise click.UsageError("--phylonet-jar-fp is required for riata-hgt")
+    if 'jane4' in methods and jane_cli_fp is None:
+        raise click.UsageError("--jane-cli-fp is required for jane4")
+    start_profiling('run_tools')
+    leaves = {}
+    archive = None
+    if gene_tree_archive_fp is not None:
+        from tree_archive import TreeArchive
+        archive = TreeArchive(gene_tree_archive_fp)
+    if manifest_fp is not None:
+        from index_alf_run import read_manifest
+        with open(manifest_fp, 'U') as manifest_f:
+            manifest = read_manifest(manifest_f)
+        gene_tree_fps = [entry[1] for entry in manifest]
+        leaves = dict((entry[1], entry[3]) for entry in manifest)
+    elif gene_tree_dir is not None:
+        gene_tree_fps = sorted(glob(join(gene_tree_dir, "*.nwk")))
+    else:
+        gene_tree_fps = [archive.gene_tree_fps[gene_id]
+                         for gene_id in archive.gene_ids]
+    job_costs = timings = None
+    if schedule or timings_fp is not None or schedule_report_fp is not None:
+        from scheduler import (read_timings, write_timings,
+                               fit_runtime_model, predict_runtime,
+                               write_schedule_report)
+        past_timings = []
+        if timings_fp is not None and exists(timings_fp):
+            with open(timings_fp, 'U') as timings_f:
+                past_timings = read_timings(timings_f)
+        model = fit_runtime_model(past_timings)
+
+        def job_costs(gene_tree_fp, method):
+            return predict_runtime(model, method, leaves[gene_tree_fp])
+        timings = []
+    transfers = {} if predicted_transfers_fp is not None else None
+    accumulator = writer = output_f = None
+    if ground_truth_fp is not None:
+        from compute_accuracy import parse_expected_transfers
+        from stream_accuracy import StreamingAccuracy
+        with open(ground_truth_fp, 'U') as ground_truth_f:
+            accumulator = StreamingAccuracy(
+                parse_expected_transfers(ground_truth_f),
+                output_f=sys.stderr, interval=report_interval)
+    if observed_hgts_fp is not None:
+        output_f = open(observed_hgts_fp, 'w')
+        writer = ObservedTransfersWriter(gene_tree_fps, methods, output_f)
+
+    def on_result(gene_tree_fp, method, number_hgts):
+        if accumulator is not None:
+            accumulator.update(tool_names[method], gene_number(gene_tree_fp),
+                               number_hgts)
+        if writer is not None:
+            writer.add(gene_tree_fp, method, number_hgts)
+    try:
+        results = run_tools(gene_tree_fps=gene_tree_fps,
+                            species_tree_fp=species_tree_fp,
+                            methods=methods,
+                            working_dp=working_dir,
+                            threads=threads,
+                            phylonet_jar_fp=phylonet_jar_fp,
+                            jane_cli_fp=jane_cli_fp,
+                            prune_species=prune_species,
+                            dedup=dedup,
+                            debug=debug,
+                            on_result=on_result,
+                            job_costs=job_costs if schedule else None,
+                            timings=timings,
+                            scratch_root=scratch_root,
+                            logs_fp=logs_fp,
+                            transfers=transfers,
+                            archive=archive)
+    finally:
+        if output_f is not None:
+            output_f.close()
+        if archive is not None:
+            archive.close()
+    if timings_fp is not None:
+        header = not exists(timings_fp)
+        with open(timings_fp, 'a') as timings_f:
+            write_timings([(method, fp, leaves[fp], seconds)
+                           for fp, method, seconds in timings],
+                          timings_f, header=header)
+    if schedule_report_fp is not None:
+        with open(schedule_report_fp, 'w') as report_f:
+            write_schedule_report(
+                [(method, fp, leaves[fp], job_costs(fp, method), seconds)
+                 for fp, method, seconds in timings], report_f)
+    if accumulator is not None:
+        accumulator.report(final=True)
+    if predicted_transfers_fp is not None:
+        with open(predicted_transfers_fp, 'w') as predicted_f:
+            write_predicted_transfers(transfers, gene_tree_fps, methods,
+                                      predicted_f)
+    if results_store_dp is not None:
+        from results_store import write_results_store
+        write_results_store(
+            results_store_dp,
+            [int(gene_number(fp)) for fp in gene_tree_fps],
+            [(tool_names[method], [results[fp][method]
+                                   for fp in gene_tree_fps])
+             for method in methods])
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,197 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Order (gene tree, tool) jobs by predicted runtime
+=================================================
+
+The runtime of every tool is modelled as a power law of the number of gene
+tree leaves, seconds = exp(a) * leaves^b, fitted by least squares on the
+logarithms of past timings. Jobs are dispatched longest predicted first
+(LPT) so that parallel runs do not end on a long straggler. Tools without
+timings are predicted with the median coefficients of the fitted tools, on
+the same scale (seconds) as the fitted ones.
+
+Timings are tab-separated files with one line per job:
+#method	gene tree	leaves	seconds
+jane4	/alf/GeneTrees/GeneTree1.nwk	24	3.52
+..
+"""
+
+import sys
+import click
+from math import log, exp
+
+
+timings_header = "#method\tgene tree\tleaves\tseconds\n"
+
+
+def read_timings(timings_f):
+    """ Read past timings
+
+    Parameters
+    ----------
+    timings_f: file object
+        file descriptor of timings
+
+    Returns
+    -------
+    timings: list of tuples
+        (method, gene tree file path, leaves, seconds) of every job
+    """
+    timings = []
+    for line in timings_f:
+        if line.startswith('#') or not line.strip():
+            continue
+        method, gene_tree_fp, leaves, seconds = \
+            line.rstrip('\n').split('\t')
+        timings.append((method, gene_tree_fp, int(leaves), float(seconds)))
+    return timings
+
+
+def write_timings(timings, output_f, header=True):
+    """ Write timings
+
+    Parameters
+    ----------
+    timings: list of tuples
+        (method, gene tree file path, leaves, seconds) of every job
+    output_f: file object
+        file descriptor for timings
+    header: boolean
+        write the header line (False to append to existing timings)
+    """
+    if header:
+        output_f.write(timings_header)
+    for method, gene_tree_fp, leaves, seconds in timings:
+        output_f.write("%s\t%s\t%d\t%.6f\n" % (method, gene_tree_fp, leaves,
+                                               seconds))
+
+
+def fit_runtime_model(timings):
+    """ Fit the power law runtime model of every tool
+
+    Parameters
+    ----------
+    timings: list of tuples
+        output of read_timings
+
+    Returns
+    -------
+    model: dict
+        methods (keys) and (a, b) coefficients of
+        log(seconds) = a + b * log(leaves), b is 1 if the leaves of all
+        timings of a method are equal
+    """
+    points = {}
+    for method, gene_tree_fp, leaves, seconds in timings:
+        points.setdefault(method, []).append(
+            (log(max(leaves, 1)), log(max(seconds, 1e-6))))
+    model = {}
+    for method, xy in points.items():
+        n = float(len(xy))
+        mean_x = sum(x for x, y in xy) / n
+        mean_y = sum(y for x, y in xy) / n
+        sxx = sum((x - mean_x) ** 2 for x, y in xy)
+        if sxx > 0:
+            b = sum((x - mean_x) * (y - mean_y) for x, y in xy) / sxx
+        else:
+            b = 1.0
+        model[method] = (mean_y - b * mean_x, b)
+    return model
+
+
+def predict_runtime(model, method, leaves):
+    """ Predict the runtime of a job
+
+    Parameters
+    ----------
+    model: dict
+        output of fit_runtime_model
+    method: string
+        the method used for HGT detection
+    leaves: integer
+        number of gene tree leaves
+
+    Returns
+    -------
+    seconds: float
+        predicted runtime, methods without timings use the median
+        coefficients of all fitted methods (the number of leaves if no
+        method was fitted)
+    """
+    if method in model:
+        a, b = model[method]
+    elif model:
+        a = _median([coefficients[0] for coefficients in model.values()])
+        b = _median([coefficients[1] for coefficients in model.values()])
+    else:
+        a, b = 0.0, 1.0
+    return exp(a + b * log(max(leaves, 1)))
+
+
+def _median(values):
+    """ Return the median of a non-empty list of numbers
+    """
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def write_schedule_report(records, output_f):
+    """ Compare predicted and actual runtimes
+
+    Parameters
+    ----------
+    records: list of tuples
+        (method, gene tree file path, leaves, predicted seconds, actual
+        seconds) of every job, in dispatch order
+    output_f: file object
+        file descriptor for the report
+    """
+    output_f.write("#method\tgene tree\tleaves\tpredicted seconds\t"
+                   "actual seconds\n")
+    totals = {}
+    for method, gene_tree_fp, leaves, predicted, actual in records:
+        output_f.write("%s\t%s\t%d\t%.3f\t%.3f\n" % (
+            method, gene_tree_fp, leaves, predicted, actual))
+        jobs, total_predicted, total_actual = totals.get(method, (0, 0, 0))
+        totals[method] = (jobs + 1, total_predicted + predicted,
+                          total_actual + actual)
+    output_f.write("#method\tjobs\ttotal predicted seconds\t"
+                   "total actual seconds\n")
+    for method in sorted(totals):
+        jobs, total_predicted, total_actual = totals[method]
+        output_f.write("#%s\t%d\t%.3f\t%.3f\n" % (
+            method, jobs, total_predicted, total_actual))
+
+
+@click.command()
+@click.option('--timings-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Past timings (run_tools.py --timings-fp)')
+def _main(timings_fp):
+    """ Output the runtime model fitted on past timings
+
+    Parameters
+    ----------
+    timings_fp: string
+        file path to past timings
+    """
+    with open(timings_fp, 'U') as timings_f:
+        model = fit_runtime_model(read_timings(timings_f))
+    sys.stdout.write("#method\ta\tb\n")
+    for method in sorted(model):
+        sys.stdout.write("%s\t%.4f\t%.4f\n" % ((method,) + model[method]))
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,233 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Running precision, recall and F-score while results arrive
+==========================================================
+"""
+
+import sys
+import click
+from time import time, sleep
+
+from compute_accuracy import parse_expected_transfers
+
+
+class StreamingAccuracy(object):
+    """ Update TP/FP/FN counters per tool as observed results arrive
+
+    Once every gene has been observed, the counts equal the ones of
+    compute_accuracy.compute_accuracy. While results are arriving, recall
+    is reported over the expected genes observed so far.
+
+    Parameters
+    ----------
+    expected_transfers: list of tuples
+        output of compute_accuracy.parse_expected_transfers
+    output_f: file object
+        file descriptor for running reports
+    interval: float
+        minimum seconds between running reports
+    """
+
+    def __init__(self, expected_transfers, output_f=sys.stdout,
+                 interval=60.0):
+        # gene IDs are compared as integers, see compute_accuracy
+        self.expected = set(int(tup[1]) for tup in expected_transfers)
+        self.output_f = output_f
+        self.interval = interval
+        self.tools = []
+        self.seen = {}
+        self.tp = {}
+        self.fp = {}
+        self.expected_seen = {}
+        self._last_report = time()
+
+    def update(self, tool, gene_id, number_hgts):
+        """ Count the result of one tool for one gene
+
+        Parameters
+        ----------
+        tool: string
+            tool name
+        gene_id: string or integer
+            gene ID (ex. "00001" or 1)
+        number_hgts: string or integer
+            number of HGTs detected, "NaN" if the tool did not report one
+        """
+        gene_id = int(gene_id)
+        if tool not in self.seen:
+            self.tools.append(tool)
+            self.seen[tool] = set()
+            self.tp[tool] = self.fp[tool] = self.expected_seen[tool] = 0
+        if gene_id in self.seen[tool]:
+            return
+        self.seen[tool].add(gene_id)
+        expected = gene_id in self.expected
+        if expected:
+            self.expected_seen[tool] += 1
+        if number_hgts != "NaN" and int(number_hgts) > 0:
+            if expected:
+                self.tp[tool] += 1
+            else:
+                self.fp[tool] += 1
+        if time() - self._last_report >= self.interval:
+            self.report()
+
+    def update_row(self, gene_id, tools, numbers_hgts):
+        """ Count one row of the observed transfers table
+
+        Parameters
+        ----------
+        gene_id: string
+            gene ID
+        tools: list of strings
+            tool names (table columns)
+        numbers_hgts: list of strings
+            number of HGTs detected by each tool
+        """
+        for tool, number_hgts in zip(tools, numbers_hgts):
+            self.update(tool, gene_id, number_hgts)
+
+    def accuracy(self, tool, final=False):
+        """ Return precision, recall and F-score of a tool
+
+        Parameters
+        ----------
+        tool: string
+            tool name
+        final: boolean
+            if True, compute recall over all expected genes (all genes have
+            been observed), otherwise over the expected genes observed so
+            far
+
+        Returns
+        -------
+        scores: tuple
+            (precision, recall, F-score), None for undefined scores
+        """
+        tp = self.tp[tool]
+        fn = (len(self.expected) if final else self.expected_seen[tool]) - tp
+        p = tp / float(tp + self.fp[tool]) if tp + self.fp[tool] else None
+        r = tp / float(tp + fn) if tp + fn else None
+        f = float(2 * p * r) / float(p + r) if p and r else None
+        return p, r, f
+
+    def report(self, final=False):
+        """ Output running (or final) precision, recall and F-score
+
+        Running reports are prefixed with the number of genes observed per
+        tool, the final report follows the output of compute_accuracy.
+
+        Parameters
+        ----------
+        final: boolean
+            see accuracy
+        """
+        self._last_report = time()
+        for tool in self.tools:
+            p, r, f = self.accuracy(tool, final=final)
+            if final and not (self.tp[tool] + self.fp[tool]):
+                continue
+            scores = "\t".join("NaN" if x is None else "%.2f" % x
+                               for x in (p, r, f))
+            if final:
+                self.output_f.write("%s\t%s\n" % (tool, scores))
+            else:
+                self.output_f.write("#%d genes\t%s\t%s\n" % (
+                    len(self.seen[tool]), tool, scores))
+        self.output_f.flush()
+
+
+def follow_observed_transfers(observed_hgts_f, accumulator, poll=1.0,
+                              idle_timeout=None):
+    """ Feed rows of a growing observed transfers table to an accumulator
+
+    run_tools.py --observed-hgts-fp writes and flushes the row of every
+    gene tree as soon as all its results are known (see
+    run_tools.ObservedTransfersWriter).
+
+    Parameters
+    ----------
+    observed_hgts_f: file object
+        file descriptor of observed transfers (see
+        compute_accuracy.parse_observed_transfers), possibly still written
+    accumulator: StreamingAccuracy
+        accumulator receiving the rows
+    poll: float
+        seconds between checks for new rows
+    idle_timeout: float, optional
+        stop after this many seconds without new rows, if None stop at the
+        end of the file
+    """
+    tools = []
+    partial = ""
+    idle_since = time()
+    while True:
+        line = observed_hgts_f.readline()
+        if not line or not line.endswith('\n'):
+            # end of the file or a row still being written
+            partial += line
+            if idle_timeout is None or time() - idle_since >= idle_timeout:
+                return
+            sleep(poll)
+            continue
+        line = partial + line
+        partial = ""
+        idle_since = time()
+        line = line.rstrip('\n').split('\t')
+        if line[0].startswith('#'):
+            if len(line) > 2:
+                tools = line[2:]
+            continue
+        accumulator.update_row(line[1], tools, line[2:])
+
+
+@click.command()
+@click.option('--ground-truth-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='logfile.txt from ALF simulations')
+@click.option('--observed-hgts-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Observed transfers table, followed while written by '
+                   'run_tools.py --observed-hgts-fp')
+@click.option('--interval', required=False, type=float, default=60.0,
+              show_default=True, help='Seconds between running reports')
+@click.option('--idle-timeout', required=False, type=float, default=600.0,
+              show_default=True,
+              help='Stop after this many seconds without new rows')
+def _main(ground_truth_fp,
+          observed_hgts_fp,
+          interval,
+          idle_timeout):
+    """ Report running precision, recall and F-score of a growing table
+
+    Parameters
+    ----------
+    ground_truth_fp: string
+        file path to logfile.txt from ALF simulation
+    observed_hgts_fp: string
+        file path to observed transfers table
+    interval: float
+        seconds between running reports
+    idle_timeout: float
+        seconds without new rows before the final report
+    """
+    with open(ground_truth_fp, 'U') as ground_truth_f:
+        expected_transfers = parse_expected_transfers(ground_truth_f)
+    accumulator = StreamingAccuracy(expected_transfers, interval=interval)
+    with open(observed_hgts_fp, 'U') as observed_hgts_f:
+        follow_observed_transfers(observed_hgts_f, accumulator,
+                                  idle_timeout=idle_timeout)
+    accumulator.report(final=True)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,146 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Create the parameters directories of an ALF parameter sweep
+===========================================================
+
+With --design grid, the values of every parameter option are its levels
+(full factorial design), written to the parameters files exactly as typed.
+With --design random or lhs (Latin hypercube), two values of a rate option
+are the bounds of a uniform interval, other numbers of values are levels
+sampled uniformly.
+"""
+
+import click
+
+from create_alf_params import (grid_design,
+                               random_design,
+                               latin_hypercube_design,
+                               write_sweep)
+
+
+def _check_numbers(ctx, param, values):
+    """ Check the values of a rate option are numbers, keep them as typed
+    """
+    for value in values:
+        try:
+            float(value)
+        except ValueError:
+            raise click.BadParameter("%s is not a number" % value)
+    return values
+
+
+@click.command()
+@click.option('--root-genome-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Root genome (protein sequences in FASTA format)')
+@click.option('--custom-tree-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Species tree in Newick format')
+@click.option('--sweep-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=False),
+              help='Output directory for params_* directories')
+@click.option('--design', required=False, default='grid',
+              type=click.Choice(['grid', 'random', 'lhs']),
+              show_default=True, help='Sweep design')
+@click.option('--num-points', required=False, type=int, default=16,
+              show_default=True,
+              help='Number of points of random and lhs designs')
+@click.option('--seed', required=False, type=int, default=None,
+              help='Random seed of random and lhs designs')
+@click.option('--lgt-rate', required=False, multiple=True,
+              callback=_check_numbers, default=['0.05'], show_default=True,
+              help='Rate of horizontal gene transfer')
+@click.option('--orth-rep', required=False, multiple=True,
+              callback=_check_numbers, default=['1', '0.5'],
+              show_default=True,
+              help='Proportion of orthologous replacements')
+@click.option('--gc-content-amelioration', required=False, multiple=True,
+              type=click.Choice(['False', 'True']),
+              default=['False', 'True'], show_default=True,
+              help='GC content amelioration')
+@click.option('--gene-loss-rate', required=False, multiple=True,
+              callback=_check_numbers, default=['0', '0.005'],
+              show_default=True,
+              help='Rate of gene losses')
+@click.option('--gene-dup-rate', required=False, multiple=True,
+              callback=_check_numbers, default=['0', '0.0006'],
+              show_default=True,
+              help='Rate of gene duplications')
+@click.option('--output-file-name', required=False, default='alf_params.txt',
+              show_default=True, help='Name of the parameters files')
+def _main(root_genome_fp,
+          custom_tree_fp,
+          sweep_dir,
+          design,
+          num_points,
+          seed,
+          lgt_rate,
+          orth_rep,
+          gc_content_amelioration,
+          gene_loss_rate,
+          gene_dup_rate,
+          output_file_name):
+    """ Write the parameters directories and manifest of an ALF sweep
+
+    Parameters
+    ----------
+    root_genome_fp: string
+        file path of root genome (protein sequences in FASTA format)
+    custom_tree_fp: string
+        file path to Newick tree
+    sweep_dir: string
+        output directory path
+    design: string
+        grid, random or lhs
+    num_points: integer
+        number of points of random and lhs designs
+    seed: integer
+        random seed of random and lhs designs
+    lgt_rate: tuple of strings
+        rates of horizontal gene transfer
+    orth_rep: tuple of strings
+        proportions of orthologous replacements
+    gc_content_amelioration: tuple of strings
+        GC content amelioration ('False' or 'True')
+    gene_loss_rate: tuple of strings
+        rates of gene losses
+    gene_dup_rate: tuple of strings
+        rates of gene duplications
+    output_file_name: string
+        name of the parameters files
+    """
+    specs = {'lgt_rate': list(lgt_rate),
+             'orth_rep': list(orth_rep),
+             'gc_content_amelioration': list(gc_content_amelioration),
+             'gene_loss_rate': list(gene_loss_rate),
+             'gene_dup_rate': list(gene_dup_rate)}
+    if design == 'grid':
+        points = grid_design(specs)
+    else:
+        # interval bounds are sampled as floats, levels are chosen as typed
+        for name in ('lgt_rate', 'orth_rep', 'gene_loss_rate',
+                     'gene_dup_rate'):
+            if len(specs[name]) == 2:
+                specs[name] = tuple(float(value) for value in specs[name])
+        if design == 'random':
+            points = random_design(specs, num_points, seed)
+        else:
+            points = latin_hypercube_design(specs, num_points, seed)
+    params_dps = write_sweep(points, root_genome_fp, custom_tree_fp,
+                             sweep_dir, output_file_name=output_file_name)
+    click.echo("%d parameters directories written to %s" % (
+        len(params_dps), sweep_dir))
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,146 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+import sys
+from unittest import TestCase, main
+from shutil import rmtree
+from tempfile import mkdtemp
+from os.path import join
+from StringIO import StringIO
+
+import numpy as np
+
+from hgt_analysis.compute_accuracy import (parse_expected_transfers,
+                                           parse_observed_transfers,
+                                           parse_gene_ids,
+                                           compute_accuracy,
+                                           compute_accuracy_store,
+                                           write_accuracy,
+                                           bootstrap_accuracy,
+                                           bootstrap_accuracy_tasks)
+from hgt_analysis.results_store import (load_results_store,
+                                        convert_observed_transfers)
+
+
+class computeAccuracyTests(TestCase):
+    """ Test WGS-HGT accuracy and bootstrap confidence intervals """
+
+    def setUp(self):
+        """
+        """
+        self.working_dir = mkdtemp()
+        self.stdout = sys.stdout
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        rmtree(self.working_dir)
+
+    def test_compute_accuracy_store(self):
+        """ Test the table and results store report the same accuracy
+        """
+        expected_transfers = parse_expected_transfers(StringIO(logfile))
+        sys.stdout = StringIO()
+        compute_accuracy(expected_transfers,
+                         parse_observed_transfers(StringIO(observed_padded)))
+        table = sorted(sys.stdout.getvalue().splitlines())
+        store_dp = join(self.working_dir, "store")
+        convert_observed_transfers(StringIO(observed_padded), store_dp)
+        gene_ids, columns = load_results_store(store_dp)
+        sys.stdout = StringIO()
+        compute_accuracy_store(expected_transfers, gene_ids, columns)
+        store = sorted(sys.stdout.getvalue().splitlines())
+        sys.stdout = self.stdout
+        self.assertEqual(table, store)
+        self.assertEqual(table, ["Jane 4\t0.50\t0.50\t0.50",
+                                 "RIATA-HGT\t0.00\t0.00\tNaN",
+                                 "T-REX\t1.00\t0.50\t0.67"])
+
+    def test_write_accuracy(self):
+        """ Test undefined scores are written as NaN
+        """
+        sys.stdout = StringIO()
+        write_accuracy("T-REX", 0, 3, 2)
+        write_accuracy("Jane 4", 0, 0, 2,
+                       np.array([[0.5, 1.0], [0.0, 0.5], [np.nan, np.nan]]))
+        output = sys.stdout.getvalue()
+        sys.stdout = self.stdout
+        self.assertEqual(output, "T-REX\t0.00\t0.00\tNaN\n"
+                                 "Jane 4\tNaN\t0.00\tNaN\t0.50\t1.00\t0.00\t"
+                                 "0.50\tNaN\tNaN\n")
+
+    def test_compute_accuracy_bootstrap(self):
+        """ Test bootstrap over zero-padded gene IDs and tools without TP
+        """
+        expected_transfers = parse_expected_transfers(StringIO(logfile))
+        sys.stdout = StringIO()
+        compute_accuracy(expected_transfers,
+                         parse_observed_transfers(StringIO(observed_padded)),
+                         parse_gene_ids(StringIO(observed_padded)),
+                         resamples=50, seed=0)
+        lines = sorted(sys.stdout.getvalue().splitlines())
+        sys.stdout = self.stdout
+        self.assertEqual([line.split('\t')[:4] for line in lines],
+                         [["Jane 4", "0.50", "0.50", "0.50"],
+                          ["RIATA-HGT", "0.00", "0.00", "NaN"],
+                          ["T-REX", "1.00", "0.50", "0.67"]])
+
+    def test_parse_gene_ids(self):
+        """ Test gene IDs of all rows are parsed
+        """
+        self.assertEqual(parse_gene_ids(StringIO(observed_hgts)),
+                         set(['1000', '1001', '1002']))
+
+    def test_bootstrap_accuracy(self):
+        """ Test intervals contain the point estimates
+        """
+        intervals = bootstrap_accuracy(40, 10, 20, 930, resamples=2000,
+                                       seed=0)
+        self.assertEqual(intervals.shape, (3, 2))
+        for (low, high), score in zip(intervals, (0.8, 40 / 60.0,
+                                                  2 * 0.8 * (40 / 60.0) /
+                                                  (0.8 + 40 / 60.0))):
+            self.assertTrue(low < score < high)
+        # no false positives or false negatives in any resample
+        np.testing.assert_almost_equal(
+            bootstrap_accuracy(5, 0, 0, 5, resamples=100, seed=0),
+            np.ones((3, 2)))
+
+    def test_bootstrap_accuracy_tasks(self):
+        """ Test intervals do not depend on the number of processes
+        """
+        tasks = [(40, 10, 20, 930), (5, 50, 5, 940), (0, 3, 10, 987)]
+        serial = bootstrap_accuracy_tasks(tasks, resamples=500, seed=1)
+        parallel = bootstrap_accuracy_tasks(tasks, resamples=500, seed=1,
+                                            jobs=2)
+        for a, b in zip(serial, parallel):
+            np.testing.assert_array_equal(a, b)
+        # precision and recall are 0 in all resamples, F-score undefined
+        self.assertTrue(np.isnan(serial[2][2]).all())
+
+
+observed_hgts = """#number of HGTs detected
+#\tgene ID\tT-REX\tJane 4
+0\t1000\t1\t0
+1\t1001\t0\tNaN
+2\t1002\t2\t1
+"""
+
+observed_padded = """#number of HGTs detected
+#\tgene ID\tT-REX\tJane 4\tRIATA-HGT
+0\t00001\t1\t0\t0
+1\t00002\t0\t1\tNaN
+2\t00003\t0\t1\t2
+"""
+
+logfile = """lgt from organism SE001 with gene 1 to organism SE002, now gene 11
+lgt from organism SE003 with gene 2 to organism SE001, now gene 12
+"""
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from shutil import rmtree
+from tempfile import mkdtemp
+from os import chmod, environ, pathsep
+from os.path import join
+
+from hgt_analysis.create_alf_params import (parameter_file,
+                                            compile_parameter_file,
+                                            render_parameter_file,
+                                            grid_design,
+                                            random_design,
+                                            latin_hypercube_design,
+                                            write_sweep)
+
+
+class createAlfParamsTests(TestCase):
+    """ Test WGS-HGT ALF parameter sweeps """
+
+    def setUp(self):
+        """
+        """
+        self.working_dir = mkdtemp()
+        # fake fasta2darwin of ALF
+        with open(join(self.working_dir, "fasta2darwin"), 'w') as t:
+            t.write("#!/bin/bash\ntouch $3\n")
+        chmod(join(self.working_dir, "fasta2darwin"), 0o755)
+        self.path = environ['PATH']
+        environ['PATH'] = self.working_dir + pathsep + self.path
+        self.root_genome_fp = join(self.working_dir, "root.fasta")
+        self.custom_tree_fp = join(self.working_dir, "tree.nwk")
+        self.specs = {'lgt_rate': [0.05],
+                      'orth_rep': (0.0, 1.0),
+                      'gc_content_amelioration': ['False', 'True'],
+                      'gene_loss_rate': (0.0, 0.01),
+                      'gene_dup_rate': [0, 0.0006]}
+
+    def tearDown(self):
+        environ['PATH'] = self.path
+        rmtree(self.working_dir)
+
+    def test_render_parameter_file(self):
+        """ Test all placeholders are replaced
+        """
+        values = dict((placeholder, placeholder.lower()) for placeholder in
+                      ('WORKING_DIR_PATH', 'ORGANISM.db', 'CUSTOM_TREE.nwk',
+                       'LGT_RATE', 'ORTHREP', 'UUID', 'GENEDUPLRATE',
+                       'GENELOSSRATE'))
+        p = render_parameter_file(compile_parameter_file(parameter_file),
+                                  values, 'True')
+        expected = parameter_file
+        for placeholder, value in values.items():
+            expected = expected.replace(placeholder, value)
+        self.assertEqual(p, expected + "targetFreqs := ['Random'];\n")
+
+    def test_grid_design(self):
+        """ Test the grid follows the loops of test_1_simulate_genomes.sh
+        """
+        design = grid_design({'lgt_rate': [0.05],
+                              'orth_rep': [1, 0.5],
+                              'gc_content_amelioration': ['False', 'True'],
+                              'gene_loss_rate': [0, 0.005],
+                              'gene_dup_rate': [0, 0.0006]})
+        self.assertEqual(len(design), 16)
+        self.assertEqual(design[1], {'lgt_rate': 0.05,
+                                     'orth_rep': 1,
+                                     'gc_content_amelioration': 'False',
+                                     'gene_loss_rate': 0,
+                                     'gene_dup_rate': 0.0006})
+        self.assertEqual(design[8]['orth_rep'], 0.5)
+
+    def test_latin_hypercube_design(self):
+        """ Test every stratum of every parameter is sampled once
+        """
+        design = latin_hypercube_design(self.specs, 10, seed=0)
+        self.assertEqual(sorted(int(point['orth_rep'] * 10)
+                                for point in design), list(range(10)))
+        self.assertEqual(sorted(int(point['gene_loss_rate'] * 1000)
+                                for point in design), list(range(10)))
+        self.assertEqual(sorted(point['gc_content_amelioration']
+                                for point in design), ['False'] * 5 +
+                         ['True'] * 5)
+        self.assertEqual(design, latin_hypercube_design(self.specs, 10,
+                                                        seed=0))
+
+    def test_write_sweep_grid(self):
+        """ Test grid levels are written as typed on the command line
+        """
+        design = grid_design({'lgt_rate': ['0.05'],
+                              'orth_rep': ['1'],
+                              'gc_content_amelioration': ['False'],
+                              'gene_loss_rate': ['0'],
+                              'gene_dup_rate': ['0.0006']})
+        sweep_dir = join(self.working_dir, "sweep")
+        write_sweep(design, self.root_genome_fp, self.custom_tree_fp,
+                    sweep_dir)
+        with open(join(sweep_dir, "params_0", "alf_params.txt"), 'U') as t:
+            self.assertTrue("orthRep := 1;" in t.read())
+        with open(join(sweep_dir, "params_0", "parameters_summary.txt"),
+                  'U') as t:
+            t.readline()
+            self.assertEqual(t.readline(), "0\t0.0006\t1\tFalse\n")
+
+    def test_write_sweep(self):
+        """ Test parameters directories, summaries and manifest
+        """
+        design = random_design(self.specs, 3, seed=1)
+        design[0]['orth_rep'] = 0.5
+        sweep_dir = join(self.working_dir, "sweep")
+        params_dps = write_sweep(design, self.root_genome_fp,
+                                 self.custom_tree_fp, sweep_dir)
+        self.assertEqual(params_dps, [join(sweep_dir, "params_%d" % i)
+                                      for i in range(3)])
+        with open(join(sweep_dir, "params_0", "alf_params.txt"), 'U') as t:
+            p = t.read()
+        self.assertTrue("mname := params_0;" in p)
+        self.assertTrue("orthRep := 0.5;" in p)
+        self.assertTrue("realorganism := '%s'" % join(sweep_dir,
+                                                      "root.fasta.db") in p)
+        with open(join(sweep_dir, "params_0", "parameters_summary.txt"),
+                  'U') as t:
+            self.assertEqual(t.readline(), summary_header)
+            self.assertEqual(t.readline().split('\t')[2], "0.5")
+        with open(join(sweep_dir, "sweep_manifest.txt"), 'U') as t:
+            lines = t.readlines()
+        self.assertEqual(lines[0], manifest_header)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1].split('\t')[:3], ["params_0", "0.05", "0.5"])
+        # random draws are written with all their digits
+        self.assertEqual(float(lines[2].split('\t')[2]), design[1]['orth_rep'])
+        with open(join(sweep_dir, "params_1", "alf_params.txt"), 'U') as t:
+            self.assertTrue(
+                "orthRep := %r;" % design[1]['orth_rep'] in t.read())
+
+
+summary_header = ("p(gene loss)\tp(gene duplication)\t"
+                  "p(orthologous gene replacement)\tGC content amelioration\n")
+
+manifest_header = ("#params\tlgt_rate\torth_rep\tgc_content_amelioration\t"
+                   "gene_loss_rate\tgene_dup_rate\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from shutil import rmtree
+from tempfile import mkdtemp
+from os.path import join
+from StringIO import StringIO
+
+from skbio import TreeNode
+
+from hgt_analysis.dedup_gene_trees import (gene_number,
+                                           canonical_topology,
+                                           topology_classes,
+                                           fan_out_results)
+
+
+class dedupGeneTreesTests(TestCase):
+    """ Test WGS-HGT gene tree deduplication functions """
+
+    def setUp(self):
+        """
+        """
+        self.working_dir = mkdtemp()
+        self.gene_tree_fps = []
+        for name, tree in [("GeneTree00001.nwk", gene_tree_1),
+                           ("GeneTree00002.nwk", gene_tree_2),
+                           ("GeneTree00003.nwk", gene_tree_3)]:
+            gene_tree_fp = join(self.working_dir, name)
+            with open(gene_tree_fp, 'w') as t:
+                t.write(tree)
+            self.gene_tree_fps.append(gene_tree_fp)
+
+    def tearDown(self):
+        rmtree(self.working_dir)
+
+    def test_gene_number(self):
+        """ Test gene number extraction from gene tree file name
+        """
+        self.assertEqual(gene_number("/a/b/GeneTree01623.nwk"), "01623")
+
+    def test_canonical_topology(self):
+        """ Test canonical topology ignores branch lengths, gene names and
+            order of children
+        """
+        tree_1 = TreeNode.read([gene_tree_1])
+        tree_2 = TreeNode.read([gene_tree_2])
+        tree_3 = TreeNode.read([gene_tree_3])
+        self.assertEqual(canonical_topology(tree_1),
+                         "(((SE001,SE002),SE003),SE004);")
+        self.assertEqual(canonical_topology(tree_1),
+                         canonical_topology(tree_2))
+        self.assertNotEqual(canonical_topology(tree_1),
+                            canonical_topology(tree_3))
+
+    def test_topology_classes(self):
+        """ Test grouping gene trees by topology
+        """
+        classes_exp = [(self.gene_tree_fps[0], self.gene_tree_fps[0]),
+                       (self.gene_tree_fps[1], self.gene_tree_fps[0]),
+                       (self.gene_tree_fps[2], self.gene_tree_fps[2])]
+        self.assertEqual(topology_classes(self.gene_tree_fps), classes_exp)
+        # gene trees streamed from an archive are grouped the same way
+        newicks = iter([gene_tree_1, gene_tree_2, gene_tree_3])
+        self.assertEqual(topology_classes(self.gene_tree_fps, newicks),
+                         classes_exp)
+
+    def test_fan_out_results(self):
+        """ Test copying results of representatives to member genes
+        """
+        classes = topology_classes(self.gene_tree_fps)
+        observed_hgts_f = StringIO(observed_hgts)
+        output_f = StringIO()
+        fan_out_results(observed_hgts_f, classes, output_f)
+        self.assertEqual(output_f.getvalue(), observed_hgts_exp)
+        # only topology-only tools are copied from a table of all genes
+        output_f = StringIO()
+        fan_out_results(StringIO(observed_hgts_all), classes, output_f,
+                        tools=["T-REX", "Jane 4"])
+        self.assertEqual(output_f.getvalue(), observed_hgts_all_exp)
+
+
+# 4 species
+gene_tree_1 = """(((SE001_00001:1.0,SE002_00001:1.0):0.5,SE003_00001:1.5):0.2,SE004_00001:1.7);"""
+# topology of gene_tree_1 with rotated children and other branch lengths
+gene_tree_2 = """(SE004_00002:0.3,(SE003_00002:0.7,(SE002_00002:0.1,SE001_00002:0.9):0.4):0.2);"""
+# different topology
+gene_tree_3 = """(((SE001_00003:1.0,SE003_00003:1.0):0.5,SE002_00003:1.5):0.2,SE004_00003:1.7);"""
+# observed transfers of representative genes
+observed_hgts = """#number of HGTs detected
+#\tgene ID\tT-REX\tRIATA-HGT\tJane 4
+0\t00001\t1\t0\t2
+1\t00003\t0\t0\t1
+"""
+observed_hgts_exp = """#number of HGTs detected
+#\tgene ID\tT-REX\tRIATA-HGT\tJane 4
+0\t00001\t1\t0\t2
+1\t00002\t1\t0\t2
+2\t00003\t0\t0\t1
+"""
+# observed transfers of all genes (launch_software.sh)
+observed_hgts_all = """#number of HGTs detected
+#\tgene ID\tT-REX\tRANGER-DTL\tJane 4
+0\t00001\t1\t3\t2
+1\t00002\tNaN\t4\tNaN
+2\t00003\t0\t5\t1
+"""
+observed_hgts_all_exp = """#number of HGTs detected
+#\tgene ID\tT-REX\tRANGER-DTL\tJane 4
+0\t00001\t1\t3\t2
+1\t00002\t1\t4\t2
+2\t00003\t0\t5\t1
+"""
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from shutil import rmtree
+from tempfile import mkdtemp
+from os import mkdir
+from os.path import join
+from StringIO import StringIO
+
+from hgt_analysis.index_alf_run import (index_alf_run,
+                                        sort_by_cost,
+                                        write_manifest,
+                                        read_manifest)
+from hgt_analysis.tree_archive import pack_gene_trees
+
+
+class indexAlfRunTests(TestCase):
+    """ Test WGS-HGT ALF run manifest """
+
+    def setUp(self):
+        """
+        """
+        self.working_dir = mkdtemp()
+        self.gene_tree_dir = join(self.working_dir, "GeneTrees")
+        self.gene_msa_dir = join(self.working_dir, "MSA")
+        mkdir(self.gene_tree_dir)
+        mkdir(self.gene_msa_dir)
+        for gene_id, tree in (("1", gene_tree_1), ("2", gene_tree_2)):
+            with open(join(self.gene_tree_dir, "GeneTree%s.nwk" % gene_id),
+                      'w') as tree_f:
+                tree_f.write(tree)
+        with open(join(self.gene_msa_dir, "MSA_1_aa.fa"), 'w') as msa_f:
+            msa_f.write(gene_msa_1)
+
+    def tearDown(self):
+        rmtree(self.working_dir)
+
+    def test_index_alf_run(self):
+        """ Test gene numbers, paths, leaves, lengths and sizes are indexed
+        """
+        manifest = index_alf_run(self.gene_tree_dir, self.gene_msa_dir)
+        self.assertEqual(manifest, [
+            ("1", join(self.gene_tree_dir, "GeneTree1.nwk"),
+             join(self.gene_msa_dir, "MSA_1_aa.fa"), 3, 12, 41, 54, None),
+            ("2", join(self.gene_tree_dir, "GeneTree2.nwk"),
+             join(self.gene_msa_dir, "MSA_2_aa.fa"), 4, None, 55, None,
+             None)])
+        self.assertEqual([entry[0] for entry in sort_by_cost(manifest)],
+                         ["2", "1"])
+        manifest_f = StringIO()
+        write_manifest(manifest, manifest_f)
+        self.assertTrue(manifest_f.getvalue().endswith(
+            "\t4\tNaN\t55\tNaN\tNaN\n"))
+        manifest_f.seek(0)
+        self.assertEqual(read_manifest(manifest_f), manifest)
+
+    def test_index_alf_run_archive(self):
+        """ Test gene trees are indexed from their archive
+        """
+        gene_tree_fps = [join(self.gene_tree_dir, "GeneTree%s.nwk" % gene_id)
+                         for gene_id in ("1", "2")]
+        archive_fp = join(self.working_dir, "GeneTrees.nwka")
+        pack_gene_trees(gene_tree_fps, archive_fp)
+        manifest = index_alf_run(self.gene_tree_dir, self.gene_msa_dir,
+                                 archive_fp)
+        self.assertEqual(manifest, [
+            ("1", gene_tree_fps[0], join(self.gene_msa_dir, "MSA_1_aa.fa"),
+             3, 12, 41, 54, 0),
+            ("2", gene_tree_fps[1], join(self.gene_msa_dir, "MSA_2_aa.fa"),
+             4, None, 55, None, 41)])
+
+
+gene_tree_1 = """((SE001/00001,SE002/00001),SE003/00001);
+"""
+
+gene_tree_2 = """(((SE001/00002,SE002/00002),SE003/00002),SE004/00002);
+"""
+
+gene_msa_1 = """>SE001/00001
+MKLVA
+GTRLA
+AA
+>SE002/00001
+MKLVAGTRLAAA
+"""
+
+
+if __name__ == '__main__':
+    main()
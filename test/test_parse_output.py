@@ -0,0 +1,56 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from StringIO import StringIO
+
+from hgt_analysis.parse_output import (parse_trex,
+                                       parse_rangerdtl,
+                                       parse_trex_transfers,
+                                       parse_rangerdtl_transfers)
+
+
+class parseOutputTests(TestCase):
+    """ Test WGS-HGT output parsing functions """
+
+    def test_parse_trex_transfers(self):
+        """ Test donor and recipient subtrees of T-REX HGTs
+        """
+        self.assertEqual(parse_trex(StringIO(trex_output)), "2")
+        self.assertEqual(parse_trex_transfers(StringIO(trex_output)),
+                         [("SE001", "SE004"), ("SE002,SE003", "SE005")])
+
+    def test_parse_rangerdtl_transfers(self):
+        """ Test donor and recipient species of RANGER-DTL transfers
+        """
+        self.assertEqual(parse_rangerdtl(StringIO(rangerdtl_output)), "2")
+        self.assertEqual(parse_rangerdtl_transfers(StringIO(rangerdtl_output)),
+                         [("SE001", "SE003"), ("n2", "SE004")])
+
+
+trex_output = """hgt : number of HGT(s) found = 2
+| HGT 1 / 2 Regular
+| From subtree (SE001) to subtree (SE004)
+| HGT 2 / 2 Regular
+| From subtree (SE002, SE003) to subtree (SE005)
+"""
+
+rangerdtl_output = """The minimum reconciliation cost is: 7 (Duplications: 0, \
+Transfers: 2, Losses: 1)
+Reconciliation:
+SE001_00001: Leaf Node
+m1 = LCA[SE001_00001, SE003_00001]: Transfer, Mapping --> SE001, \
+Recipient --> SE003
+m2 = LCA[SE002_00001, SE004_00001]: Transfer, Mapping --> n2, \
+Recipient --> SE004
+m3 = LCA[SE001_00001, SE004_00001]: Speciation, Mapping --> n1
+"""
+
+
+if __name__ == '__main__':
+    main()
@@ -18,7 +18,8 @@ from skbio import TreeNode, Alignment
 
 from hgt_analysis.reformat_input import (join_trees,
                                          trim_gene_tree_leaves,
-                                         species_gene_mapping)
+                                         species_gene_mapping,
+                                         prune_species_tree)
 
 
 class workflowTests(TestCase):
@@ -139,6 +140,37 @@ class workflowTests(TestCase):
                           gene_tree=gene_tree_3,
                           species_tree=species_tree)
 
+    def test_prune_species_tree(self):
+        """ Test restricting the species tree to the gene tree species
+        """
+        species_tree = TreeNode.read(self.species_tree_fp, format='newick')
+        gene_tree_3 = TreeNode.read(self.gene_tree_3_fp, format='newick')
+        cache = {}
+        pruned_tree = prune_species_tree(gene_tree_3, species_tree, cache)
+        leaves_exp = ["SE001", "SE002", "SE003", "SE004", "SE005", "SE006",
+                      "SE008", "SE009", "SE010"]
+        leaves_obs = [node.name for node in pruned_tree.tips()]
+        self.assertTrue(self.compare_lists(leaves_exp, leaves_obs))
+        # single child node left by removing SE007 is collapsed
+        for node in pruned_tree.non_tips(include_self=True):
+            self.assertEqual(len(node.children), 2)
+        # original species tree is unchanged
+        self.assertEqual(len(list(species_tree.tips())), 10)
+        self.assertEqual(len(cache), 1)
+        # cached tree is reused for the same set of species
+        gene_tree_3 = TreeNode.read(self.gene_tree_3_fp, format='newick')
+        pruned_tree_2 = prune_species_tree(gene_tree_3, species_tree, cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(str(pruned_tree), str(pruned_tree_2))
+
+    def test_prune_species_tree_all_species(self):
+        """ Test species tree is kept whole when all species have genes
+        """
+        species_tree = TreeNode.read(self.species_tree_fp, format='newick')
+        gene_tree_1 = TreeNode.read(self.gene_tree_1_fp, format='newick')
+        pruned_tree = prune_species_tree(gene_tree_1, species_tree)
+        self.assertEqual(str(species_tree), str(pruned_tree))
+
 
 # 10 species
 species_tree = """(((((((SE001:2.1494877,SE010:1.08661):3.7761166,SE008:0.86305436):0.21024487,(SE006:0.56704221,SE009:0.5014676):0.90294223):0.20542323,SE005:3.0992506):0.37145632,SE004:1.8129133):0.72933621,SE003:1.737411):0.24447835,(SE002:1.6606127,SE007:0.70000178):1.6331374):1.594016;"""
@@ -0,0 +1,57 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from shutil import rmtree
+from tempfile import mkdtemp
+from os.path import join
+from StringIO import StringIO
+
+import numpy as np
+import numpy.testing as npt
+
+from hgt_analysis.results_store import (load_results_store,
+                                        convert_observed_transfers)
+
+
+class resultsStoreTests(TestCase):
+    """ Test WGS-HGT results store """
+
+    def setUp(self):
+        """
+        """
+        self.working_dir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.working_dir)
+
+    def test_convert_observed_transfers(self):
+        """ Test converting observed transfers table to results store
+        """
+        store_dp = join(self.working_dir, "store")
+        convert_observed_transfers(StringIO(observed_hgts), store_dp)
+        gene_ids, columns = load_results_store(store_dp)
+        self.assertTrue(isinstance(gene_ids, np.memmap))
+        npt.assert_equal(gene_ids, [1000, 1001, 1002])
+        self.assertEqual([tool for tool, counts in columns],
+                         ["T-REX", "RANGER-DTL", "Jane 4"])
+        npt.assert_equal(columns[0][1], [1, 0, 2])
+        npt.assert_equal(columns[1][1], [0, 0, 1])
+        npt.assert_equal(columns[2][1], [3, -1, 0])
+
+
+observed_hgts = """#number of HGTs detected
+#\tgene ID\tT-REX\tRANGER-DTL\tJane 4
+0\t1000\t1\t0\t3
+1\t1001\t0\t0\tNaN
+2\t1002\t2\t1\t0
+"""
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from tarfile import open as open_tar
+from shutil import rmtree
+from tempfile import mkdtemp
+from os import chmod, listdir, environ, pathsep, remove
+from os.path import join
+from StringIO import StringIO
+
+from hgt_analysis.run_tools import (run_tools,
+                                    write_observed_transfers,
+                                    write_predicted_transfers,
+                                    ObservedTransfersWriter)
+from hgt_analysis.tree_archive import pack_gene_trees, TreeArchive
+
+
+class runToolsTests(TestCase):
+    """ Test WGS-HGT tool runner """
+
+    def setUp(self):
+        """
+        """
+        self.working_dir = mkdtemp()
+        self.species_tree_fp = join(self.working_dir, "species.nwk")
+        with open(self.species_tree_fp, 'w') as t:
+            t.write(species_tree)
+        self.gene_tree_fps = []
+        for name, tree in [("GeneTree00001.nwk", gene_tree_1),
+                           ("GeneTree00002.nwk", gene_tree_2)]:
+            gene_tree_fp = join(self.working_dir, name)
+            with open(gene_tree_fp, 'w') as t:
+                t.write(tree)
+            self.gene_tree_fps.append(gene_tree_fp)
+        # fake Jane 4 reporting the number of gene tree leaves
+        self.jane_cli_fp = join(self.working_dir, "jane-cli.sh")
+        with open(self.jane_cli_fp, 'w') as t:
+            t.write(jane_cli)
+        chmod(self.jane_cli_fp, 0o755)
+        # fake RANGER-DTL reporting one transfer
+        with open(join(self.working_dir, "ranger-dtl-U.linux"), 'w') as t:
+            t.write(rangerdtl)
+        chmod(join(self.working_dir, "ranger-dtl-U.linux"), 0o755)
+        self.path = environ['PATH']
+        environ['PATH'] = self.working_dir + pathsep + self.path
+        self.jobs_dir = mkdtemp(dir=self.working_dir)
+
+    def tearDown(self):
+        environ['PATH'] = self.path
+        rmtree(self.working_dir)
+
+    def test_run_tools(self):
+        """ Test launching a tool and parsing its standard output
+        """
+        results = run_tools(gene_tree_fps=self.gene_tree_fps,
+                            species_tree_fp=self.species_tree_fp,
+                            methods=['jane4'],
+                            working_dp=self.jobs_dir,
+                            threads=2,
+                            jane_cli_fp=self.jane_cli_fp)
+        self.assertEqual(results, {self.gene_tree_fps[0]: {'jane4': '4'},
+                                   self.gene_tree_fps[1]: {'jane4': '3'}})
+        # job directories are removed
+        self.assertEqual(listdir(self.jobs_dir), [])
+        output_f = StringIO()
+        write_observed_transfers(
+            results, self.gene_tree_fps, ['jane4'], output_f)
+        self.assertEqual(output_f.getvalue(), observed_hgts_exp)
+
+    def test_run_tools_archive(self):
+        """ Test gene trees are read from their archive only
+        """
+        archive_fp = join(self.working_dir, "GeneTrees.nwka")
+        pack_gene_trees(self.gene_tree_fps, archive_fp)
+        for gene_tree_fp in self.gene_tree_fps:
+            remove(gene_tree_fp)
+        with TreeArchive(archive_fp) as archive:
+            results = run_tools(gene_tree_fps=self.gene_tree_fps,
+                                species_tree_fp=self.species_tree_fp,
+                                methods=['jane4'],
+                                working_dp=self.jobs_dir,
+                                jane_cli_fp=self.jane_cli_fp,
+                                archive=archive)
+        self.assertEqual(results, {self.gene_tree_fps[0]: {'jane4': '4'},
+                                   self.gene_tree_fps[1]: {'jane4': '3'}})
+
+    def test_run_tools_dedup(self):
+        """ Test topology-only tools are launched once per topology
+        """
+        gene_tree_fp = join(self.working_dir, "GeneTree00003.nwk")
+        with open(gene_tree_fp, 'w') as t:
+            t.write(gene_tree_1)
+        self.gene_tree_fps.append(gene_tree_fp)
+        results = run_tools(gene_tree_fps=self.gene_tree_fps,
+                            species_tree_fp=self.species_tree_fp,
+                            methods=['jane4'],
+                            working_dp=self.jobs_dir,
+                            jane_cli_fp=self.jane_cli_fp,
+                            dedup=True,
+                            debug=True)
+        self.assertEqual(results[gene_tree_fp], {'jane4': '4'})
+        # debug keeps one job directory per launched job
+        self.assertEqual(len(listdir(self.jobs_dir)), 2)
+
+    def test_run_tools_job_costs(self):
+        """ Test jobs are dispatched longest predicted first and timed
+        """
+        costs = {self.gene_tree_fps[0]: 1.0, self.gene_tree_fps[1]: 2.0}
+        timings = []
+        run_tools(gene_tree_fps=self.gene_tree_fps,
+                  species_tree_fp=self.species_tree_fp,
+                  methods=['jane4'],
+                  working_dp=self.jobs_dir,
+                  jane_cli_fp=self.jane_cli_fp,
+                  job_costs=lambda fp, method: costs[fp],
+                  timings=timings)
+        self.assertEqual([timing[:2] for timing in timings],
+                         [(self.gene_tree_fps[1], 'jane4'),
+                          (self.gene_tree_fps[0], 'jane4')])
+        self.assertTrue(all(timing[2] > 0 for timing in timings))
+
+    def test_run_tools_transfers(self):
+        """ Test donor and recipient of transfers are parsed per gene tree
+        """
+        transfers = {}
+        results = run_tools(gene_tree_fps=self.gene_tree_fps,
+                            species_tree_fp=self.species_tree_fp,
+                            methods=['ranger-dtl', 'jane4'],
+                            working_dp=self.jobs_dir,
+                            jane_cli_fp=self.jane_cli_fp,
+                            transfers=transfers)
+        self.assertEqual(results[self.gene_tree_fps[1]]['ranger-dtl'], '1')
+        self.assertEqual(transfers[self.gene_tree_fps[1]],
+                         {'ranger-dtl': [('SE001', 'SE003')]})
+        output_f = StringIO()
+        write_predicted_transfers(transfers, self.gene_tree_fps,
+                                  ['ranger-dtl', 'jane4'], output_f)
+        self.assertEqual(output_f.getvalue(), predicted_transfers_exp)
+
+    def test_observed_transfers_writer(self):
+        """ Test rows are written as soon as all their results are known
+        """
+        output_f = StringIO()
+        writer = ObservedTransfersWriter(self.gene_tree_fps,
+                                         ['trex', 'jane4'], output_f)
+        writer.add(self.gene_tree_fps[0], 'jane4', '4')
+        writer.add(self.gene_tree_fps[1], 'jane4', '3')
+        self.assertEqual(output_f.getvalue().count('\n'), 2)
+        writer.add(self.gene_tree_fps[1], 'trex', 'NaN')
+        self.assertTrue(output_f.getvalue().endswith("1\t00002\tNaN\t3\n"))
+        writer.add(self.gene_tree_fps[0], 'trex', '1')
+        self.assertTrue(output_f.getvalue().endswith("0\t00001\t1\t4\n"))
+
+    def test_run_tools_scratch(self):
+        """ Test jobs run under the scratch root and their logs are collected
+        """
+        scratch_dir = mkdtemp(dir=self.working_dir)
+        logs_fp = join(self.working_dir, "logs.tar.gz")
+        results = run_tools(gene_tree_fps=self.gene_tree_fps,
+                            species_tree_fp=self.species_tree_fp,
+                            methods=['jane4'],
+                            working_dp=self.jobs_dir,
+                            threads=2,
+                            jane_cli_fp=self.jane_cli_fp,
+                            scratch_root=scratch_dir,
+                            logs_fp=logs_fp)
+        self.assertEqual(results, {self.gene_tree_fps[0]: {'jane4': '4'},
+                                   self.gene_tree_fps[1]: {'jane4': '3'}})
+        self.assertEqual(listdir(scratch_dir), [])
+        self.assertEqual(listdir(self.jobs_dir), [])
+        # one directory per job with its output streams
+        with open_tar(logs_fp) as tar:
+            names = sorted(tar.getnames())
+            stdout = tar.extractfile(names[1]).read()
+        self.assertEqual(len(names), 4)
+        self.assertTrue(names[0].startswith("jane4_00001_"))
+        self.assertTrue(names[1].endswith("/stdout.txt"))
+        self.assertEqual(stdout, b"Jane 4 (fake)\nHost Switch: 4\n")
+
+
+species_tree = """(((SE001:1.0,SE002:1.0):0.5,SE003:1.5):0.2,SE004:1.7);"""
+gene_tree_1 = """(((SE001_00001:1.0,SE002_00001:1.0):0.5,SE003_00001:1.5):0.2,SE004_00001:1.7);"""
+gene_tree_2 = """((SE001_00002:1.0,SE002_00002:1.0):0.5,SE003_00002:1.5);"""
+jane_cli = """#!/bin/sh
+echo "Jane 4 (fake)"
+echo "Host Switch: $(grep 'tree parasite' $1 | grep -o 'SE00[0-9]_' | wc -l | tr -d ' ')"
+"""
+rangerdtl = """#!/bin/sh
+echo "The minimum reconciliation cost is: 4 (Duplications: 0, Transfers: 1, \
+Losses: 1)"
+echo "m1 = LCA[SE001_1, SE003_1]: Transfer, Mapping --> SE001, \
+Recipient --> SE003"
+"""
+predicted_transfers_exp = """#tool\tdonor\trecipient\tgene
+RANGER-DTL\tSE001\tSE003\t1
+RANGER-DTL\tSE001\tSE003\t2
+"""
+observed_hgts_exp = """#number of HGTs detected
+#\tgene ID\tJane 4
+0\t00001\t4
+1\t00002\t3
+"""
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from StringIO import StringIO
+from math import exp, log
+
+from hgt_analysis.scheduler import (read_timings,
+                                    write_timings,
+                                    fit_runtime_model,
+                                    predict_runtime,
+                                    write_schedule_report)
+
+
+class schedulerTests(TestCase):
+    """ Test WGS-HGT runtime model and schedule report """
+
+    def test_timings(self):
+        """ Test timings are written and read back
+        """
+        timings = [('jane4', '/alf/GeneTree1.nwk', 10, 2.5),
+                   ('trex', '/alf/GeneTree1.nwk', 10, 0.125)]
+        timings_f = StringIO()
+        write_timings(timings, timings_f)
+        timings_f.seek(0)
+        self.assertEqual(read_timings(timings_f), timings)
+
+    def test_fit_runtime_model(self):
+        """ Test power laws are recovered and unknown methods use the median
+            coefficients
+        """
+        timings = [('jane4', 'fp', leaves, 0.01 * leaves ** 2)
+                   for leaves in (10, 20, 40, 80)]
+        timings += [('trex', 'fp', 50, 0.5), ('trex', 'fp', 50, 1.5)]
+        model = fit_runtime_model(timings)
+        self.assertAlmostEqual(model['jane4'][1], 2.0)
+        self.assertAlmostEqual(predict_runtime(model, 'jane4', 100), 100.0)
+        # a single tree size only gives the mean (of logarithms)
+        self.assertAlmostEqual(model['trex'][1], 1.0)
+        self.assertAlmostEqual(predict_runtime(model, 'trex', 50),
+                               (0.5 * 1.5) ** 0.5)
+        a = (model['jane4'][0] + model['trex'][0]) / 2
+        self.assertAlmostEqual(predict_runtime(model, 'riata-hgt', 30),
+                               exp(a + 1.5 * log(30)))
+        # without any timings, jobs are ordered by leaves
+        self.assertAlmostEqual(predict_runtime({}, 'riata-hgt', 30), 30.0)
+
+    def test_write_schedule_report(self):
+        """ Test predicted and actual runtimes per job and method
+        """
+        output_f = StringIO()
+        write_schedule_report([('jane4', 'fp1', 20, 4.0, 5.0),
+                               ('trex', 'fp1', 20, 1.0, 0.5),
+                               ('jane4', 'fp2', 10, 1.0, 1.5)], output_f)
+        self.assertEqual(output_f.getvalue(), report_exp)
+
+
+report_exp = """#method\tgene tree\tleaves\tpredicted seconds\tactual seconds
+jane4\tfp1\t20\t4.000\t5.000
+trex\tfp1\t20\t1.000\t0.500
+jane4\tfp2\t10\t1.000\t1.500
+#method\tjobs\ttotal predicted seconds\ttotal actual seconds
+#jane4\t2\t5.000\t6.500
+#trex\t1\t1.000\t0.500
+"""
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from StringIO import StringIO
+
+from hgt_analysis.compute_accuracy import parse_expected_transfers
+from hgt_analysis.stream_accuracy import (StreamingAccuracy,
+                                          follow_observed_transfers)
+
+
+class streamAccuracyTests(TestCase):
+    """ Test WGS-HGT streaming accuracy accumulator """
+
+    def setUp(self):
+        """
+        """
+        self.expected_transfers = parse_expected_transfers(
+            StringIO(logfile))
+
+    def test_update(self):
+        """ Test running and final accuracy of results arriving per gene
+        """
+        output_f = StringIO()
+        accumulator = StreamingAccuracy(self.expected_transfers,
+                                        output_f=output_f, interval=3600)
+        accumulator.update('T-REX', '1', '2')
+        accumulator.update('T-REX', '4', '1')
+        # repeated results of a gene are counted once
+        accumulator.update('T-REX', '4', '1')
+        accumulator.report()
+        accumulator.update('T-REX', '2', 'NaN')
+        accumulator.update('T-REX', '3', '0')
+        accumulator.report(final=True)
+        self.assertEqual(output_f.getvalue(), report_exp)
+        self.assertEqual(accumulator.tp['T-REX'], 1)
+        self.assertEqual(accumulator.fp['T-REX'], 1)
+
+    def test_follow_observed_transfers(self):
+        """ Test rows of an observed transfers table are counted per tool
+        """
+        output_f = StringIO()
+        accumulator = StreamingAccuracy(self.expected_transfers,
+                                        output_f=output_f, interval=3600)
+        follow_observed_transfers(StringIO(observed_hgts), accumulator)
+        accumulator.report(final=True)
+        self.assertEqual(output_f.getvalue(), final_exp)
+
+
+logfile = """lgt from organism SE001 with gene 1 to organism SE002, now gene 11
+lgt from organism SE003 with gene 2 to organism SE001, now gene 12
+lgt from organism SE002 with gene 3 to organism SE004, now gene 13
+"""
+
+observed_hgts = """#number of HGTs detected
+#\tgene ID\tT-REX\tJane 4
+0\t00001\t1\t0
+1\t00002\t1\tNaN
+2\t00004\t0\t2
+3\t00005\t3\t0
+"""
+
+report_exp = """#2 genes\tT-REX\t0.50\t1.00\t0.67
+T-REX\t0.50\t0.33\t0.40
+"""
+
+final_exp = """T-REX\t0.67\t0.67\t0.67
+Jane 4\t0.00\t0.00\tNaN
+"""
+
+
+if __name__ == '__main__':
+    main()
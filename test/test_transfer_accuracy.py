@@ -0,0 +1,64 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from StringIO import StringIO
+
+from hgt_analysis.transfer_accuracy import (parse_predicted_transfers,
+                                            transfer_keys,
+                                            compute_transfer_accuracy,
+                                            write_transfer_accuracy)
+
+
+class transferAccuracyTests(TestCase):
+    """ Test WGS-HGT transfer-level evaluation """
+
+    def test_transfer_keys(self):
+        """ Test keys are equal if and only if all fields are equal
+        """
+        keys = transfer_keys([['SE001', 'SE001', 'SE002', 'SE001'],
+                              ['SE002', 'SE002', 'SE001', 'SE002'],
+                              [1, 2, 1, 1]])
+        self.assertEqual(keys[0], keys[3])
+        self.assertEqual(len(set(keys[:3])), 3)
+
+    def test_compute_transfer_accuracy(self):
+        """ Test transfers match on replicate, donor, recipient and gene
+        """
+        expected_transfers = [(0, 'SE001', 'SE002', 1),
+                              (0, 'SE003', 'SE001', 2),
+                              (1, 'SE001', 'SE002', 1)]
+        predicted_transfers = [
+            (tup[0], 0, tup[1], tup[2], int(tup[3]))
+            for tup in parse_predicted_transfers(StringIO(predicted))]
+        # same transfer in another replicate
+        predicted_transfers.append(('Jane 4', 1, 'SE003', 'SE001', 2))
+        accuracy = compute_transfer_accuracy(expected_transfers,
+                                             predicted_transfers)
+        self.assertEqual(accuracy, [('Jane 4', 0, 1, 3),
+                                    ('T-REX', 2, 1, 1)])
+        output_f = StringIO()
+        write_transfer_accuracy(accuracy, output_f)
+        self.assertEqual(output_f.getvalue(), accuracy_exp)
+
+
+predicted = """#tool\tdonor\trecipient\tgene
+T-REX\tSE001\tSE002\t1
+T-REX\tSE003\tSE001\t2
+T-REX\tSE001\tSE002\t0001
+T-REX\tSE002\tSE001\t1
+"""
+
+accuracy_exp = """#tool\tTP\tFP\tFN\tprecision\trecall\tF-score
+Jane 4\t0\t1\t3\t0.00\t0.00\tNaN
+T-REX\t2\t1\t1\t0.67\t0.67\t0.67
+"""
+
+
+if __name__ == '__main__':
+    main()
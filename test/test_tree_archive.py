@@ -0,0 +1,89 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase, main
+from shutil import rmtree
+from tempfile import mkdtemp
+from os.path import join
+
+from hgt_analysis.tree_archive import (clean_newick,
+                                       pack_gene_trees,
+                                       read_archived_newick,
+                                       TreeArchive)
+
+
+class treeArchiveTests(TestCase):
+    """ Test WGS-HGT packed gene tree archive """
+
+    def setUp(self):
+        """
+        """
+        self.working_dir = mkdtemp()
+        self.gene_tree_fps = []
+        for gene_id, tree in (("1", gene_tree_1), ("2", gene_tree_2),
+                              ("10", gene_tree_10)):
+            gene_tree_fp = join(self.working_dir, "GeneTree%s.nwk" % gene_id)
+            with open(gene_tree_fp, 'w') as tree_f:
+                tree_f.write(tree)
+            self.gene_tree_fps.append(gene_tree_fp)
+        self.archive_fp = join(self.working_dir, "GeneTrees.nwka")
+
+    def tearDown(self):
+        rmtree(self.working_dir)
+
+    def test_clean_newick(self):
+        """ Test ALF gene trees are cleaned as by the sed commands
+        """
+        self.assertEqual(clean_newick(gene_tree_1), gene_tree_1_exp)
+
+    def test_pack_gene_trees(self):
+        """ Test random access and streaming of packed trees
+        """
+        self.assertEqual(pack_gene_trees(self.gene_tree_fps, self.archive_fp),
+                         3)
+        with TreeArchive(self.archive_fp) as archive:
+            self.assertEqual(len(archive), 3)
+            self.assertEqual(archive.gene_ids, ["1", "2", "10"])
+            self.assertEqual(archive.read("10"), "%s\n" % gene_tree_10)
+            self.assertEqual(archive.read("1"), "%s\n" % gene_tree_1_exp)
+            self.assertEqual(archive.gene_tree_fps["2"],
+                             self.gene_tree_fps[1])
+            offset, size = archive.index["2"]
+            self.assertEqual(list(archive), [
+                ("1", "%s\n" % gene_tree_1_exp),
+                ("2", gene_tree_2),
+                ("10", "%s\n" % gene_tree_10)])
+        self.assertEqual(read_archived_newick(self.archive_fp, offset, size),
+                         gene_tree_2)
+        with open(self.gene_tree_fps[0], 'U') as tree_f:
+            self.assertEqual(tree_f.read(), "%s\n" % gene_tree_1_exp)
+
+    def test_pack_gene_trees_keep_files(self):
+        """ Test gene tree files are kept without clean_files
+        """
+        pack_gene_trees(self.gene_tree_fps, self.archive_fp,
+                        clean_files=False)
+        with open(self.gene_tree_fps[0], 'U') as tree_f:
+            self.assertEqual(tree_f.read(), gene_tree_1)
+
+
+gene_tree_1 = """((SE001/00001[&&NHX:D=N]:0.1,SE002/00001:0.2):0.3,SE003/00001:0.4);
+
+"""
+
+gene_tree_1_exp = \
+    "((SE001_00001:0.1,SE002_00001:0.2):0.3,SE003_00001:0.4);"
+
+gene_tree_2 = """((SE001_00002,SE002_00002),SE003_00002);
+"""
+
+gene_tree_10 = "(SE001_00010,SE002_00010);"
+
+
+if __name__ == '__main__':
+    main()
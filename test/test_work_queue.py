@@ -0,0 +1,201 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+import sys
+import json
+from unittest import TestCase, main
+from shutil import rmtree
+from tempfile import mkdtemp
+from multiprocessing import Process
+from os import listdir, utime, makedirs, rename
+from os.path import join, basename
+from threading import Timer
+from time import time
+from StringIO import StringIO
+
+from hgt_analysis.tree_archive import pack_gene_trees
+from hgt_analysis.work_queue import (alf_jobs,
+                                     enqueue_jobs,
+                                     claim_job,
+                                     reclaim_stale_jobs,
+                                     run_worker,
+                                     merge_results,
+                                     write_merged_results)
+
+
+def fake_job(job):
+    """ Report the gene number as the number of HGTs """
+    return str(int(job['gene_tree_fp'][-9:-4]))
+
+
+def failing_job(job):
+    """ Fail on gene 2 """
+    if job['gene_tree_fp'].endswith("00002.nwk"):
+        raise ValueError("gene 2")
+    return fake_job(job)
+
+
+class workQueueTests(TestCase):
+    """ Test WGS-HGT shared-filesystem work queue """
+
+    def setUp(self):
+        """
+        """
+        self.queue_dir = mkdtemp()
+        self.jobs = [{'params': "params_%d" % i,
+                      'gene_tree_fp': "/alf/GeneTree%05d.nwk" % j,
+                      'method': method}
+                     for i in range(2) for j in range(1, 6)
+                     for method in ('trex', 'jane4')]
+
+    def tearDown(self):
+        rmtree(self.queue_dir)
+
+    def test_workers(self):
+        """ Test several worker processes sharing one queue
+        """
+        self.assertEqual(enqueue_jobs(self.queue_dir, self.jobs), 20)
+        workers = [Process(target=run_worker,
+                           args=(self.queue_dir, fake_job),
+                           kwargs={'worker_id': "worker%d" % i,
+                                   'poll': 0.1})
+                   for i in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(listdir(join(self.queue_dir, "pending")), [])
+        self.assertEqual(listdir(join(self.queue_dir, "claimed")), [])
+        self.assertEqual(len(listdir(join(self.queue_dir, "done"))), 20)
+        results = merge_results(self.queue_dir)
+        self.assertEqual(sorted(results), ["params_0", "params_1"])
+        self.assertEqual(results["params_1"]["/alf/GeneTree00003.nwk"],
+                         {'trex': '3', 'jane4': '3'})
+        output_dir = join(self.queue_dir, "merged")
+        write_merged_results(results, output_dir)
+        with open(join(output_dir, "params_0_observed_hgts.txt"), 'U') as t:
+            self.assertEqual(t.read(), observed_hgts_exp)
+
+    def test_reclaim_stale_jobs(self):
+        """ Test claims without heartbeat are moved back to pending
+        """
+        enqueue_jobs(self.queue_dir, self.jobs[:2])
+        pending = sorted(listdir(join(self.queue_dir, "pending")))
+        claimed_fp = claim_job(self.queue_dir, "worker0")
+        self.assertEqual(len(listdir(join(self.queue_dir, "pending"))), 1)
+        self.assertEqual(reclaim_stale_jobs(self.queue_dir, 60), 0)
+        utime(claimed_fp, (time() - 120, time() - 120))
+        self.assertEqual(reclaim_stale_jobs(self.queue_dir, 60), 1)
+        self.assertEqual(sorted(listdir(join(self.queue_dir, "pending"))),
+                         pending)
+        # stale on every attempt
+        utime(claim_job(self.queue_dir, "worker1"),
+              (time() - 120, time() - 120))
+        self.assertEqual(reclaim_stale_jobs(self.queue_dir, 60,
+                                            max_attempts=2), 1)
+        self.assertEqual(listdir(join(self.queue_dir, "failed")),
+                         [pending[0]])
+
+    def test_enqueue_jobs(self):
+        """ Test job files of several enqueues have distinct names
+        """
+        enqueue_jobs(self.queue_dir, self.jobs[:2])
+        enqueue_jobs(self.queue_dir, self.jobs[2:4])
+        pending = sorted(listdir(join(self.queue_dir, "pending")))
+        self.assertEqual(len(pending), 4)
+        jobs = []
+        for job_file in pending:
+            with open(join(self.queue_dir, "pending", job_file), 'U') as t:
+                jobs.append(json.load(t))
+        self.assertEqual(jobs, self.jobs[:4])
+
+    def test_failing_jobs(self):
+        """ Test failing jobs are retried and then moved to failed
+        """
+        enqueue_jobs(self.queue_dir, self.jobs[:10])
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            self.assertEqual(run_worker(self.queue_dir, failing_job,
+                                        worker_id="worker0",
+                                        max_attempts=2), 8)
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        self.assertEqual(errors.count("ValueError: gene 2"), 4)
+        self.assertEqual(listdir(join(self.queue_dir, "pending")), [])
+        self.assertEqual(listdir(join(self.queue_dir, "claimed")), [])
+        self.assertEqual(len(listdir(join(self.queue_dir, "done"))), 8)
+        failed = listdir(join(self.queue_dir, "failed"))
+        self.assertEqual(len(failed), 2)
+        with open(join(self.queue_dir, "failed", failed[0]), 'U') as t:
+            job = json.load(t)
+        self.assertEqual(job['attempts'], 2)
+        self.assertTrue("ValueError: gene 2" in job['error'])
+
+    def test_worker_waits_for_release(self):
+        """ Test workers wait for jobs being released by other workers
+        """
+        enqueue_jobs(self.queue_dir, self.jobs[:2])
+        pending_dir = join(self.queue_dir, "pending")
+        tmp_fps = []
+        for worker_id in ("worker1", "worker2"):
+            claimed_fp = claim_job(self.queue_dir, worker_id)
+            tmp_fps.append(join(pending_dir,
+                                ".%s.tmp" % basename(claimed_fp)))
+            rename(claimed_fp, tmp_fps[-1])
+        # the release of worker1 completes while worker0 polls
+        job_file = basename(tmp_fps[0])[1:].split('.json.')[0] + '.json'
+        Timer(0.3, rename, (tmp_fps[0], join(pending_dir, job_file))).start()
+        # worker2 died during its release
+        utime(tmp_fps[1], (time() - 120, time() - 120))
+        self.assertEqual(run_worker(self.queue_dir, fake_job,
+                                    worker_id="worker0", timeout=60,
+                                    poll=0.1), 2)
+        self.assertEqual(listdir(pending_dir), [])
+        self.assertEqual(len(listdir(join(self.queue_dir, "done"))), 2)
+
+    def test_alf_jobs_archive(self):
+        """ Test jobs locate their gene tree in the packed archive
+        """
+        gene_tree_dir = join(self.queue_dir, "params_0", "params_0",
+                             "GeneTrees")
+        makedirs(gene_tree_dir)
+        gene_tree_fps = []
+        for gene_id, tree in (("1", "(SE001/00001,SE002/00001);\n"),
+                              ("2", "(SE001/00002,SE003/00002);\n")):
+            gene_tree_fp = join(gene_tree_dir, "GeneTree%s.nwk" % gene_id)
+            with open(gene_tree_fp, 'w') as t:
+                t.write(tree)
+            gene_tree_fps.append(gene_tree_fp)
+        archive_fp = join(self.queue_dir, "params_0", "params_0",
+                          "GeneTrees.nwka")
+        pack_gene_trees(gene_tree_fps, archive_fp)
+        jobs = alf_jobs(self.queue_dir, "species.nwk", ['trex'])
+        self.assertEqual(jobs[1], {'params': "params_0",
+                                   'gene_tree_fp': gene_tree_fps[1],
+                                   'species_tree_fp': "species.nwk",
+                                   'method': 'trex',
+                                   'gene_tree_archive_fp': archive_fp,
+                                   'gene_tree_offset': 27,
+                                   'gene_tree_bytes': 27})
+
+
+observed_hgts_exp = """#number of HGTs detected
+#\tgene ID\tT-REX\tJane 4
+0\t00001\t1\t1
+1\t00002\t2\t2
+2\t00003\t3\t3
+3\t00004\t4\t4
+4\t00005\t5\t5
+"""
+
+
+if __name__ == '__main__':
+    main()
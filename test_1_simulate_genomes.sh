@@ -28,54 +28,38 @@ if [ ! -d "${working_dir}" ]; then
     mkdir $working_dir
 fi
 
-i=0
 echo "Begin simulation .."
-for orth_rep in "${orth_rep_a[@]}"
+# write params_i/alf_params.txt and params_i/parameters_summary.txt for every
+# combination of parameters, the values of each params_i are listed in
+# sweep_manifest.txt
+python $scripts_dir/sweep_alf_params.py --root-genome-fp ${root_genome_fp} \
+                                        --custom-tree-fp ${custom_tree_fp} \
+                                        --sweep-dir ${working_dir} \
+                                        --design grid \
+                                        --output-file-name ${alf_params} \
+                                        --lgt-rate ${lgt_rate} \
+                                        $(printf -- "--orth-rep %s " "${orth_rep_a[@]}") \
+                                        $(printf -- "--gc-content-amelioration %s " "${gc_cont_am_a[@]}") \
+                                        $(printf -- "--gene-loss-rate %s " "${gene_loss_rate_a[@]}") \
+                                        $(printf -- "--gene-dup-rate %s " "${gene_dup_rate_a[@]}")
+
+while IFS=$'\t' read -u 3 params lgt_rate orth_rep gc_cont_am gene_loss_rate gene_dup_rate
 do
     echo -e "\tlgt rate: ${lgt_rate}"
     echo -e "\torth_rep: ${orth_rep}"
-    for gc_cont_am in "${gc_cont_am_a[@]}"
-    do
-        echo -e "\tgc_content: ${gc_cont_am}"
-        for gene_loss_rate in "${gene_loss_rate_a[@]}"
-        do
-            echo -e "\tgene loss rate: ${gene_loss_rate}"
-            for gene_dup_rate in "${gene_dup_rate_a[@]}"
-            do
-                echo -e "\tgene duplication rate: ${gene_dup_rate}"
-                echo -e "\toutput directory: ${working_dir}/params_$i"
-                if [ ! -d "${working_dir}/params_$i" ]; then
-                    mkdir ${working_dir}/"params_$i"
-                fi
-                python $scripts_dir/create_alf_params.py ${root_genome_fp} \
-                                                         ${custom_tree_fp} \
-                                                         ${working_dir}/"params_$i" \
-                                                         ${alf_params} \
-                                                         ${lgt_rate} \
-                                                         ${orth_rep} \
-                                                         ${gc_cont_am} \
-                                                         ${gene_loss_rate} \
-                                                         ${gene_dup_rate} \
-                                                         "params_$i"
-
-                printf "p(gene loss)\tp(gene duplication)\tp(orthologous gene replacement)\tGC content amelioration\n" > ${working_dir}/"params_$i"/"parameters_summary.txt"
-                printf "${gene_loss_rate}\t${gene_dup_rate}\t${orth_rep}\t${gc_cont_am}\n" >> ${working_dir}/"params_$i"/"parameters_summary.txt"
-                # launch ALF
-                echo -e "\tRunning ALF .."
-                (cd ${working_dir}/"params_$i"; alfsim "./alf_params.txt" 1>$stdout 2>$stderr)
+    echo -e "\tgc_content: ${gc_cont_am}"
+    echo -e "\tgene loss rate: ${gene_loss_rate}"
+    echo -e "\tgene duplication rate: ${gene_dup_rate}"
+    echo -e "\toutput directory: ${working_dir}/${params}"
+    # launch ALF
+    echo -e "\tRunning ALF .."
+    (cd ${working_dir}/${params}; alfsim "./${alf_params}" 1>$stdout 2>$stderr)
 
-                # format the ALF genes tree (Newick) to replace '/' with '_' and
-                # remove the "[&&NHX:D=N]" tags
-                echo -e "Cleaning Newick files .."
-                for file in ${working_dir}/"params_$i"/"params_$i"/GeneTrees/*.nwk;
-                do
-                    sed -i "s/\//\_/g" $file
-                    sed -i "s/\[&&NHX:D=N\]//g" $file
-                    # remove empty lines
-                    sed -i "/^$/d" $file
-                done 
-                i=$((i+1))
-            done
-        done
-    done
-done
+    # format the ALF genes tree (Newick) to replace '/' with '_' and
+    # remove the "[&&NHX:D=N]" tags, in a single pass packing the
+    # cleaned trees into GeneTrees.nwka (indexed by gene number) and
+    # rewriting the gene tree files for the tools reading them
+    echo -e "Cleaning and packing Newick files .."
+    python $scripts_dir/tree_archive.py --gene-tree-dir ${working_dir}/${params}/${params}/GeneTrees \
+                                        --archive-fp ${working_dir}/${params}/${params}/GeneTrees.nwka
+done 3< <(grep -v '^#' ${working_dir}/sweep_manifest.txt)
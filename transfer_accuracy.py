@@ -0,0 +1,190 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Transfer-level precision and recall on (donor, recipient, gene) keys
+====================================================================
+
+compute_accuracy.py evaluates the donated genes only. Here a predicted
+transfer is a true positive if the same donor organism, recipient organism
+and donated gene are found among the expected transfers of the same
+replicate (ALF run).
+
+Key fields are dictionary-encoded to integers and combined into one int64
+key per transfer, expected and predicted transfers are then joined on the
+sorted keys with NumPy.
+
+Predicted transfers are read from tab-separated files with one transfer per
+line, written by run_tools.py --predicted-transfers-fp for the tools
+reporting donors and recipients (T-REX and RANGER-DTL):
+#tool	donor	recipient	gene
+T-REX	SE001	SE004	1623
+..
+"""
+
+import sys
+import click
+
+import numpy as np
+
+from compute_accuracy import parse_expected_transfers
+
+
+def parse_predicted_transfers(predicted_f):
+    """ Parse predicted transfers of all tools
+
+    Parameters
+    ----------
+    predicted_f: file object
+        file descriptor of predicted transfers (tool, donor organism,
+        recipient organism, donated gene)
+
+    Returns
+    -------
+    predicted_transfers: list of tuples
+        list of (tool, donor, recipient, gene) tuples
+    """
+    predicted_transfers = []
+    for line in predicted_f:
+        if line.startswith('#') or not line.strip():
+            continue
+        predicted_transfers.append(tuple(line.rstrip('\n').split('\t')[:4]))
+    return predicted_transfers
+
+
+def transfer_keys(fields):
+    """ Dictionary-encode key fields into one integer key per row
+
+    Parameters
+    ----------
+    fields: list of array_like
+        values of every key field, all of the same length
+
+    Returns
+    -------
+    keys: numpy.ndarray
+        int64 keys, equal if and only if all fields are equal
+    """
+    keys = np.zeros(len(fields[0]), dtype=np.int64)
+    for values in fields:
+        labels, codes = np.unique(np.asarray(values), return_inverse=True)
+        # re-encode densely so that keys stay below the number of rows
+        keys = np.unique(keys * labels.size + codes.ravel(),
+                         return_inverse=True)[1].ravel().astype(np.int64)
+    return keys
+
+
+def compute_transfer_accuracy(expected_transfers,
+                              predicted_transfers):
+    """ Count true positive, false positive and false negative transfers
+
+    Parameters
+    ----------
+    expected_transfers: list of tuples
+        list of (replicate, donor, recipient, gene) tuples
+    predicted_transfers: list of tuples
+        list of (tool, replicate, donor, recipient, gene) tuples
+
+    Returns
+    -------
+    accuracy: list of tuples
+        (tool, tp, fp, fn) for every tool, sorted by tool name
+    """
+    num_expected = len(expected_transfers)
+    if not predicted_transfers:
+        return []
+    fields = [[tup[i] for tup in expected_transfers] +
+              [tup[i + 1] for tup in predicted_transfers]
+              for i in range(4)]
+    keys = transfer_keys(fields)
+    expected_keys = np.unique(keys[:num_expected])
+    tools, tool_codes = np.unique(
+        np.asarray([tup[0] for tup in predicted_transfers]),
+        return_inverse=True)
+    # unique (tool, transfer) pairs, a transfer predicted twice by the same
+    # tool is counted once
+    num_keys = int(keys.max()) + 1
+    pairs = np.unique(tool_codes.ravel().astype(np.int64) * num_keys +
+                      keys[num_expected:])
+    pair_tools = pairs // num_keys
+    hits = np.in1d(pairs % num_keys, expected_keys)
+    predicted = np.bincount(pair_tools, minlength=tools.size)
+    tp = np.bincount(pair_tools[hits], minlength=tools.size)
+    return [(str(tool), int(tp[i]), int(predicted[i] - tp[i]),
+             int(expected_keys.size - tp[i]))
+            for i, tool in enumerate(tools)]
+
+
+def write_transfer_accuracy(accuracy, output_f):
+    """ Output transfer-level precision, recall and F-score of every tool
+
+    Parameters
+    ----------
+    accuracy: list of tuples
+        output of compute_transfer_accuracy
+    output_f: file object
+        file descriptor for the report
+    """
+    output_f.write("#tool\tTP\tFP\tFN\tprecision\trecall\tF-score\n")
+    for tool, tp, fp, fn in accuracy:
+        p = tp / float(tp + fp) if tp + fp else None
+        r = tp / float(tp + fn) if tp + fn else None
+        f = float(2 * p * r) / float(p + r) if p and r else None
+        output_f.write("%s\t%d\t%d\t%d\t%s\n" % (
+            tool, tp, fp, fn, "\t".join("NaN" if x is None else "%.2f" % x
+                                        for x in (p, r, f))))
+
+
+@click.command()
+@click.option('--ground-truth-fp', 'ground_truth_fps', required=True,
+              multiple=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='logfile.txt from ALF simulations, once per replicate')
+@click.option('--predicted-transfers-fp', 'predicted_transfers_fps',
+              required=True, multiple=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Predicted transfers (run_tools.py '
+                   '--predicted-transfers-fp), once per replicate (in the '
+                   'order of --ground-truth-fp)')
+def _main(ground_truth_fps,
+          predicted_transfers_fps):
+    """ Compute transfer-level precision, recall and F-score per tool
+
+    Parameters
+    ----------
+    ground_truth_fps: tuple of strings
+        file paths to logfile.txt from ALF simulations
+    predicted_transfers_fps: tuple of strings
+        file paths to predicted transfers of the same replicates
+    """
+    if len(ground_truth_fps) != len(predicted_transfers_fps):
+        raise click.UsageError(
+            "--ground-truth-fp and --predicted-transfers-fp must be given "
+            "once per replicate")
+    expected_transfers = []
+    predicted_transfers = []
+    for replicate, (ground_truth_fp, predicted_transfers_fp) in enumerate(
+            zip(ground_truth_fps, predicted_transfers_fps)):
+        with open(ground_truth_fp, 'U') as ground_truth_f:
+            # (organism donor, gene donated, organism recipient, ..)
+            expected_transfers.extend(
+                (replicate, tup[0], tup[2], int(tup[1]))
+                for tup in parse_expected_transfers(ground_truth_f))
+        with open(predicted_transfers_fp, 'U') as predicted_f:
+            predicted_transfers.extend(
+                (tup[0], replicate, tup[1], tup[2], int(tup[3]))
+                for tup in parse_predicted_transfers(predicted_f))
+    write_transfer_accuracy(
+        compute_transfer_accuracy(expected_transfers, predicted_transfers),
+        sys.stdout)
+
+
+if __name__ == "__main__":
+    _main()
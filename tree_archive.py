@@ -0,0 +1,260 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Packed archive of the gene trees of an ALF run
+==============================================
+
+All gene trees of GeneTrees/ are stored in one file, one Newick tree per
+line, next to a tab-separated index of byte offsets (<archive>.idx):
+#gene number	offset	bytes	gene tree
+1	0	412	/alf/GeneTrees/GeneTree1.nwk
+2	412	388	/alf/GeneTrees/GeneTree2.nwk
+..
+
+Trees are cleaned while packing ('/' is replaced with '_', "[&&NHX:D=N]"
+tags and empty lines are removed). The cleaned trees are also written back
+to the gene tree files that change (unless --no-clean-files), so that the
+readers of the files (ex. run_tools.py --gene-tree-dir, launch_software.sh
+without archive) get the same trees as the readers of the archive.
+
+The index is read once per run (index_alf_run.py and dedup_gene_trees.py
+stream the whole archive in order, run_tools.py keeps it in memory). The
+manifest of index_alf_run.py records the offset and size of every tree, so
+that a single tree is read with one seek (read_archived_newick,
+reformat_input.py --gene-tree-offset) without loading the index.
+"""
+
+import click
+import threading
+from glob import glob
+from os.path import join
+
+from dedup_gene_trees import gene_number
+
+
+def clean_newick(newick):
+    """ Clean an ALF gene tree
+
+    Parameters
+    ----------
+    newick: string
+        gene tree in Newick format
+
+    Returns
+    -------
+    newick: string
+        gene tree on a single line, with '/' replaced with '_' and without
+        "[&&NHX:D=N]" tags
+    """
+    newick = newick.replace('/', '_').replace('[&&NHX:D=N]', '')
+    return ''.join(line.strip() for line in newick.splitlines())
+
+
+def pack_gene_trees(gene_tree_fps, archive_fp, clean=True,
+                    clean_files=True):
+    """ Pack gene trees into an archive and write its index
+
+    Parameters
+    ----------
+    gene_tree_fps: list of strings
+        file paths to gene trees in Newick format
+    archive_fp: string
+        file path to output archive (index written to archive_fp.idx)
+    clean: boolean
+        clean trees (see clean_newick), otherwise only join their lines
+    clean_files: boolean
+        also rewrite cleaned trees to their files (the files already clean
+        are not written)
+
+    Returns
+    -------
+    num_trees: integer
+        number of packed trees
+    """
+    offset = 0
+    with open(archive_fp, 'wb') as archive_f:
+        with open("%s.idx" % archive_fp, 'w') as index_f:
+            index_f.write("#gene number\toffset\tbytes\tgene tree\n")
+            for gene_tree_fp in gene_tree_fps:
+                with open(gene_tree_fp, 'U') as gene_tree_f:
+                    newick = gene_tree_f.read()
+                if clean:
+                    cleaned = clean_newick(newick)
+                    if clean_files and "%s\n" % cleaned != newick:
+                        with open(gene_tree_fp, 'w') as gene_tree_f:
+                            gene_tree_f.write("%s\n" % cleaned)
+                    newick = cleaned
+                else:
+                    newick = ''.join(newick.splitlines())
+                data = ("%s\n" % newick).encode('ascii')
+                archive_f.write(data)
+                index_f.write("%s\t%d\t%d\t%s\n" % (
+                    gene_number(gene_tree_fp), offset, len(data),
+                    gene_tree_fp))
+                offset += len(data)
+    return len(gene_tree_fps)
+
+
+def read_archived_newick(archive_fp, offset, size):
+    """ Return one gene tree of an archive without reading its index
+
+    Parameters
+    ----------
+    archive_fp: string
+        file path to archive written by pack_gene_trees
+    offset: integer
+        byte offset of the gene tree (see index_alf_run manifest)
+    size: integer
+        number of bytes of the gene tree
+
+    Returns
+    -------
+    newick: string
+        gene tree in Newick format (one line)
+    """
+    with open(archive_fp, 'rb') as archive_f:
+        archive_f.seek(offset)
+        return _decode(archive_f.read(size))
+
+
+class TreeArchive(object):
+    """ Random access to the gene trees of an archive
+
+    The index is read once, read and read_tree can be called from several
+    threads.
+
+    Parameters
+    ----------
+    archive_fp: string
+        file path to archive written by pack_gene_trees
+    """
+
+    def __init__(self, archive_fp):
+        self.archive_fp = archive_fp
+        self.gene_ids = []
+        self.index = {}
+        self.gene_tree_fps = {}
+        with open("%s.idx" % archive_fp, 'U') as index_f:
+            for line in index_f:
+                if line.startswith('#'):
+                    continue
+                entry = line.rstrip('\n').split('\t')
+                gene_id = entry[0]
+                self.gene_ids.append(gene_id)
+                self.index[gene_id] = (int(entry[1]), int(entry[2]))
+                self.gene_tree_fps[gene_id] = entry[3]
+        self._archive_f = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.gene_ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """ Close the archive file
+        """
+        if self._archive_f is not None:
+            self._archive_f.close()
+            self._archive_f = None
+
+    def read(self, gene_id):
+        """ Return a gene tree with a single seek
+
+        Parameters
+        ----------
+        gene_id: string
+            gene number (see dedup_gene_trees.gene_number)
+
+        Returns
+        -------
+        newick: string
+            gene tree in Newick format (one line)
+        """
+        offset, size = self.index[gene_id]
+        with self._lock:
+            if self._archive_f is None:
+                self._archive_f = open(self.archive_fp, 'rb')
+            self._archive_f.seek(offset)
+            return _decode(self._archive_f.read(size))
+
+    def read_tree(self, gene_id):
+        """ Return a gene tree as a TreeNode
+
+        Parameters
+        ----------
+        gene_id: string
+            gene number (see dedup_gene_trees.gene_number)
+
+        Returns
+        -------
+        gene_tree: skbio.TreeNode
+            gene tree
+        """
+        from skbio import TreeNode
+        return TreeNode.read([self.read(gene_id)], format='newick')
+
+    def __iter__(self):
+        """ Stream (gene number, Newick tree) of all trees in archive order
+
+        The archive is read sequentially, ex. to index or group all gene
+        trees (see index_alf_run.py and dedup_gene_trees.py).
+        """
+        with open(self.archive_fp, 'rb') as archive_f:
+            for gene_id in self.gene_ids:
+                yield gene_id, _decode(archive_f.readline())
+
+
+def _decode(data):
+    """ Return archive bytes as a string (str on Python 2 and 3)
+    """
+    return data if isinstance(data, str) else data.decode('ascii')
+
+
+@click.command()
+@click.option('--gene-tree-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Directory of gene trees in Newick format')
+@click.option('--archive-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=True),
+              help='Output archive (index written to <archive-fp>.idx)')
+@click.option('--clean/--no-clean', default=True, show_default=True,
+              help='Clean gene trees while packing')
+@click.option('--clean-files/--no-clean-files', default=True,
+              show_default=True,
+              help='Also rewrite cleaned gene trees to their files')
+def _main(gene_tree_dir,
+          archive_fp,
+          clean,
+          clean_files):
+    """ Pack the gene trees of a directory into an archive
+
+    Parameters
+    ----------
+    gene_tree_dir: string
+        directory path to gene trees in Newick format
+    archive_fp: string
+        file path to output archive
+    clean: boolean
+        clean trees while packing
+    clean_files: boolean
+        also rewrite cleaned trees to their files
+    """
+    pack_gene_trees(sorted(glob(join(gene_tree_dir, "*.nwk"))), archive_fp,
+                    clean=clean, clean_files=clean_files)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,577 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2015--, The WGS-HGT Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""
+Shared-filesystem work queue for distributing HGT tool jobs across nodes
+========================================================================
+
+The queue is a directory on a filesystem shared by all nodes:
+
+pending/
+    one JSON file per job (params, gene tree, species tree, method), named
+    <time>-<hostname>-<pid>-<counter>.json by the enqueuing process
+claimed/
+    jobs being processed, claimed by renaming pending/<job> to
+    claimed/<job>.<worker ID>; the worker refreshes the modification time
+    of the claimed file (heartbeat) and claims whose heartbeat is older
+    than the timeout are moved back to pending/
+done/
+    finished jobs
+failed/
+    jobs whose job function raised an error or whose claim went stale on
+    every one of max_attempts attempts, with the last error
+results/
+    one shard per worker, tab separated lines of
+    params, gene tree file path, method, number of HGTs
+
+Renaming a file within a filesystem is atomic, only one worker can claim a
+job. A job reclaimed from a slow worker may finish twice, merge_results
+keeps the first result.
+"""
+
+import sys
+import json
+import click
+import threading
+from glob import glob
+from itertools import count
+from socket import gethostname
+from os import makedirs, rename, listdir, getpid, utime, fsync
+from os.path import join, isdir, basename, getmtime, exists
+from traceback import format_exc
+from time import time, sleep
+from functools import partial
+
+from run_tools import all_methods, write_observed_transfers
+from tree_archive import TreeArchive, read_archived_newick
+
+
+queue_subdirs = ("pending", "claimed", "done", "failed", "results")
+
+# job numbers of this process, job files of different enqueuing processes
+# (or hosts) never have the same name
+_job_numbers = count()
+
+
+def create_queue(queue_dp):
+    """ Create the directories of a queue (if missing)
+
+    Parameters
+    ----------
+    queue_dp: string
+        directory path of the queue
+    """
+    for subdir in queue_subdirs:
+        if not isdir(join(queue_dp, subdir)):
+            makedirs(join(queue_dp, subdir))
+
+
+def enqueue_jobs(queue_dp, jobs):
+    """ Add jobs to the queue
+
+    Parameters
+    ----------
+    queue_dp: string
+        directory path of the queue
+    jobs: list of dicts
+        jobs with keys params, gene_tree_fp and method (and any keys needed
+        by the job function)
+
+    Returns
+    -------
+    num_jobs: integer
+        number of jobs added
+    """
+    create_queue(queue_dp)
+    # jobs are claimed in the order of their names, oldest enqueued first
+    prefix = "%010d-%s-%d" % (time(), gethostname(), getpid())
+    for job in jobs:
+        job_file = "%s-%08d.json" % (prefix, next(_job_numbers))
+        # write under a temporary name so workers never see partial jobs
+        tmp_fp = join(queue_dp, "pending", ".%s.tmp" % job_file)
+        with open(tmp_fp, 'w') as job_f:
+            json.dump(job, job_f)
+        rename(tmp_fp, join(queue_dp, "pending", job_file))
+    return len(jobs)
+
+
+def alf_jobs(alf_dp, species_tree_fp, methods, **options):
+    """ Jobs for every (params_i, gene tree, method) of an ALF sweep
+
+    Gene trees are expected in params_i/params_i/GeneTrees/*.nwk (see
+    test_1_simulate_genomes.sh). If they were packed into
+    params_i/params_i/GeneTrees.nwka (see tree_archive.py), the jobs hold
+    the offset and size of their tree in the archive and the workers read
+    it with one seek instead of opening the gene tree file.
+
+    Parameters
+    ----------
+    alf_dp: string
+        directory path of the ALF sweep (containing params_* directories)
+    species_tree_fp: string
+        file path to species tree in Newick format
+    methods: list of strings
+        the methods used for HGT detection
+    options: dict
+        extra keys of every job (ex. phylonet_jar_fp, jane_cli_fp)
+
+    Returns
+    -------
+    jobs: list of dicts
+        jobs for enqueue_jobs
+    """
+    jobs = []
+    for params_dp in sorted(glob(join(alf_dp, "params_*"))):
+        params = basename(params_dp)
+        archive_fp = join(params_dp, params, "GeneTrees.nwka")
+        if exists(archive_fp):
+            archive = TreeArchive(archive_fp)
+            gene_trees = [(archive.gene_tree_fps[gene_id], {
+                'gene_tree_archive_fp': archive_fp,
+                'gene_tree_offset': archive.index[gene_id][0],
+                'gene_tree_bytes': archive.index[gene_id][1]})
+                for gene_id in archive.gene_ids]
+        else:
+            gene_trees = [(gene_tree_fp, {}) for gene_tree_fp in sorted(glob(
+                join(params_dp, params, "GeneTrees", "*.nwk")))]
+        for gene_tree_fp, location in gene_trees:
+            for method in methods:
+                job = {'params': params,
+                       'gene_tree_fp': gene_tree_fp,
+                       'species_tree_fp': species_tree_fp,
+                       'method': method}
+                job.update(location)
+                job.update(options)
+                jobs.append(job)
+    return jobs
+
+
+def claim_job(queue_dp, worker_id):
+    """ Claim the next pending job
+
+    Parameters
+    ----------
+    queue_dp: string
+        directory path of the queue
+    worker_id: string
+        unique worker ID
+
+    Returns
+    -------
+    claimed_fp: string
+        file path of the claimed job, None if no job is pending
+    """
+    for job_file in sorted(listdir(join(queue_dp, "pending"))):
+        if job_file.startswith('.'):
+            continue
+        pending_fp = join(queue_dp, "pending", job_file)
+        claimed_fp = join(queue_dp, "claimed", "%s.%s" % (job_file,
+                                                          worker_id))
+        try:
+            # rename keeps the modification time, the heartbeat is set
+            # first so that the claim is never seen as stale
+            utime(pending_fp, None)
+            rename(pending_fp, claimed_fp)
+        except OSError:
+            # claimed by another worker
+            continue
+        return claimed_fp
+    return None
+
+
+def release_job(queue_dp, claimed_fp, max_attempts=3, error=None):
+    """ Move a claimed job back to pending, or to failed after max_attempts
+
+    The number of attempts and the last error are kept in the job file.
+
+    Parameters
+    ----------
+    queue_dp: string
+        directory path of the queue
+    claimed_fp: string
+        file path of the claimed job
+    max_attempts: integer
+        number of attempts after which the job is moved to failed
+    error: string, optional
+        error of the attempt
+
+    Returns
+    -------
+    subdir: string
+        pending or failed, None if the job was released by another worker
+    """
+    claimed_file = basename(claimed_fp)
+    job_file = claimed_file.split('.json.')[0] + '.json'
+    # take the claim out of claimed/ first, only one worker can do so
+    tmp_fp = join(queue_dp, "pending", ".%s.tmp" % claimed_file)
+    try:
+        rename(claimed_fp, tmp_fp)
+    except OSError:
+        return None
+    with open(tmp_fp, 'U') as job_f:
+        job = json.load(job_f)
+    job['attempts'] = job.get('attempts', 0) + 1
+    if error is not None:
+        job['error'] = error
+    with open(tmp_fp, 'w') as job_f:
+        json.dump(job, job_f)
+    subdir = "pending" if job['attempts'] < max_attempts else "failed"
+    rename(tmp_fp, join(queue_dp, subdir, job_file))
+    return subdir
+
+
+def reclaim_stale_jobs(queue_dp, timeout, max_attempts=3):
+    """ Move claimed jobs without a recent heartbeat back to pending
+
+    Parameters
+    ----------
+    queue_dp: string
+        directory path of the queue
+    timeout: float
+        seconds since the last heartbeat after which a claim is stale
+    max_attempts: integer
+        number of attempts after which a job is moved to failed
+
+    Returns
+    -------
+    num_jobs: integer
+        number of reclaimed jobs
+    """
+    num_jobs = 0
+    now = time()
+    # releases interrupted between the two renames of release_job are
+    # released again
+    for tmp_file in listdir(join(queue_dp, "pending")):
+        if not (tmp_file.startswith('.') and tmp_file.endswith('.tmp')):
+            continue
+        tmp_fp = join(queue_dp, "pending", tmp_file)
+        try:
+            if now - getmtime(tmp_fp) >= timeout:
+                rename(tmp_fp, join(queue_dp, "claimed", tmp_file[1:-4]))
+        except OSError:
+            # released meanwhile
+            continue
+    for claimed_file in listdir(join(queue_dp, "claimed")):
+        claimed_fp = join(queue_dp, "claimed", claimed_file)
+        try:
+            if now - getmtime(claimed_fp) < timeout:
+                continue
+        except OSError:
+            # finished or reclaimed by another worker
+            continue
+        if release_job(queue_dp, claimed_fp, max_attempts,
+                       "no heartbeat for %d seconds" % timeout) is not None:
+            num_jobs += 1
+    return num_jobs
+
+
+def _outstanding_jobs(queue_dp):
+    """ Return True if jobs are pending, claimed or being released
+    """
+    return bool(listdir(join(queue_dp, "pending")) or
+                listdir(join(queue_dp, "claimed")))
+
+
+def _heartbeat(claimed_fp, interval, stop):
+    """ Refresh the modification time of claimed_fp until stop is set
+    """
+    while not stop.wait(interval):
+        try:
+            utime(claimed_fp, None)
+        except OSError:
+            # the claim was reclaimed
+            return
+
+
+def run_worker(queue_dp,
+               job_func,
+               worker_id=None,
+               timeout=600.0,
+               heartbeat=30.0,
+               poll=5.0,
+               max_attempts=3):
+    """ Process jobs until the queue is empty
+
+    A job whose job function raises an exception is moved back to pending,
+    and to failed after max_attempts attempts.
+
+    Parameters
+    ----------
+    queue_dp: string
+        directory path of the queue
+    job_func: function
+        called with the job dictionary, returns the number of HGTs
+    worker_id: string, optional
+        unique worker ID, defaults to <hostname>-<pid>
+    timeout: float
+        seconds without heartbeat after which claims of other workers are
+        reclaimed
+    heartbeat: float
+        seconds between heartbeats
+    poll: float
+        seconds to wait while other workers hold the remaining jobs
+    max_attempts: integer
+        number of attempts after which a job is moved to failed
+
+    Returns
+    -------
+    num_jobs: integer
+        number of jobs processed by this worker
+    """
+    if worker_id is None:
+        worker_id = "%s-%d" % (gethostname(), getpid())
+    shard_fp = join(queue_dp, "results", "%s.txt" % worker_id)
+    num_jobs = 0
+    while True:
+        reclaim_stale_jobs(queue_dp, timeout, max_attempts)
+        claimed_fp = claim_job(queue_dp, worker_id)
+        if claimed_fp is None:
+            # hidden files of pending are releases of other workers in
+            # progress, their jobs come back to pending
+            if not _outstanding_jobs(queue_dp):
+                return num_jobs
+            sleep(poll)
+            continue
+        with open(claimed_fp, 'U') as job_f:
+            job = json.load(job_f)
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat,
+                                args=(claimed_fp, heartbeat, stop))
+        beat.daemon = True
+        beat.start()
+        error = None
+        try:
+            number_hgts = job_func(job)
+        except Exception:
+            error = format_exc()
+        finally:
+            stop.set()
+            beat.join()
+        if error is not None:
+            sys.stderr.write("Job %s failed:\n%s" % (basename(claimed_fp),
+                                                     error))
+            release_job(queue_dp, claimed_fp, max_attempts, error)
+            continue
+        with open(shard_fp, 'a') as shard_f:
+            shard_f.write("%s\t%s\t%s\t%s\n" % (
+                job['params'], job['gene_tree_fp'], job['method'],
+                number_hgts))
+            shard_f.flush()
+            fsync(shard_f.fileno())
+        try:
+            rename(claimed_fp, join(queue_dp, "done",
+                                    basename(claimed_fp).split('.json.')[0] +
+                                    '.json'))
+        except OSError:
+            # reclaimed meanwhile, the job will be processed again
+            pass
+        num_jobs += 1
+
+
+_species_trees = {}
+_prune_caches = {}
+
+
+def run_hgt_job(job, working_dp):
+    """ Launch one HGT tool on one gene tree (see run_tools.run_tool)
+
+    Parameters
+    ----------
+    job: dict
+        job with keys params, gene_tree_fp, species_tree_fp, method and
+        optional gene_tree_archive_fp, gene_tree_offset, gene_tree_bytes,
+        phylonet_jar_fp, jane_cli_fp and prune_species
+    working_dp: string
+        directory path for job directories (local to the node)
+
+    Returns
+    -------
+    number_hgts: string
+        number of HGTs reported by the tool, "NaN" if not found
+    """
+    from skbio import TreeNode
+    from run_tools import run_tool
+    species_tree_fp = job['species_tree_fp']
+    if species_tree_fp not in _species_trees:
+        _species_trees[species_tree_fp] = TreeNode.read(species_tree_fp,
+                                                        format='newick')
+        _prune_caches[species_tree_fp] = {}
+    newick = None
+    if 'gene_tree_archive_fp' in job:
+        newick = read_archived_newick(job['gene_tree_archive_fp'],
+                                      job['gene_tree_offset'],
+                                      job['gene_tree_bytes'])
+    return run_tool(
+        gene_tree_fp=job['gene_tree_fp'],
+        species_tree=_species_trees[species_tree_fp],
+        method=job['method'],
+        working_dp=working_dp,
+        phylonet_jar_fp=job.get('phylonet_jar_fp'),
+        jane_cli_fp=job.get('jane_cli_fp'),
+        prune_cache=(_prune_caches[species_tree_fp]
+                     if job.get('prune_species') else None),
+        newick=newick)
+
+
+def merge_results(queue_dp):
+    """ Merge the result shards of all workers
+
+    Parameters
+    ----------
+    queue_dp: string
+        directory path of the queue
+
+    Returns
+    -------
+    results: dict
+        dictionary of params (keys) and dictionaries of gene tree file
+        paths (keys) and dictionaries of methods (keys) and number of HGTs
+    """
+    results = {}
+    for shard_fp in sorted(glob(join(queue_dp, "results", "*.txt"))):
+        with open(shard_fp, 'U') as shard_f:
+            for line in shard_f:
+                line = line.rstrip('\n').split('\t')
+                if len(line) != 4:
+                    # partially written line of an interrupted worker
+                    continue
+                params, gene_tree_fp, method, number_hgts = line
+                gene_results = results.setdefault(params, {}).setdefault(
+                    gene_tree_fp, {})
+                if method not in gene_results:
+                    gene_results[method] = number_hgts
+    return results
+
+
+def write_merged_results(results, output_dp):
+    """ Write one observed transfers table per params directory
+
+    Tables are written to <output_dp>/<params>_observed_hgts.txt, missing
+    results are written as NaN.
+
+    Parameters
+    ----------
+    results: dict
+        output of merge_results
+    output_dp: string
+        output directory path
+    """
+    if not isdir(output_dp):
+        makedirs(output_dp)
+    for params in sorted(results):
+        gene_tree_fps = sorted(results[params])
+        methods = [method for method in all_methods
+                   if any(method in results[params][fp]
+                          for fp in gene_tree_fps)]
+        for fp in gene_tree_fps:
+            for method in methods:
+                results[params][fp].setdefault(method, "NaN")
+        with open(join(output_dp, "%s_observed_hgts.txt" % params),
+                  'w') as output_f:
+            write_observed_transfers(results[params], gene_tree_fps,
+                                     methods, output_f)
+
+
+@click.group()
+def _main():
+    """ Distribute HGT tool jobs across nodes through a shared directory
+    """
+    pass
+
+
+@_main.command()
+@click.option('--queue-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=False),
+              help='Queue directory on a shared filesystem')
+@click.option('--alf-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='ALF sweep directory containing params_* directories')
+@click.option('--species-tree-fp', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='Species tree in Newick format')
+@click.option('--method', 'methods', required=False, multiple=True,
+              default=all_methods, type=click.Choice(all_methods),
+              help='The methods to be used for HGT detection')
+@click.option('--phylonet-jar-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='PhyloNet jar (RIATA-HGT)')
+@click.option('--jane-cli-fp', required=False,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=True),
+              help='jane-cli.sh (Jane 4)')
+@click.option('--prune-species-tree', 'prune_species', is_flag=True,
+              default=False,
+              help='Restrict the species tree to the species in the gene '
+                   'tree (T-REX and RIATA-HGT only)')
+def enqueue(queue_dir,
+            alf_dir,
+            species_tree_fp,
+            methods,
+            phylonet_jar_fp,
+            jane_cli_fp,
+            prune_species):
+    """ Add a job per (params_i, gene tree, method) of an ALF sweep
+    """
+    jobs = alf_jobs(alf_dir, species_tree_fp, methods,
+                    phylonet_jar_fp=phylonet_jar_fp,
+                    jane_cli_fp=jane_cli_fp,
+                    prune_species=prune_species)
+    sys.stdout.write("%d jobs added\n" % enqueue_jobs(queue_dir, jobs))
+
+
+@_main.command()
+@click.option('--queue-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Queue directory on a shared filesystem')
+@click.option('--working-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Directory for job directories (local to the node)')
+@click.option('--timeout', required=False, type=float, default=600.0,
+              show_default=True,
+              help='Seconds without heartbeat before a claim is stale')
+@click.option('--heartbeat', required=False, type=float, default=30.0,
+              show_default=True, help='Seconds between heartbeats')
+@click.option('--max-attempts', required=False, type=int, default=3,
+              show_default=True,
+              help='Attempts before a failing job is moved to failed/')
+def work(queue_dir,
+         working_dir,
+         timeout,
+         heartbeat,
+         max_attempts):
+    """ Process jobs until the queue is empty
+    """
+    run_worker(queue_dir, partial(run_hgt_job, working_dp=working_dir),
+               timeout=timeout, heartbeat=heartbeat,
+               max_attempts=max_attempts)
+
+
+@_main.command()
+@click.option('--queue-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=True,
+                              file_okay=False),
+              help='Queue directory on a shared filesystem')
+@click.option('--output-dir', required=True,
+              type=click.Path(resolve_path=True, readable=True, exists=False,
+                              file_okay=False),
+              help='Output directory for observed transfers tables')
+def merge(queue_dir,
+          output_dir):
+    """ Merge worker results into one observed transfers table per params
+    """
+    write_merged_results(merge_results(queue_dir), output_dir)
+
+
+if __name__ == "__main__":
+    _main()